@@ -1,29 +1,60 @@
 # app.py — Chainlit entry point
 # handles user interaction, runs LangGraph pipeline, manages HITL points
 import os
-import uuid
+import time
+import asyncio
 import chainlit as cl
-from dotenv import load_dotenv
-from graph.graph import graph
-
-load_dotenv()
+from chainlit.server import app as chainlit_server
+from fastapi.responses import JSONResponse
+from graph.graph import route_after_hitl_1
+from graph.session import CopilotSession
+from graph.deadlines import DeadlineExceeded
+from graph.batch import split_job_descriptions, rank_job_descriptions, select_entries, seed_state
+from graph.warmup import warm_up, readiness
+from graph.export import export_package
+from graph.preflight import read_cv, PreflightError, MAX_UPLOAD_BYTES
+from graph import metrics
+
+# --- App Startup ---
+# warm-up runs in the background so /health answers straight away, while
+# /ready returns 503 until the worker is warm — point the load balancer's
+# readiness probe at /ready so new workers only get traffic once warm
+
+warm_up_task = None
+
+@cl.on_app_startup
+async def on_app_startup():
+    global warm_up_task
+    warm_up_task = asyncio.create_task(warm_up())
+
+async def ready():
+    status = readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+# Chainlit's catch-all UI route would shadow a route registered after it — move /ready to the front
+chainlit_server.add_api_route("/ready", ready, methods=["GET"])
+chainlit_server.router.routes.insert(0, chainlit_server.router.routes.pop())
 
 # --- Chat Start ---
 # runs once when user opens the app in browser
 
+def current_user_id() -> str:
+    # per-user token budget — only when Chainlit authentication identifies the user
+    user = cl.user_session.get("user")
+    return getattr(user, "identifier", "") or ""
+
+
 @cl.on_chat_start
 async def on_chat_start():
 
-    # generate unique thread_id for this user session
+    # one CopilotSession per chat — it owns the unique thread_id
     # MemorySaver uses this to store and retrieve state across HITL pauses
-    thread_id = str(uuid.uuid4())
-
-    # store thread_id in Chainlit user session
     # cl.user_session persists data across messages in same chat
-    cl.user_session.set("thread_id", thread_id)
+    cl.user_session.set("session", CopilotSession(user_id=current_user_id()))
 
     # store pipeline stage tracker
     # stages: "awaiting_input" → "running" → "hitl_1" → "hitl_2" → "done"
+    # batch mode adds "batch_select" after "awaiting_input"
     cl.user_session.set("stage", "awaiting_input")
 
     # welcome message with instructions
@@ -37,6 +68,8 @@ I'll help you prepare a complete job application package.
 2. 📋 Paste the **Job Description** text in your message
 
 Send both together and I'll get to work!
+
+💡 Applying to several roles? Paste multiple job descriptions separated by a line of `===` and I'll rank them against your CV first.
     """).send()
 
 # --- Main Message Handler ---
@@ -45,45 +78,92 @@ Send both together and I'll get to work!
 @cl.on_message
 async def on_message(message: cl.Message):
 
-    # get current stage and thread_id from session
+    # get current stage and pipeline session
     stage = cl.user_session.get("stage")
-    thread_id = cl.user_session.get("thread_id")
-
-    # LangGraph config — thread_id links this run to saved state in MemorySaver
-    config = {"configurable": {"thread_id": thread_id}}
-
-    # ================================================================
-    # STAGE 1 — awaiting_input
-    # user sends CV file + JD text to kick off the pipeline
-    # ================================================================
-    if stage == "awaiting_input":
-        await handle_initial_input(message, config)
-
-    # ================================================================
-    # STAGE 2 — hitl_1
-    # user reviews cover letter draft and sends approval or feedback
-    # ================================================================
-    elif stage == "hitl_1":
-        await handle_hitl_1(message, config)
-
-    # ================================================================
-    # STAGE 3 — hitl_2
-    # user reviews Q&A and sends acceptance or requests more questions
-    # ================================================================
-    elif stage == "hitl_2":
-        await handle_hitl_2(message, config)
-
-    # ================================================================
-    # STAGE 4 — done
-    # pipeline finished, inform user
-    # ================================================================
-    elif stage == "done":
-        await cl.Message(content="✅ Your application package is complete! Start a new chat to prepare for another role.").send()
+    session = cl.user_session.get("session")
+
+    # a step that runs past its latency budget is cancelled — the stage does not
+    # change, so sending the same message again retries from the last checkpoint
+    try:
+        # ================================================================
+        # STAGE 1 — awaiting_input
+        # user sends CV file + JD text to kick off the pipeline
+        # ================================================================
+        if stage == "awaiting_input":
+            await handle_initial_input(message, session)
+
+        # ================================================================
+        # STAGE 1b — batch_select
+        # user picks which ranked job descriptions to prepare packages for
+        # ================================================================
+        elif stage == "batch_select":
+            await handle_batch_select(message)
+
+        # ================================================================
+        # STAGE 2 — hitl_1
+        # user reviews cover letter draft and sends approval or feedback
+        # ================================================================
+        elif stage == "hitl_1":
+            await handle_hitl_1(message, session)
+
+        # ================================================================
+        # STAGE 3 — hitl_2
+        # user reviews Q&A and sends acceptance or requests more questions
+        # ================================================================
+        elif stage == "hitl_2":
+            await handle_hitl_2(message, session)
+
+        # ================================================================
+        # STAGE 4 — done
+        # pipeline finished, inform user
+        # ================================================================
+        elif stage == "done":
+            await cl.Message(content="✅ Your application package is complete! Start a new chat to prepare for another role.").send()
+
+    except DeadlineExceeded:
+        await cl.Message(content="⏱️ That step took too long and was stopped. Send your message again to retry.").send()
+
+# --- Stop / Chat End ---
+# the stop button cancels the running handler (Chainlit does that itself) — the
+# session counts the wasted work and keeps its checkpoints, so resending retries
+# a closed tab ends the chat — cancel whatever is still running and drop the thread
+
+def cancel_exports():
+    # every package's background renders — a batch chat can have several running
+    for export_task in list(cl.user_session.get("export_tasks") or ()):
+        export_task.cancel()
+
+@cl.on_stop
+async def on_stop():
+    session = cl.user_session.get("session")
+    if session is not None:
+        await session.cancel()
+
+    # stop also stops the downloads still being rendered
+    cancel_exports()
+
+@cl.on_chat_end
+async def on_chat_end():
+
+    # batch ranking runs outside any session — cancel the handler task itself too
+    task = cl.context.session.current_task
+    if task is not None and not task.done():
+        task.cancel()
+
+    session = cl.user_session.get("session")
+    if session is not None:
+        await session.cancel(discard=True)
+
+    # queued batch packages will never be prepared
+    cl.user_session.set("batch_queue", [])
+
+    # nobody is left to receive the downloads (renders already started still fill the cache)
+    cancel_exports()
 
 # --- Handler: Initial Input ---
 # processes CV file upload + JD text, starts the graph
 
-async def handle_initial_input(message: cl.Message, config: dict):
+async def handle_initial_input(message: cl.Message, session: CopilotSession):
 
     # check if user attached a file
     if not message.elements:
@@ -106,39 +186,87 @@ async def handle_initial_input(message: cl.Message, config: dict):
         await cl.Message(content=f"⚠️ Unsupported file type **{file_extension}**. Please upload a PDF or DOCX file only.").send()
         return
 
-    # get file path directly from Chainlit's temp storage
-    cv_file_path = uploaded_file.path
-    
+    # preflight — sniff the real type, enforce size / page / decompressed-size limits
+    # and extract the text from memory, in a worker thread, within a time cap
+    try:
+        cv_raw_text = await read_cv(upload_bytes(uploaded_file))
+    except PreflightError as error:
+        await cl.Message(content=f"⚠️ {error}").send()
+        return
+
+    # several JDs pasted at once — rank them first, run the pipeline for the chosen ones
+    job_descriptions = split_job_descriptions(message.content)
+    if len(job_descriptions) > 1:
+        await handle_batch_input(job_descriptions, cv_raw_text)
+        return
+
     # notify user pipeline is starting
-    await cl.Message(content="🚀 Got it! Starting your application pipeline...\n\n⏳ Parsing CV and analyzing job description...").send()
+    await cl.Message(content="🚀 Got it! Starting your application pipeline...\n\n⏳ Analyzing job description...").send()
+
+    await start_pipeline(
+        session,
+        job_description=message.content.strip(),   # JD text from message
+        cv_raw_text=cv_raw_text                     # already extracted — parse_cv skips
+    )
+
+def upload_bytes(uploaded_file) -> bytes:
+    # Chainlit hands over the upload in memory (content) or in its temp folder (path) —
+    # read it once, never more than the preflight size limit + 1 byte
+    if uploaded_file.content:
+        return uploaded_file.content if isinstance(uploaded_file.content, bytes) else uploaded_file.content.encode("utf-8")
+    with open(uploaded_file.path, "rb") as upload:
+        return upload.read(MAX_UPLOAD_BYTES + 1)
+
+# --- Helper: Stream Into Message ---
+# forwards cover letter tokens from a session event stream into a chat bubble
+# returns (streamed_text, StageResult) once the run pauses or finishes
+
+async def stream_into(stream_msg: cl.Message, events):
 
-    # build initial state to feed into graph
-    initial_state = {
-        "job_description": message.content.strip(),   # JD text from message
-        "cv_file_path": cv_file_path,                 # path to saved CV file
-        "messages": []                                # empty message history
-    }
+    streamed_text = ""      # what the user saw streaming — compared against the final draft
+    result = None
+
+    async for event in events:
+        if event.type == "token":
+            streamed_text += event.text
+            await stream_msg.stream_token(event.text)
+        elif event.type == "result":
+            result = event.result
+
+    # finalize the streamed message
+    await stream_msg.update()
+    return streamed_text, result
+
+# --- Pipeline Start ---
+# runs the graph from the beginning until it pauses at HITL 1
+
+async def start_pipeline(session: CopilotSession, **start_kwargs):
 
     # create a live streaming message bubble for cover letter
     cover_letter_msg = cl.Message(content="✍️ Writing your cover letter...\n\n")
     await cover_letter_msg.send()
 
-    async for event in graph.astream_events(initial_state, config=config, version="v2"):
-        if event["event"] == "on_chat_model_stream":
-            node_name = event.get("metadata", {}).get("langgraph_node", "")
-            if node_name not in ["write_cover_letter"]:
-                continue
-            chunk = event["data"]["chunk"]
-            token = chunk.content
-            if token:
-                await cover_letter_msg.stream_token(token)
+    streamed_text, result = await stream_into(cover_letter_msg, session.stream_start(**start_kwargs))
 
-    # finalize the streamed message
-    await cover_letter_msg.update()
+    if result.budget_exhausted:
+        await cl.Message(content="⚠️ Your token budget is almost used up, so only one cover letter draft was written instead of several options.").send()
+
+    # several variants — show them side by side and let the user pick one
+    variants = result.cover_letter_variants
+    if len(variants) > 1:
+        await show_variants(variants)
+        await cl.Message(content=f"""
+✅ **{len(variants)} Cover Letter Options Ready!**
+
+**What would you like to do?**
+- Type the option number (e.g. **`2`**) to approve that cover letter and continue
+- Type **`2: your feedback`** and I'll rewrite option 2
+        """).send()
+        cl.user_session.set("stage", "hitl_1")
+        return
 
-    # graph has paused at hitl_1 — get current state to read cover letter draft
-    current_state = graph.get_state(config)
-    cover_letter_draft = current_state.values.get("cover_letter_draft", "")
+    # streamed text may differ from the draft if the validator fixed or retried it
+    await show_validated_draft(result.values, streamed_text)
 
     # display cover letter draft to user
     await cl.Message(content=f"""
@@ -152,54 +280,159 @@ async def handle_initial_input(message: cl.Message, config: dict):
     # update stage to hitl_1 — next message will be handled by hitl_1 handler
     cl.user_session.set("stage", "hitl_1")
 
+# --- Handler: Batch Input ---
+# one CV, many JDs — parse once, analyze all concurrently, show a ranked list
+
+async def handle_batch_input(job_descriptions: list, cv_raw_text: str):
+
+    await cl.Message(content=f"📊 Got **{len(job_descriptions)}** job descriptions! Ranking them against your CV...").send()
+
+    batch = await rank_job_descriptions(job_descriptions, cv_raw_text=cv_raw_text)
+    ranked = batch["ranked"]
+
+    # JDs whose analysis failed are listed, not ranked — the rest are still usable
+    failed_display = ""
+    for entry in batch["failed"]:
+        first_line = entry["job_description"].splitlines()[0][:60]
+        failed_display += f"⚠️ JD #{entry['index'] + 1} (*{first_line}*) could not be analyzed: {entry['error']}\n"
+
+    if not ranked:
+        await cl.Message(content=f"{failed_display}\nNone of the job descriptions could be analyzed. Please check them and send them again with your CV.").send()
+        return
+
+    ranking_display = "📊 **Job Descriptions Ranked by Match**\n\n"
+    for position, entry in enumerate(ranked, 1):
+        missing = ", ".join(entry["missing"][:5]) or "none"
+        ranking_display += f"**{position}. {entry['role'] or 'Untitled role'}** — 🎯 {entry['match_score']}/10\n"
+        ranking_display += f"Missing: *{missing}*\n\n"
+    if failed_display:
+        ranking_display += f"**Not ranked:**\n{failed_display}\n"
+
+    ranking_display += """
+**What would you like to do?**
+- Type the numbers to prepare packages for (e.g. **`1, 3`**)
+- Or type **`top 2`** to take the best matches
+"""
+    await cl.Message(content=ranking_display).send()
+
+    # keep parsed CV + ranked list for the selection step
+    cl.user_session.set("batch", batch)
+    cl.user_session.set("stage", "batch_select")
+
+# --- Handler: Batch Selection ---
+# queues the chosen JDs — each one runs through the normal HITL pipeline in turn
+
+async def handle_batch_select(message: cl.Message):
+
+    batch = cl.user_session.get("batch")
+    selected = select_entries(batch["ranked"], message.content)
+
+    if not selected:
+        await cl.Message(content="⚠️ Please type the numbers from the list (e.g. `1, 3`) or `top 2`.").send()
+        return
+
+    cl.user_session.set("batch_queue", selected)
+    await start_next_batch_entry()
+
+async def start_next_batch_entry():
+
+    batch = cl.user_session.get("batch")
+    queue = cl.user_session.get("batch_queue") or []
+    entry = queue.pop(0)
+    cl.user_session.set("batch_queue", queue)
+
+    # the previous package is already rendered (its final output lives in "packages")
+    # and on_chat_end only sees the current session — drop its thread before replacing it
+    previous = cl.user_session.get("session")
+    if previous is not None:
+        await previous.cancel(discard=True)
+
+    # fresh session (thread) per JD — each package has its own state and HITL history
+    session = CopilotSession(user_id=current_user_id())
+    cl.user_session.set("session", session)
+
+    await cl.Message(content=f"🚀 Preparing your package for **{entry['role'] or 'the selected role'}**...").send()
+
+    # CV text and JD analysis are seeded — the graph starts at the cover letter
+    await start_pipeline(session, **seed_state(batch["cv_raw_text"], entry))
+
+# --- Helper: Validated Draft ---
+# the streamed tokens are not always the final draft — the validator node may tidy
+# the letter or send it back for a rewrite, and targeted edits patch paragraphs
+# without streaming — in those cases show the version the user is approving
+
+async def show_validated_draft(state_values: dict, streamed_text: str):
+
+    report = state_values.get("cover_letter_report", {}) or {}
+    draft = state_values.get("cover_letter_draft", "")
+
+    # the streamed bubble is already exactly the draft — nothing to show
+    if draft.strip() == streamed_text.strip():
+        return
+
+    if report.get("fixed") or report.get("retries"):
+        content = "🛠️ **Draft adjusted to match the cover letter rules:**\n\n"
+    else:
+        content = "📝 **Updated cover letter:**\n\n"
+    content += draft
+
+    # retries used up but some rule is still broken — let the user know
+    if report.get("unfixable"):
+        content += "\n\n⚠️ *Still needs attention:* " + ", ".join(report["unfixable"])
+
+    await cl.Message(content=content).send()
+
+# --- Helper: Cover Letter Variants ---
+# all options in one message so they render next to each other
+
+async def show_variants(variants: list):
+
+    elements = [
+        cl.Text(
+            name=f"Option {i}",
+            content=f"*{variant.get('angle', '')}*\n\n{variant.get('content', '')}",
+            display="inline"
+        )
+        for i, variant in enumerate(variants, 1)
+    ]
+    await cl.Message(content="### 📄 Cover Letter Options", elements=elements).send()
+
 # --- Handler: HITL 1 ---
 # user reviews cover letter, approves or requests changes
 
-async def handle_hitl_1(message: cl.Message, config: dict):
+async def handle_hitl_1(message: cl.Message, session: CopilotSession):
 
     # get user feedback from message
     user_feedback = message.content.strip()
 
-    # update state with user feedback by resuming graph with new state values
-    graph.update_state(
-        config,
-        {"hitl_1_feedback": user_feedback}     # inject feedback into state
-    )
+    # "approve" or a bare option number ("2") both approve — same rule as the graph router,
+    # which only takes a number that matches one of the variants on screen
+    variants = (await session.get_result()).cover_letter_variants
+    approved = route_after_hitl_1({"hitl_1_feedback": user_feedback, "cover_letter_variants": variants}) == "proceed_to_interview"
 
     # check if user approved or wants changes
-    if user_feedback.lower() == "approve":
+    if approved:
         await cl.Message(content="✅ Cover letter approved! Generating interview questions...").send()
     else:
         await cl.Message(content=f"✏️ Got it! Rewriting cover letter with your feedback...").send()
 
     # create streaming bubble for next generation step
-    if user_feedback.lower() == "approve":
+    if approved:
         stream_msg = cl.Message(content="🎯 Generating interview questions...\n\n")
     else:
         stream_msg = cl.Message(content="✍️ Rewriting cover letter...\n\n")
 
     await stream_msg.send()
 
-    # resume graph with streaming
-    async for event in graph.astream_events(None, config=config, version="v2"):
-        if event["event"] == "on_chat_model_stream":
-            node_name = event.get("metadata", {}).get("langgraph_node", "")
-            if node_name not in ["write_cover_letter"]:
-                continue
-            chunk = event["data"]["chunk"]
-            token = chunk.content
-            if token:
-                await stream_msg.stream_token(token)
-
-    await stream_msg.update()
+    # inject feedback into state and resume graph with streaming
+    streamed_text, result = await stream_into(stream_msg, session.stream_feedback(user_feedback))
 
-    # graph paused at hitl_2 — get current state to read Q&A
-    current_state = graph.get_state(config)
-    interview_qa = current_state.values.get("interview_qa", [])
+    # graph paused at hitl_2 (or back at hitl_1) — read Q&A from the result
+    interview_qa = result.interview_qa
 
     # if cover letter was regenerated, show new version first
-    if user_feedback.lower() != "approve":
-        new_draft = current_state.values.get("cover_letter_draft", "")
+    if not approved:
+        await show_validated_draft(result.values, streamed_text)
 
         await cl.Message(content=f"""
 ✅ **Cover Letter Rewritten!**
@@ -238,17 +471,11 @@ Type **`approve`** to accept or provide more feedback.
 # --- Handler: HITL 2 ---
 # user reviews Q&A, accepts or requests more questions
 
-async def handle_hitl_2(message: cl.Message, config: dict):
+async def handle_hitl_2(message: cl.Message, session: CopilotSession):
 
     # get user feedback from message
     user_feedback = message.content.strip()
 
-    # inject hitl_2_feedback into state
-    graph.update_state(
-        config,
-        {"hitl_2_feedback": user_feedback}
-    )
-
     if user_feedback.lower() == "accept":
         await cl.Message(content="✅ Interview questions accepted! Running gap analysis and assembling your package...").send()
     else:
@@ -262,25 +489,18 @@ async def handle_hitl_2(message: cl.Message, config: dict):
 
     await stream_msg.send()
 
-    # resume graph with streaming
-    async for event in graph.astream_events(None, config=config, version="v2"):
-        if event["event"] == "on_chat_model_stream":
-            node_name = event.get("metadata", {}).get("langgraph_node", "")
-            if node_name not in ["write_cover_letter"]:
-                continue
-            chunk = event["data"]["chunk"]
-            token = chunk.content
-            if token:
-                await stream_msg.stream_token(token)
-
-    await stream_msg.update()
-
-    # get final state
-    current_state = graph.get_state(config)
+    # inject hitl_2_feedback into state and resume graph with streaming
+    _, result = await stream_into(stream_msg, session.stream_feedback(user_feedback))
 
     # if user requested more questions — show updated Q&A and stay in hitl_2
     if user_feedback.lower() != "accept":
-        interview_qa = current_state.values.get("interview_qa", [])
+
+        # optional round refused — nothing new to show, only accepting is left
+        if result.budget_exhausted:
+            await cl.Message(content="⚠️ Your token budget is used up, so no more questions can be generated. Type **`accept`** to finish your package with the questions you already have.").send()
+            return
+
+        interview_qa = result.interview_qa
 
         qa_display = "➕ **Updated Interview Questions:**\n\n"
         for i, qa in enumerate(interview_qa, 1):
@@ -298,79 +518,171 @@ async def handle_hitl_2(message: cl.Message, config: dict):
         return
 
     # pipeline complete — render final output cards
-    final_output = current_state.values.get("final_output", {})
-    await render_final_output(final_output)
+    await render_final_output(result.final_output)
 
     # update stage to done
     cl.user_session.set("stage", "done")
 
+    # batch mode — move on to the next selected JD, if any
+    if cl.user_session.get("batch_queue"):
+        await start_next_batch_entry()
+
 # --- Render Final Output ---
-# formats and displays the three output cards
+# summary first: the header and the cover letter are sent straight away, the
+# interview Q&A and the gap report only when asked for — a page at a time —
+# so a package with dozens of questions no longer arrives as one large burst
+# bytes sent and time-to-first-render are recorded in graph.metrics (delivery.*)
+
+QA_PAGE_SIZE = 5
+
+def payload_bytes(message: cl.Message) -> int:
+    # text the message puts on the websocket — its content plus inline text elements
+    size = len(message.content.encode("utf-8"))
+    for element in message.elements or []:
+        if isinstance(getattr(element, "content", None), str):
+            size += len(element.content.encode("utf-8"))
+    return size
+
+async def send_counted(message: cl.Message):
+    metrics.increment("delivery.bytes_sent", payload_bytes(message))
+    await message.send()
+
+def qa_page_content(qa_pairs: list, page: int) -> str:
+    qa_content = ""
+    first = page * QA_PAGE_SIZE
+    for i, qa in enumerate(qa_pairs[first:first + QA_PAGE_SIZE], first + 1):
+        qa_content += f"**Q{i} [{qa.get('category', '').upper()}]**\n"
+        qa_content += f"{qa.get('question', '')}\n\n"
+        qa_content += f"💡 *{qa.get('suggested_answer', '')}*\n\n"
+        qa_content += "---\n\n"
+    return qa_content
+
+def gap_report_content(gap_data: dict) -> str:
+    gap_content = f"**Overall:** {gap_data.get('overall_assessment', '')}\n\n"
+    gap_content += f"**Match Score:** {gap_data.get('match_score', 0)}/10\n\n---\n\n"
+    for gap in gap_data.get("gaps", []):
+        gap_content += f"{gap.get('severity_icon', '🟢')} **{gap.get('gap', '')}** *({gap.get('severity', '').upper()})*\n"
+        gap_content += f"→ {gap.get('advice', '')}\n\n"
+    return gap_content
+
+def qa_page_action(package: int, page: int, total: int) -> cl.Action:
+    first = page * QA_PAGE_SIZE + 1
+    last = min(total, first + QA_PAGE_SIZE - 1)
+    return cl.Action(
+        name="qa_page",
+        payload={"package": package, "page": page},
+        label=f"❓ Show questions {first}–{last} of {total}"
+    )
 
 async def render_final_output(final_output: dict):
 
+    started = time.perf_counter()
     cover_letter_data = final_output.get("cover_letter", {})
     qa_data = final_output.get("interview_qa", {})
     gap_data = final_output.get("gap_report", {})
     meta = final_output.get("meta", {})
 
-    # summary header
-    await cl.Message(content=f"""
+    # packages are kept in the session so the page buttons can load them later
+    # (batch mode delivers several packages in one chat)
+    packages = cl.user_session.get("packages") or []
+    packages.append(final_output)
+    cl.user_session.set("packages", packages)
+    package = len(packages) - 1
+
+    # summary header + cover letter — the first render
+    await send_counted(cl.Message(content=f"""
 🎉 **Your Application Package is Ready!**
 
 📋 Role: **{meta.get('role', '')}**
 🎯 Match Score: **{meta.get('match_score', 0)}/10**
 ❓ Questions Generated: **{meta.get('total_questions', 0)}**
 ⚠️ Gaps Found: **{meta.get('total_gaps', 0)}**
-    """).send()
+    """))
 
-    # --- cover letter card as PDF text element ---
     cover_letter_text = cl.Text(
         name="📄 Cover Letter",
         content=cover_letter_data.get("content", ""),
         display="inline"
     )
-    await cl.Message(
+    await send_counted(cl.Message(
         content=f"### 📄 Cover Letter — *{cover_letter_data.get('role', '')}*",
         elements=[cover_letter_text]
-    ).send()
+    ))
+    metrics.observe("delivery.first_render_seconds", time.perf_counter() - started)
 
-    # --- Q&A card ---
+    # Q&A + gap report on demand — record what the old all-inline delivery would have sent on top
     qa_pairs = qa_data.get("qa_pairs", [])
-    qa_content = ""
-    for i, qa in enumerate(qa_pairs, 1):
-        qa_content += f"**Q{i} [{qa.get('category', '').upper()}]**\n"
-        qa_content += f"{qa.get('question', '')}\n\n"
-        qa_content += f"💡 *{qa.get('suggested_answer', '')}*\n\n"
-        qa_content += "---\n\n"
+    deferred = "".join(qa_page_content(qa_pairs, page) for page in range(-(-len(qa_pairs) // QA_PAGE_SIZE)))
+    metrics.increment("delivery.bytes_deferred", len((deferred + gap_report_content(gap_data)).encode("utf-8")))
+
+    actions = [cl.Action(name="gap_report", payload={"package": package}, label="⚠️ Show gap report")]
+    if qa_pairs:
+        actions.insert(0, qa_page_action(package, 0, len(qa_pairs)))
+    await send_counted(cl.Message(
+        content=f"### ❓ Interview Preparation — *{qa_data.get('total_questions', 0)} Questions* · ⚠️ Gap Report\n"
+                "Open them below, or grab the full package from the downloads.",
+        actions=actions
+    ))
+
+    await cl.Message(content="✅ **All done! Good luck with your application. You've got this! 🚀**").send()
+
+    # downloadable files are rendered in the background — the chat stays responsive
+    # and each file is attached as soon as it is ready; one task per package (a batch
+    # chat has several), each removing itself when done, so stop / chat end cancel all
+    export_tasks = cl.user_session.get("export_tasks")
+    if export_tasks is None:
+        export_tasks = set()
+        cl.user_session.set("export_tasks", export_tasks)
+    export_task = asyncio.create_task(attach_downloads(final_output))
+    export_tasks.add(export_task)
+    export_task.add_done_callback(export_tasks.discard)
+
+# --- On-demand Sections ---
+# one page of Q&A per click, with a button for the next page
+
+@cl.action_callback("qa_page")
+async def on_qa_page(action: cl.Action):
+    packages = cl.user_session.get("packages") or []
+    package, page = action.payload.get("package", 0), action.payload.get("page", 0)
+    if package >= len(packages):
+        return
 
-    qa_text = cl.Text(
-        name=f"❓ Interview Preparation ({qa_data.get('total_questions', 0)} Questions)",
-        content=qa_content,
-        display="inline"
-    )
-    await cl.Message(
-        content=f"### ❓ Interview Preparation — *{qa_data.get('total_questions', 0)} Questions*",
-        elements=[qa_text]
-    ).send()
+    qa_pairs = packages[package].get("interview_qa", {}).get("qa_pairs", [])
+    actions = []
+    if (page + 1) * QA_PAGE_SIZE < len(qa_pairs):
+        actions.append(qa_page_action(package, page + 1, len(qa_pairs)))
 
-    # --- gap report card ---
-    gaps = gap_data.get("gaps", [])
-    gap_content = f"**Overall:** {gap_data.get('overall_assessment', '')}\n\n"
-    gap_content += f"**Match Score:** {gap_data.get('match_score', 0)}/10\n\n---\n\n"
+    await action.remove()
+    await send_counted(cl.Message(content=qa_page_content(qa_pairs, page), actions=actions))
+    metrics.increment("delivery.qa_pages_opened")
 
-    for gap in gaps:
-        gap_content += f"{gap.get('severity_icon', '🟢')} **{gap.get('gap', '')}** *({gap.get('severity', '').upper()})*\n"
-        gap_content += f"→ {gap.get('advice', '')}\n\n"
+@cl.action_callback("gap_report")
+async def on_gap_report(action: cl.Action):
+    packages = cl.user_session.get("packages") or []
+    package = action.payload.get("package", 0)
+    if package >= len(packages):
+        return
 
     gap_text = cl.Text(
         name="⚠️ Gap Report",
-        content=gap_content,
+        content=gap_report_content(packages[package].get("gap_report", {})),
         display="inline"
     )
-    await cl.Message(
-        content="### ⚠️ Gap Report",
-        elements=[gap_text]
-    ).send()
+    await action.remove()
+    await send_counted(cl.Message(content="### ⚠️ Gap Report", elements=[gap_text]))
+    metrics.increment("delivery.gap_reports_opened")
+
+# --- Downloads ---
+# attaches the Markdown / DOCX / PDF exports to one message as they finish
+
+async def attach_downloads(final_output: dict):
+
+    downloads = cl.Message(content="📥 **Downloads** — preparing Markdown, DOCX and PDF…")
+    await downloads.send()
+
+    async for export in export_package(final_output):
+        downloads.elements.append(cl.File(name=export.filename, path=export.path, mime=export.mime, display="inline"))
+        await downloads.update()
 
-    await cl.Message(content="✅ **All done! Good luck with your application. You've got this! 🚀**").send()
\ No newline at end of file
+    downloads.content = "📥 **Downloads**" if downloads.elements else "⚠️ Downloads could not be prepared this time."
+    await downloads.update()
\ No newline at end of file
@@ -0,0 +1,95 @@
+# bench_fused_analysis.py — two-call vs fused analysis: latency and token cost
+# runs against the real OpenAI API (needs OPENAI_API_KEY), so it is not part of any test run
+#
+# usage:
+#   python -m benchmarks.bench_fused_analysis --cv cv.pdf --jd jd.txt --runs 5
+#
+# two-call path: analyze_jd  →  run_qa_check (skill matcher + advice call)
+# fused path:    analyze_jd with FUSED_ANALYSIS on (one call, run_qa_check skips)
+
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from langchain_core.callbacks import get_usage_metadata_callback
+from graph.nodes import jd_analyzer
+from graph.nodes.parser import parse_cv
+from graph.nodes.qa_agent import run_qa_check
+from graph.llm import usage_cost as model_usage_cost
+
+
+def usage_cost(usage_by_model: dict) -> dict:
+    """Sums token usage across models and prices it with graph.llm.MODEL_PRICES."""
+    input_tokens = sum(usage.get("input_tokens", 0) for usage in usage_by_model.values())
+    output_tokens = sum(usage.get("output_tokens", 0) for usage in usage_by_model.values())
+
+    # model names come back versioned, e.g. "gpt-4o-2024-08-06" — usage_cost handles that
+    cost = sum(model_usage_cost(model, usage) for model, usage in usage_by_model.items())
+
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "cost_usd": cost}
+
+
+def run_two_call(job_description: str, cv_raw_text: str) -> dict:
+    jd_analyzer.FUSED_ANALYSIS = False
+    state = {"job_description": job_description, "cv_raw_text": cv_raw_text}
+    state.update(asyncio.run(jd_analyzer.analyze_jd(state)))
+    state.update(asyncio.run(run_qa_check(state)))
+    return state
+
+
+def run_fused(job_description: str, cv_raw_text: str) -> dict:
+    jd_analyzer.FUSED_ANALYSIS = True
+    state = {"job_description": job_description, "cv_raw_text": cv_raw_text}
+    state.update(asyncio.run(jd_analyzer.analyze_jd(state)))
+    state.update(asyncio.run(run_qa_check(state)))          # skips — qa_flags already set
+    return state
+
+
+def measure(path_function, job_description: str, cv_raw_text: str, runs: int) -> dict:
+    """Runs one path `runs` times on a cold cache and summarises latency + usage."""
+
+    latencies, samples = [], []
+    for _ in range(runs):
+        jd_analyzer.clear_cache()                  # every run pays for the JD analysis
+        with get_usage_metadata_callback() as callback:
+            started = time.perf_counter()
+            path_function(job_description, cv_raw_text)
+            latencies.append(time.perf_counter() - started)
+        samples.append(usage_cost(callback.usage_metadata))
+
+    return {
+        "runs": runs,
+        "latency_median_s": statistics.median(latencies),
+        "latency_min_s": min(latencies),
+        "input_tokens_mean": statistics.mean(s["input_tokens"] for s in samples),
+        "output_tokens_mean": statistics.mean(s["output_tokens"] for s in samples),
+        "cost_usd_mean": statistics.mean(s["cost_usd"] for s in samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two-call and fused JD + gap analysis.")
+    parser.add_argument("--cv", required=True, help="CV file (PDF/DOCX)")
+    parser.add_argument("--jd", required=True, help="text file with the job description")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    cv_raw_text = parse_cv({"cv_file_path": args.cv})["cv_raw_text"]
+    with open(args.jd, encoding="utf-8") as jd_file:
+        job_description = jd_file.read()
+
+    results = {
+        "two_call": measure(run_two_call, job_description, cv_raw_text, args.runs),
+        "fused": measure(run_fused, job_description, cv_raw_text, args.runs),
+    }
+    results["fused_vs_two_call"] = {
+        "latency_ratio": results["fused"]["latency_median_s"] / results["two_call"]["latency_median_s"],
+        "cost_ratio": results["fused"]["cost_usd_mean"] / max(results["two_call"]["cost_usd_mean"], 1e-12),
+    }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# bench_import_time.py — cold import time of the entry points, checked against a budget
+# every target is imported in a fresh interpreter with `python -X importtime`,
+# and the cumulative time of its top-level module is read from stderr
+# (best of --runs, so a noisy machine does not fail the check)
+#
+# usage:
+#   python -m benchmarks.bench_import_time                  # compare with import_budget.json
+#   python -m benchmarks.bench_import_time --runs 7 --top 10
+#   python -m benchmarks.bench_import_time --update         # write current times as the new budget
+#
+# exits with status 1 when any target is over budget
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+# tracked budget: module → max cumulative import milliseconds
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), "import_budget.json")
+
+# modules measured when the budget file does not list any
+DEFAULT_TARGETS = ["graph.graph", "graph.session", "main", "app"]
+
+# headroom applied by --update, so normal machine noise stays under budget
+UPDATE_HEADROOM = 1.5
+
+# "import time:       self [us] |     cumulative |  imported package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module: str) -> list:
+    """(cumulative µs, self µs, module name) for every module a fresh `import module` loads."""
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    profile = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            profile.append((int(match.group(2)), int(match.group(1)), match.group(4)))
+    return profile
+
+
+def measure(module: str, runs: int) -> dict:
+    """Best-of-`runs` cumulative import time of `module`, with the slowest imports of that run."""
+
+    best = None
+    for _ in range(runs):
+        profile = import_profile(module)
+        total = next((cumulative for cumulative, _self, name in profile if name == module), 0)
+        if best is None or total < best[0]:
+            best = (total, profile)
+
+    total, profile = best
+    slowest = sorted(profile, reverse=True)
+    return {
+        "ms": total / 1000,
+        "slowest": [(name, cumulative / 1000) for cumulative, _self, name in slowest if name != module],
+    }
+
+
+def load_budget() -> dict:
+    try:
+        with open(BUDGET_PATH, encoding="utf-8") as budget_file:
+            return json.load(budget_file)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark with a tracked budget.")
+    parser.add_argument("modules", nargs="*", help="modules to measure (default: the budget's modules)")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    parser.add_argument("--update", action="store_true", help="write the measured times (+headroom) as the budget")
+    args = parser.parse_args()
+
+    budget = load_budget()
+    modules = args.modules or list(budget) or DEFAULT_TARGETS
+
+    results, over_budget = {}, []
+    for module in modules:
+        result = measure(module, args.runs)
+        results[module] = result
+        limit = budget.get(module)
+        status = "no budget" if limit is None else ("OVER" if result["ms"] > limit else "ok")
+        if status == "OVER":
+            over_budget.append(module)
+
+        print(f"{module:<20} {result['ms']:>9.1f} ms   budget {limit if limit is not None else '-':>8}   {status}")
+        for name, milliseconds in result["slowest"][:args.top]:
+            print(f"    {name:<40} {milliseconds:>9.1f} ms")
+
+    if args.update:
+        budget.update({module: round(result["ms"] * UPDATE_HEADROOM) for module, result in results.items()})
+        with open(BUDGET_PATH, "w", encoding="utf-8") as budget_file:
+            json.dump(budget, budget_file, indent=2)
+            budget_file.write("\n")
+        print(f"budget written to {BUDGET_PATH}")
+        return
+
+    if over_budget:
+        print(f"over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
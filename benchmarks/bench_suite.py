@@ -0,0 +1,343 @@
+# bench_suite.py — micro + macro benchmarks with a stored baseline and a regression gate
+# runs locally with no API key: the macro runs use benchmarks/local_model.py in place of
+# ChatOpenAI, with a configurable per-request latency
+#
+#   micro   parse_cv on generated PDF / DOCX CVs (1, 5, 20 pages), assemble_output,
+#           the route_after_hitl_* routers, checkpoint serialization of realistic states
+#           (best of many runs)
+#   macro   build_graph(), one full session (start → approve → one "more questions"
+#           round → accept) and several such sessions running concurrently (median of --repeats),
+#           and the checkpoint bytes such a session leaves behind with each serializer
+#
+# usage:
+#   python -m benchmarks.bench_suite run                          # print + write .cache/benchmarks/latest.json
+#   python -m benchmarks.bench_suite run --micro --latency 0.2
+#   python -m benchmarks.bench_suite run --save-baseline          # accept as benchmarks/baseline.json
+#   python -m benchmarks.bench_suite run --compare                # run, then gate against the baseline
+#   python -m benchmarks.bench_suite compare .cache/benchmarks/latest.json --threshold 0.3
+#
+# compare exits with status 1 when any result is worse than its baseline by more than
+# the threshold (relative) — times, bytes and call counts alike; lower is always better
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import tempfile
+
+# isolate the run before any graph module reads its env: no question bank reuse
+# between sessions (every session does the same work) and no files in .cache
+os.environ.setdefault("QUESTION_BANK", "false")
+os.environ.setdefault("WARMUP", "false")
+
+from benchmarks import fixtures                                   # noqa: E402
+from benchmarks.local_model import local_chat_model               # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_OUTPUT = os.path.join(".cache", "benchmarks", "latest.json")
+
+# allowed relative slowdown / growth before compare fails
+DEFAULT_THRESHOLD = 0.25
+
+# time differences below this are machine noise, whatever their relative size
+NOISE_FLOOR_MS = 0.001
+
+# micro benchmarks repeat until both limits are reached (or MAX_RUNS)
+MIN_SECONDS = 0.5
+MIN_RUNS = 5
+MAX_RUNS = 1000
+
+DEFAULT_LATENCY = 0.05
+DEFAULT_SESSIONS = 8
+DEFAULT_MACRO_REPEATS = 3
+
+
+# --- Measuring ---
+
+def measure(function, number: int = 1, min_seconds: float = MIN_SECONDS) -> dict:
+    """
+    Milliseconds per call of `function`, timed in batches of `number` calls.
+    value = best batch (what the gate compares — least sensitive to a noisy machine),
+    with the median and p95 alongside.
+    """
+
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < MIN_RUNS or (time.perf_counter() - started < min_seconds and len(samples) < MAX_RUNS):
+        batch_started = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - batch_started) / number * 1000)
+
+    samples.sort()
+    return {
+        "value": samples[0],
+        "unit": "ms",
+        "median": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "runs": len(samples),
+    }
+
+
+def amount(value: float, unit: str) -> dict:
+    """A result that is a size or a count rather than a time."""
+    return {"value": value, "unit": unit}
+
+
+# --- Micro ---
+
+def bench_parse_cv(results: dict, folder: str) -> None:
+    from graph.nodes.parser import parse_cv
+
+    for label, path in fixtures.cv_corpus(folder):
+        # a rejected file raises PreflightError here instead of timing the error path
+        parse_cv({"cv_file_path": path})
+        results[f"parse_cv.{label}"] = measure(lambda path=path: parse_cv({"cv_file_path": path}))
+
+
+def bench_assemble_output(results: dict) -> None:
+    from graph.nodes.assembler import assemble_output
+
+    for rounds in (1, 3):
+        state = fixtures.session_state(rounds, assembled=False)
+        results[f"assemble_output.{12 * rounds}qa"] = measure(lambda state=state: assemble_output(state), number=100)
+
+
+def bench_routers(results: dict) -> None:
+    from graph.graph import route_after_hitl_1, route_after_hitl_2
+
+    cases = {
+        "route_after_hitl_1.approve": (route_after_hitl_1, {"hitl_1_feedback": "approve"}),
+        "route_after_hitl_1.variant": (route_after_hitl_1, {"hitl_1_feedback": "2", "cover_letter_variants": [{"angle": "", "content": ""}] * 3}),
+        "route_after_hitl_1.feedback": (route_after_hitl_1, {"hitl_1_feedback": "make it shorter and mention Kafka"}),
+        "route_after_hitl_2.accept": (route_after_hitl_2, {"hitl_2_feedback": "accept"}),
+        "route_after_hitl_2.more": (route_after_hitl_2, {"hitl_2_feedback": "more behavioral questions"}),
+    }
+    for name, (router, state) in cases.items():
+        results[name] = measure(lambda router=router, state=state: router(state), number=10000)
+
+
+def checkpoint_serializers() -> dict:
+    """Serializers compared by the checkpoint benchmarks — name → serde."""
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    from graph.serde import CompactSerializer
+    return {
+        "jsonplus": JsonPlusSerializer(),
+        "compact_zstd": CompactSerializer(compression="zstd"),
+        "compact_zlib": CompactSerializer(compression="zlib"),
+    }
+
+
+def bench_checkpoints(results: dict) -> None:
+    # one checkpoint stores every channel that changed as its own typed blob —
+    # a full state is the worst case (the final super-step of a session)
+    for serializer_name, serde in checkpoint_serializers().items():
+        for rounds in (1, 3):
+            state = fixtures.session_state(rounds)
+            blobs = {channel: serde.dumps_typed(value) for channel, value in state.items()}
+            prefix = f"checkpoint.{serializer_name}.{12 * rounds}qa"
+
+            results[f"{prefix}.encode"] = measure(lambda: [serde.dumps_typed(value) for value in state.values()], number=10)
+            results[f"{prefix}.decode"] = measure(lambda: [serde.loads_typed(blob) for blob in blobs.values()], number=10)
+            results[f"{prefix}.bytes"] = amount(sum(len(blob[1]) for blob in blobs.values()), "bytes")
+
+
+def run_micro(results: dict) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        bench_parse_cv(results, folder)
+    bench_assemble_output(results)
+    bench_routers(results)
+    bench_checkpoints(results)
+
+
+# --- Macro ---
+
+async def run_sessions(first_index: int, count: int, cv_raw_text: str) -> None:
+    sessions = await asyncio.wait_for(
+        asyncio.gather(*[run_session(first_index + index, cv_raw_text) for index in range(count)]), 300
+    )
+    for session in sessions:
+        await session.cancel(discard=True)
+
+
+async def run_session(index: int, cv_raw_text: str, graph=None):
+    """One full session: start → approve → one "more questions" round → accept. Returns the session."""
+
+    from graph.session import CopilotSession
+
+    session = CopilotSession(graph, thread_id=f"bench-{index}")
+    result = await session.start(job_description=fixtures.job_description(index), cv_raw_text=cv_raw_text)
+    for feedback in ("approve", "more behavioral questions", "accept"):
+        result = await session.submit_feedback(feedback)
+    if result.stage != "done" or not result.final_output:
+        raise RuntimeError(f"session {index} stopped at {result.stage}")
+    return session
+
+
+def bench_session_checkpoints(results: dict) -> None:
+    # bytes a real session leaves in the checkpointer, per serializer — caps lifted,
+    # so every checkpoint of the session is counted
+    from graph.graph import build_graph
+    from graph.checkpointer import BoundedMemorySaver
+
+    cv_raw_text = fixtures.cv_text(2)
+    for serializer_name, serde in checkpoint_serializers().items():
+        checkpointer = BoundedMemorySaver(max_checkpoints=10 ** 6, max_bytes=10 ** 12, serde=serde)
+        session = asyncio.run(run_session(0, cv_raw_text, build_graph(checkpointer)))
+        stats = session.memory_stats()
+        prefix = f"checkpoint_session.{serializer_name}"
+        results[f"{prefix}.bytes"] = amount(stats["bytes"], "bytes")
+        results[f"{prefix}.bytes_per_checkpoint"] = amount(round(stats["bytes"] / stats["checkpoints"]), "bytes")
+
+
+def llm_calls() -> int:
+    from graph import metrics
+    return sum(value for name, value in metrics.snapshot()["counters"].items()
+               if name.startswith("route.") and name.endswith(".calls"))
+
+
+def run_macro(results: dict, latency: float, sessions: int, repeats: int) -> None:
+    from graph.router import use_chat_model
+    from graph.graph import build_graph
+    from graph.nodes import jd_analyzer
+
+    use_chat_model(local_chat_model(latency))
+    results["build_graph"] = measure(build_graph, min_seconds=0.2)
+
+    cv_raw_text = fixtures.cv_text(2)
+    offset = 0
+
+    def timed(count: int) -> float:
+        nonlocal offset
+        jd_analyzer.clear_cache()
+        started = time.perf_counter()
+        asyncio.run(run_sessions(offset, count, cv_raw_text))
+        offset += count
+        return (time.perf_counter() - started) * 1000
+
+    calls_before = llm_calls()
+    samples = sorted(timed(1) for _ in range(repeats))
+    results["macro.session"] = {"value": statistics.median(samples), "unit": "ms", "runs": repeats}
+    results["macro.session.llm_calls"] = amount((llm_calls() - calls_before) / repeats, "calls")
+
+    samples = sorted(timed(sessions) for _ in range(repeats))
+    results[f"macro.concurrent_{sessions}"] = {"value": statistics.median(samples), "unit": "ms", "runs": repeats}
+
+    bench_session_checkpoints(results)
+
+    use_chat_model(None)
+
+
+# --- Baselines ---
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as results_file:
+        return json.load(results_file)
+
+
+def write_results(path: str, report: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as results_file:
+        json.dump(report, results_file, indent=2, sort_keys=True)
+        results_file.write("\n")
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Prints current vs baseline per result. Returns the names that regressed."""
+
+    regressions = []
+    for name in sorted(baseline["results"]):
+        base = baseline["results"][name]
+        result = current["results"].get(name)
+        if result is None:
+            print(f"{name:<52} {'missing':>12}")
+            continue
+
+        change = (result["value"] - base["value"]) / base["value"] if base["value"] else 0.0
+        noise = result["unit"] == "ms" and result["value"] - base["value"] < NOISE_FLOOR_MS
+        status = "REGRESSION" if change > threshold and not noise else "ok"
+        if status == "REGRESSION":
+            regressions.append(name)
+        print(f"{name:<52} {base['value']:>12.4f} → {result['value']:>12.4f} {result['unit']:<6} {change:>+7.1%}  {status}")
+
+    for name in sorted(set(current["results"]) - set(baseline["results"])):
+        print(f"{name:<52} {'new':>12}")
+    return regressions
+
+
+def print_results(report: dict) -> None:
+    for name, result in report["results"].items():
+        extra = f"  median {result['median']:.4f}  p95 {result['p95']:.4f}" if "p95" in result else ""
+        print(f"{name:<52} {result['value']:>12.4f} {result['unit']}{extra}")
+
+
+# --- CLI ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite with stored baselines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--micro", action="store_true", help="only the micro benchmarks")
+    run.add_argument("--macro", action="store_true", help="only the macro benchmarks")
+    run.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="seconds per stand-in model request")
+    run.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="sessions in the concurrent macro run")
+    run.add_argument("--repeats", type=int, default=DEFAULT_MACRO_REPEATS, help="macro runs per measurement")
+    run.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    run.add_argument("--save-baseline", action="store_true", help="also write the results as the baseline")
+    run.add_argument("--compare", action="store_true", help="compare with the baseline afterwards")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    run.add_argument("--baseline", default=BASELINE_PATH)
+
+    check = commands.add_parser("compare", help="compare a results JSON with the baseline")
+    check.add_argument("results", help="results JSON written by `run`")
+    check.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    check.add_argument("--baseline", default=BASELINE_PATH)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "latency": args.latency,
+                "sessions": args.sessions,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            },
+            "results": {},
+        }
+        if not args.macro:
+            run_micro(report["results"])
+        if not args.micro:
+            run_macro(report["results"], args.latency, args.sessions, args.repeats)
+
+        print_results(report)
+        write_results(args.output, report)
+        print(f"results written to {args.output}")
+        if args.save_baseline:
+            write_results(args.baseline, report)
+            print(f"baseline written to {args.baseline}")
+            return
+        if not args.compare:
+            return
+        current = report
+    else:
+        current = load_results(args.results)
+
+    baseline = load_results(args.baseline)
+    if baseline["meta"].get("latency") != current["meta"].get("latency"):
+        print(f"note: baseline latency {baseline['meta'].get('latency')}s vs {current['meta'].get('latency')}s")
+
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
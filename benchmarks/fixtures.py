@@ -0,0 +1,125 @@
+# fixtures.py — generated inputs for the benchmark suite
+# CV texts of a given page count, matching PDF / DOCX files, job descriptions,
+# and realistic AppState snapshots (what a checkpoint holds after N HITL 2 rounds)
+# everything is generated, so the suite needs no files checked into the repo
+
+import os
+from benchmarks.local_model import LETTER, ROLE, SKILLS, RESPONSIBILITIES, KEYWORDS, ANSWER, _qa_pairs
+
+# a dense CV page holds about this many lines of text
+LINES_PER_PAGE = 45
+
+EXPERIENCE_LINES = [
+    "Led the migration of the order platform from a monolith to Kubernetes services.",
+    "Designed a Kafka-based event pipeline processing 2M events per hour.",
+    "Cut p95 API latency by 40% through query tuning on PostgreSQL.",
+    "Introduced distributed tracing and SLO dashboards across twelve services.",
+    "Mentored four engineers; ran the backend design review for two years.",
+    "Automated infrastructure with Terraform and GitHub Actions pipelines.",
+    "Owned on-call for payments, reducing pages by half in six months.",
+    "Built internal GraphQL gateway used by web and mobile clients.",
+]
+
+
+def cv_text(pages: int = 2) -> str:
+    """Plain-text CV of `pages` pages."""
+
+    lines = ["Jane Doe — Senior Backend Engineer", "jane@example.com · Berlin", "", "EXPERIENCE"]
+    line_number = 0
+    while len(lines) < pages * LINES_PER_PAGE:
+        if line_number % 9 == 0:
+            lines += ["", f"Backend Engineer, Company {line_number // 9 + 1} ({2024 - line_number // 9})"]
+        lines.append(f"- {EXPERIENCE_LINES[line_number % len(EXPERIENCE_LINES)]}")
+        line_number += 1
+    # exactly `pages` pages — preflight rejects PDFs over CV_MAX_PAGES
+    lines = lines[:pages * LINES_PER_PAGE - 3] + ["", "SKILLS", ", ".join(SKILLS[:6] + ["Docker", "Redis"])]
+    return "\n".join(lines)
+
+
+def job_description(index: int = 0) -> str:
+    """A job description — `index` makes the text unique, so analysis caches do not hit."""
+
+    return "\n".join([
+        f"{ROLE} (posting #{index})",
+        "",
+        "We are looking for an engineer to build and run our core platform.",
+        "",
+        "Responsibilities:",
+        *[f"- {item}" for item in RESPONSIBILITIES],
+        "",
+        "Requirements:",
+        *[f"- Strong experience with {skill}" for skill in SKILLS],
+        "",
+        f"Keywords: {', '.join(KEYWORDS)}",
+    ])
+
+
+# --- CV files ---
+
+def write_pdf(path: str, text: str) -> str:
+    import fitz
+
+    document = fitz.open()
+    lines = text.split("\n")
+    for start in range(0, len(lines), LINES_PER_PAGE):
+        page = document.new_page()
+        page.insert_text((50, 50), "\n".join(lines[start:start + LINES_PER_PAGE]), fontsize=10)
+    document.save(path)
+    document.close()
+    return path
+
+
+def write_docx(path: str, text: str) -> str:
+    from docx import Document
+
+    document = Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    document.save(path)
+    return path
+
+
+def cv_corpus(folder: str, page_counts: tuple = (1, 5, 20)) -> list:
+    """Writes one PDF and one DOCX CV per page count. Returns (label, path) pairs."""
+
+    os.makedirs(folder, exist_ok=True)
+    corpus = []
+    for pages in page_counts:
+        text = cv_text(pages)
+        corpus.append((f"pdf.{pages}p", write_pdf(os.path.join(folder, f"cv_{pages}p.pdf"), text)))
+        corpus.append((f"docx.{pages}p", write_docx(os.path.join(folder, f"cv_{pages}p.docx"), text)))
+    return corpus
+
+
+# --- States ---
+
+def session_state(rounds: int = 1, assembled: bool = True) -> dict:
+    """
+    AppState of a finished session whose user asked for more questions `rounds - 1`
+    times at HITL 2 (12 questions per round), with the final package assembled.
+    """
+
+    from graph.nodes.assembler import assemble_output
+
+    gaps = [{"gap": skill, "severity": "moderate", "advice": f"Prepare a concrete example that shows {skill}."}
+            for skill in SKILLS[6:]]
+    state = {
+        "cv_file_path": "",
+        "cv_raw_text": cv_text(2),
+        "job_description": job_description(),
+        "jd_analysis": {
+            "role": ROLE, "required_skills": SKILLS, "responsibilities": RESPONSIBILITIES,
+            "tone": "professional", "experience_level": "senior", "keywords": KEYWORDS,
+        },
+        "cover_letter_draft": LETTER,
+        "cover_letter_variants": [],
+        "cover_letter_report": {"violations": [], "fixed": [], "unfixable": [], "word_count": 150, "retry": False, "retries": 0},
+        "cover_letter_final": LETTER,
+        "hitl_1_feedback": "approve",
+        "interview_qa": _qa_pairs(12 * rounds),
+        "hitl_2_feedback": "accept",
+        "qa_flags": {"gaps": gaps, "match_score": 8, "overall_assessment": ANSWER.split(". ")[0]},
+    }
+    if assembled:
+        state.update(assemble_output(state))
+    return state
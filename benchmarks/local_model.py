@@ -0,0 +1,175 @@
+# local_model.py — a local stand-in for ChatOpenAI, for benchmarks
+# answers every request after a fixed latency with a realistic, valid payload, so a
+# full build_graph() run exercises the real nodes, routing, validation, checkpoints
+# and usage accounting — only the network and the model are replaced
+#
+#   from graph.router import use_chat_model
+#   use_chat_model(local_chat_model(latency=0.2))
+#
+# structured calls answer with JSON for the requested schema, shaped after the task
+# (one gap entry per listed missing / weak skill, one answer per numbered question),
+# so the cascade's confidence checks pass and no call is escalated
+# with streaming=True, calls under astream_events stream word by word like ChatOpenAI
+# (tests of what reaches the chat) — off for benchmarks, which time the graph, not chunks
+
+import re
+import json
+import time
+import asyncio
+from functools import partial
+from typing import Optional
+from pydantic import Field
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from graph.budget import count_tokens
+
+
+ROLE = "Senior Backend Engineer"
+SKILLS = ["Python", "Kubernetes", "PostgreSQL", "AWS", "GraphQL", "Kafka", "Terraform", "CI/CD"]
+KEYWORDS = ["scalable", "distributed systems", "observability", "ownership", "mentoring", "cloud-native"]
+RESPONSIBILITIES = [
+    "Design and operate high-throughput backend services",
+    "Own the reliability and observability of production systems",
+    "Mentor engineers and review designs across teams",
+    "Work with product to shape the API roadmap",
+]
+CATEGORIES = ["role-specific"] * 4 + ["behavioral"] * 3 + ["situational"] * 3 + ["gap-related"] * 2
+
+ANSWER = (
+    "In my current role I led the migration of our order service to Kubernetes, cutting p95 latency by 40%. "
+    "I started by profiling the hot paths, then split the monolith along clear ownership lines. "
+    "The result was fewer incidents and faster releases for three teams. "
+    "I would bring the same measured, data-driven approach to this role."
+)
+
+LETTER = """Hi there,
+
+I have spent six years building Python services on Kubernetes and AWS, most recently owning the scalable order platform at Acme that handles millions of requests a day. I care about observability and reliability as much as shipping features.
+
+At Acme I led the move from a monolith to distributed systems, introduced tracing across twelve services and mentored four engineers through their first on-call rotations. That work cut incident volume in half.
+
+I would welcome the chance to talk about how I can help your team build and run its next generation of backend services.
+
+Best regards,
+Jane Doe"""
+
+
+# --- Structured payloads ---
+
+def _listed(task: str, label: str) -> list:
+    # "MISSING SKILLS (not found in CV): a, b" → ["a", "b"]
+    match = re.search(rf"{label}[^:]*:\s*(.*)", task)
+    if not match or match.group(1).strip() == "none":
+        return []
+    return [item.strip() for item in match.group(1).split(",") if item.strip()]
+
+
+def _qa_pairs(count: int, offset: int = 0) -> list:
+    return [
+        {"question": f"Question {offset + i + 1}: how have you applied {SKILLS[(offset + i) % len(SKILLS)]} at scale?",
+         "category": CATEGORIES[i % len(CATEGORIES)], "suggested_answer": ANSWER}
+        for i in range(count)
+    ]
+
+
+def _jd_analysis() -> dict:
+    return {
+        "role": ROLE, "required_skills": SKILLS, "responsibilities": RESPONSIBILITIES,
+        "tone": "professional", "experience_level": "senior", "keywords": KEYWORDS,
+    }
+
+
+def _gap_advice(task: str) -> dict:
+    gaps = [{"gap": skill, "severity": "moderate", "advice": f"Prepare a concrete example that shows {skill}."}
+            for skill in _listed(task, "MISSING SKILLS") + _listed(task, "WEAK SKILLS")]
+    return {"gaps": gaps, "overall_assessment": "A strong match with a few gaps worth preparing for."}
+
+
+PAYLOADS = {
+    "JDAnalysis": lambda task: _jd_analysis(),
+    "FusedAnalysis": lambda task: {"jd": _jd_analysis(), "gap_report": _gap_advice(task)},
+    "GapAdvice": _gap_advice,
+    "InterviewQAList": lambda task: {"qa_pairs": _qa_pairs(12, offset=len(re.findall(r"'question'", task)))},
+    "PersonalizedAnswers": lambda task: {
+        "suggested_answers": [ANSWER] * len(re.findall(r"^\s*\d+\. \[", task, re.MULTILINE)),
+        "cv_questions": _qa_pairs(5),
+    },
+    "CoverLetterPatch": lambda task: {
+        "scope": "local",
+        "edits": [{"paragraph": 2, "new_text": "At Acme I led the move to distributed systems and mentored four engineers."}],
+    },
+}
+
+
+# --- Chat model ---
+
+class LocalChatModel(BaseChatModel):
+    """Answers after `latency` seconds with canned but schema-valid content. No network."""
+
+    model_name: str = Field(default="gpt-4o", alias="model")
+    temperature: float = 0
+    timeout: Optional[float] = None
+    api_key: Optional[str] = None
+    latency: float = 0.05
+    streaming: bool = False
+
+    model_config = {"populate_by_name": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-stand-in"
+
+    def _respond(self, messages: list, response_format: str = "") -> ChatResult:
+        task = messages[-1].content if messages else ""
+        if response_format:
+            content = json.dumps(PAYLOADS[response_format](task))
+        else:
+            content = LETTER
+
+        input_tokens = sum(count_tokens(message.content) for message in messages)
+        output_tokens = count_tokens(content)
+        message = AIMessage(
+            content=content,
+            response_metadata={"model_name": self.model_name},
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                            "total_tokens": input_tokens + output_tokens},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, response_format: str = "", **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._respond(messages, response_format)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, response_format: str = "", **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._respond(messages, response_format)
+
+    async def _astream(self, messages, stop=None, run_manager=None, response_format: str = "", **kwargs):
+        # same content as _agenerate, one word per chunk — usage arrives with the last one
+        await asyncio.sleep(self.latency)
+        message = self._respond(messages, response_format).generations[0].message
+        words = re.findall(r"\s*\S+", message.content) or [""]
+        for index, word in enumerate(words):
+            last = index == len(words) - 1
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=word,
+                response_metadata=message.response_metadata if last else {},
+                usage_metadata=message.usage_metadata if last else None,
+            ))
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs):
+        def parse(message: AIMessage):
+            parsed = schema.model_validate_json(message.content)
+            return {"raw": message, "parsed": parsed, "parsing_error": None} if include_raw else parsed
+
+        return self.bind(response_format=schema.__name__) | RunnableLambda(parse)
+
+
+def local_chat_model(latency: float = 0.05, streaming: bool = False):
+    """Factory for graph.router.use_chat_model() — every model answers after `latency` seconds."""
+    return partial(LocalChatModel, latency=latency, streaming=streaming)
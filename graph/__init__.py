@@ -0,0 +1,7 @@
+# graph package — the job application pipeline
+# .env is loaded once here, before any submodule reads its settings from os.environ
+# (submodules read flags such as FUSED_ANALYSIS or MODEL_<NODE> at import time)
+
+from dotenv import load_dotenv
+
+load_dotenv()
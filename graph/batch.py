@@ -0,0 +1,129 @@
+# batch.py — one CV against many job descriptions
+# parses the CV once, analyzes every JD concurrently (reusing the JD cache),
+# scores them all with the vectorized skill matcher and returns a ranked list
+# the expensive stages (cover letter, interview prep, gap report) only run
+# later, for the postings the user selects, via seed_state()
+
+import re                                          # splitting pasted JDs
+import asyncio                                     # bounded concurrency
+from graph.nodes.parser import parse_cv            # CV parsing — done once
+from graph.nodes.jd_analyzer import analyze_jd     # JD extraction — cached per JD text
+from graph.skill_matcher import SkillMatcher       # one CV index, many JDs
+from graph import metrics                          # batch timings
+
+
+# how many JD analyses run at the same time
+DEFAULT_MAX_CONCURRENCY = 8
+
+# a line of three or more "=" separates job descriptions in one pasted message
+JD_SEPARATOR_PATTERN = re.compile(r"^\s*={3,}\s*$", re.MULTILINE)
+
+
+def split_job_descriptions(text: str) -> list:
+    """Splits pasted text into separate JDs on '===' lines, dropping empty chunks."""
+    return [chunk.strip() for chunk in JD_SEPARATOR_PATTERN.split(text) if chunk.strip()]
+
+
+async def _analyze(job_description: str, semaphore: asyncio.Semaphore) -> dict:
+    # analyze_jd is a regular async graph node — outside a run it gets its node budget only
+    async with semaphore:
+        result = await analyze_jd({"job_description": job_description})
+    return result["jd_analysis"]
+
+
+async def rank_job_descriptions(
+    job_descriptions: list,
+    cv_file_path: str = "",
+    cv_raw_text: str = "",
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> dict:
+    """
+    Ranks many JDs against one CV.
+    Pass either cv_file_path (parsed once here) or already parsed cv_raw_text.
+    Returns {"cv_raw_text": str, "ranked": [...], "failed": [...]} — ranked entries
+    are sorted by match, each with: index, role, match_score, coverage, missing,
+    weak, jd_analysis and job_description. A JD whose analysis failed does not
+    stop the others — it is listed in failed as {index, job_description, error}.
+    """
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    # --- parse the CV once for the whole batch ---
+    if not cv_raw_text:
+        parsed = await asyncio.to_thread(parse_cv, {"cv_file_path": cv_file_path})
+        cv_raw_text = parsed["cv_raw_text"]
+
+    # --- analyze every JD concurrently, bounded by the semaphore ---
+    # one failed analysis (bad paste, model error, deadline) must not lose the rest
+    semaphore = asyncio.Semaphore(max_concurrency)
+    outcomes = await asyncio.gather(*[_analyze(jd, semaphore) for jd in job_descriptions], return_exceptions=True)
+
+    analyzed, failed = [], []
+    for index, (job_description, outcome) in enumerate(zip(job_descriptions, outcomes)):
+        if isinstance(outcome, Exception):
+            failed.append({"index": index, "job_description": job_description, "error": str(outcome) or type(outcome).__name__})
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            analyzed.append((index, job_description, outcome))
+
+    # --- score all JDs against the CV in one vectorized pass ---
+    scores = SkillMatcher(cv_raw_text).score_many([analysis for _index, _jd, analysis in analyzed])
+
+    ranked = []
+    for (index, job_description, analysis), score in zip(analyzed, scores):
+        ranked.append({
+            "index": index,                                 # position in the input list
+            "role": analysis.get("role", ""),
+            "match_score": int(round(1 + 9 * score["coverage"])),
+            "coverage": round(score["coverage"], 3),
+            "missing": score["missing"],
+            "weak": score["weak"],
+            "jd_analysis": analysis,
+            "job_description": job_description,
+        })
+
+    # best match first — ties keep input order
+    ranked.sort(key=lambda entry: -entry["coverage"])
+
+    metrics.increment("batch.job_descriptions", len(job_descriptions))
+    if failed:
+        metrics.increment("batch.failed_analyses", len(failed))
+    metrics.observe("batch.rank_seconds", loop.time() - started)
+
+    return {"cv_raw_text": cv_raw_text, "ranked": ranked, "failed": failed}
+
+
+def select_entries(ranked: list, selection: str) -> list:
+    """
+    Picks ranked entries from a user reply.
+    "1, 3" → 1st and 3rd in ranked order, "top 2" → the two best matches.
+    Out of range numbers are ignored.
+    """
+
+    selection = selection.strip().lower()
+
+    top_match = re.match(r"^top\s*(\d+)$", selection)
+    if top_match:
+        return ranked[:int(top_match.group(1))]
+
+    chosen = []
+    for number in re.findall(r"\d+", selection):
+        position = int(number)
+        if 1 <= position <= len(ranked) and ranked[position - 1] not in chosen:
+            chosen.append(ranked[position - 1])
+    return chosen
+
+
+def seed_state(cv_raw_text: str, entry: dict) -> dict:
+    """
+    Initial graph state for one selected JD.
+    cv_raw_text and jd_analysis are pre-filled, so parse_cv and analyze_jd
+    skip straight through and the run starts at the cover letter.
+    """
+    return {
+        "job_description": entry["job_description"],
+        "cv_raw_text": cv_raw_text,
+        "jd_analysis": entry["jd_analysis"],
+    }
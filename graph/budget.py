@@ -0,0 +1,289 @@
+# budget.py — local token estimates and per-session / per-user token budgets
+# every LLM call in graph/nodes/ estimates its prompt locally (tiktoken, from requirements.txt, or a
+# characters / 4 fallback when the encoding is not available offline) and reserves
+# the estimate plus the node's expected output against two budgets:
+#   - the session (one thread_id)        SESSION_TOKEN_BUDGET
+#   - the user, per UTC day              USER_TOKEN_BUDGET   (only when a user_id is known)
+# reservations are replaced by the real usage when the run ends (graph/session.py)
+#
+# when a call would not fit, its inputs degrade in a fixed order instead of the run failing:
+#   1. existing_qa history → questions only (suggested answers dropped)
+#   2. existing_qa history → only the most recent QA_HISTORY_KEEP questions
+#   3. cv_raw_text         → truncated (the start of a CV is kept), never below MIN_CV_TOKENS
+# if it still does not fit:
+#   - optional work (extra HITL-2 question rounds, cover letter variants) is refused —
+#     fit_cv(optional=True) raises BudgetExceeded, counted as budget.<node>.refused
+#   - a required call is made anyway and counted as budget.<node>.over_budget
+#
+# 0 disables a budget
+
+import os                                          # env budgets
+import json                                        # schema size
+import time                                        # UTC day for user budgets
+import threading                                   # ledger is shared by every session
+from graph import metrics                          # degradation counters + estimated tokens
+from graph.prompts import build_messages           # the prompt a node will send
+
+
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "200000"))
+USER_TOKEN_BUDGET = int(os.getenv("USER_TOKEN_BUDGET", "1000000"))
+
+# tokens a node's response is expected to need — reserved together with the prompt
+EXPECTED_OUTPUT_TOKENS = {
+    "analyze_jd": 600,
+    "run_qa_check": 800,
+    "write_cover_letter": 700,
+    "prepare_interview": 3000,
+}
+
+# floor for CV truncation — below this the letter / answers would not be grounded in anything
+MIN_CV_TOKENS = 1500
+
+# questions kept in the follow-up prompt once the history has to shrink
+QA_HISTORY_KEEP = 8
+
+# tokens of chat framing per message, and per request
+MESSAGE_OVERHEAD_TOKENS = 4
+REQUEST_OVERHEAD_TOKENS = 3
+
+# gpt-4o / gpt-4o-mini encoding
+ENCODING_NAME = "o200k_base"
+
+
+class BudgetExceeded(Exception):
+    """Optional work refused — the call does not fit the budget even after degradation."""
+
+
+# --- Local token counting ---
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    # tiktoken downloads the encoding on first use — without network (or a
+    # pre-filled TIKTOKEN_CACHE_DIR) that fails, and we fall back for good
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(ENCODING_NAME)
+                except Exception:
+                    _encoding = None
+                    metrics.increment("tokens.estimator_fallback")
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count of `text` — exact with tiktoken, about 4 characters per token without."""
+
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_messages(messages: list, schema=None) -> int:
+    """Estimated prompt tokens of a chat request (plus the output schema, when structured)."""
+
+    tokens = REQUEST_OVERHEAD_TOKENS
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        tokens += count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    if schema is not None:
+        tokens += count_tokens(json.dumps(schema.model_json_schema()))
+    return tokens
+
+
+# --- Ledger ---
+
+def _today() -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+
+class TokenLedger:
+    """Reserved and actual tokens per session and per user-day."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}           # thread_id → usage dict
+        self._users = {}              # (user_id, day) → {"used", "reserved"}
+
+    def _session(self, thread_id: str) -> dict:
+        return self._sessions.setdefault(thread_id, {
+            "user_id": "", "used": 0, "reserved": 0,
+            "estimated_input": 0, "estimated_output": 0, "actual_input": 0, "actual_output": 0,
+            "degraded": 0, "over_budget": 0, "refused": 0,
+        })
+
+    def _user(self, user_id: str) -> dict:
+        return self._users.setdefault((user_id, _today()), {"used": 0, "reserved": 0})
+
+    def remaining(self, thread_id: str, user_id: str = "") -> float:
+        """Tokens left before the tighter of the two budgets is reached."""
+
+        with self._lock:
+            left = float("inf")
+            if SESSION_TOKEN_BUDGET:
+                session = self._session(thread_id)
+                left = min(left, SESSION_TOKEN_BUDGET - session["used"] - session["reserved"])
+            if USER_TOKEN_BUDGET and user_id:
+                user = self._user(user_id)
+                left = min(left, USER_TOKEN_BUDGET - user["used"] - user["reserved"])
+            return left
+
+    def reserve(self, thread_id: str, user_id: str, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            session = self._session(thread_id)
+            session["user_id"] = user_id
+            session["reserved"] += input_tokens + output_tokens
+            session["estimated_input"] += input_tokens
+            session["estimated_output"] += output_tokens
+            if user_id:
+                self._user(user_id)["reserved"] += input_tokens + output_tokens
+
+    def note(self, thread_id: str, key: str) -> None:
+        with self._lock:
+            self._session(thread_id)[key] += 1
+
+    def settle(self, thread_id: str, user_id: str, input_tokens: int, output_tokens: int) -> None:
+        """
+        End of a run — its reservations are replaced by the real usage.
+        A run whose provider reported no usage keeps its estimate as used.
+        """
+
+        with self._lock:
+            session = self._session(thread_id)
+            reserved, session["reserved"] = session["reserved"], 0
+            used = input_tokens + output_tokens or reserved
+            session["used"] += used
+            session["actual_input"] += input_tokens
+            session["actual_output"] += output_tokens
+            if user_id:
+                user = self._user(user_id)
+                user["reserved"] = max(0, user["reserved"] - reserved)
+                user["used"] += used
+
+    def session_usage(self, thread_id: str) -> dict:
+        """Estimated vs actual tokens of one session, with its budget."""
+        with self._lock:
+            usage = dict(self._sessions.get(thread_id) or self._session(thread_id))
+        usage["budget"] = SESSION_TOKEN_BUDGET or None
+        return usage
+
+    def forget(self, thread_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(thread_id, None)
+
+    def snapshot(self) -> dict:
+        """Every session and today's per-user usage — for logs or an admin endpoint."""
+        with self._lock:
+            today = _today()
+            return {
+                "sessions": {thread_id: dict(usage) for thread_id, usage in self._sessions.items()},
+                "users": {user_id: dict(usage) for (user_id, day), usage in self._users.items() if day == today},
+            }
+
+
+# one ledger per process — shared by every session
+ledger = TokenLedger()
+
+
+# --- Budgeted prompts ---
+
+def _ids(config) -> tuple:
+    configurable = (config or {}).get("configurable") or {}
+    return configurable.get("thread_id", ""), configurable.get("user_id", "")
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def fit_qa_history(config, node: str, existing_qa: list, context_tokens: int) -> list:
+    """
+    The Q&A history a follow-up prompt can afford — steps 1 and 2 of the
+    degradation order. `context_tokens` = everything else the prompt holds.
+    The full history stays in state; only the prompt copy shrinks.
+    A follow-up round is optional work: raises BudgetExceeded when even the
+    most recent questions do not fit.
+    """
+
+    thread_id, user_id = _ids(config)
+    if not thread_id or not existing_qa:
+        return existing_qa
+
+    left = ledger.remaining(thread_id, user_id) - EXPECTED_OUTPUT_TOKENS.get(node, 0) - context_tokens
+    if count_tokens(str(existing_qa)) <= left:
+        return existing_qa
+
+    ledger.note(thread_id, "degraded")
+    history = [{"question": qa.get("question", ""), "category": qa.get("category", "")} for qa in existing_qa]
+    if count_tokens(str(history)) <= left:
+        metrics.increment(f"budget.{node}.degraded.history_questions_only")
+        return history
+
+    metrics.increment(f"budget.{node}.degraded.history_recent_only")
+    recent = history[-QA_HISTORY_KEEP:]
+    if count_tokens(str(recent)) <= left:
+        return recent
+
+    ledger.note(thread_id, "refused")
+    metrics.increment(f"budget.{node}.refused")
+    raise BudgetExceeded(f"{node}: token budget exhausted")
+
+
+def fit_cv(config, node: str, task: str, cv_raw_text: str = "", job_description: str = "",
+           schema=None, calls: int = 1, optional: bool = False) -> str:
+    """
+    The cv_raw_text a call (or `calls` calls sharing one prompt) can afford:
+    estimates the prompt, truncates the CV (step 3) when it would not fit, and
+    reserves the estimate + expected output. A required call that still does not fit
+    is counted as over budget; an optional one raises BudgetExceeded, nothing reserved.
+    """
+
+    thread_id, user_id = _ids(config)
+    estimate = estimate_messages(build_messages(task, cv_raw_text, job_description), schema)
+    output = EXPECTED_OUTPUT_TOKENS.get(node, 0)
+
+    if thread_id:
+        left = ledger.remaining(thread_id, user_id)
+        if (estimate + output) * calls > left and cv_raw_text:
+            cv_tokens = count_tokens(cv_raw_text)
+            affordable = int(left / calls) - output - (estimate - cv_tokens)
+            if affordable < cv_tokens:
+                cv_raw_text = _truncate(cv_raw_text, max(MIN_CV_TOKENS, affordable)) + "\n[CV truncated]"
+                estimate = estimate_messages(build_messages(task, cv_raw_text, job_description), schema)
+                ledger.note(thread_id, "degraded")
+                metrics.increment(f"budget.{node}.degraded.cv_truncated")
+
+        if (estimate + output) * calls > left and optional:
+            ledger.note(thread_id, "refused")
+            metrics.increment(f"budget.{node}.refused")
+            raise BudgetExceeded(f"{node}: token budget exhausted")
+
+        if (estimate + output) * calls > left:
+            ledger.note(thread_id, "over_budget")
+            metrics.increment(f"budget.{node}.over_budget")
+        ledger.reserve(thread_id, user_id, estimate * calls, output * calls)
+
+    # outside a session (benchmarks, batch ranking) the estimate is only recorded —
+    # compare with llm.<node>.input_tokens, the provider's count of the same prompts
+    metrics.increment(f"tokens.{node}.estimated_input", estimate * calls)
+    return cv_raw_text
+
+
+def budgeted_messages(config, node: str, task: str, cv_raw_text: str = "", job_description: str = "",
+                      schema=None, optional: bool = False) -> list:
+    """build_messages() within the session / user budget — see fit_cv()."""
+    cv_raw_text = fit_cv(config, node, task, cv_raw_text, job_description, schema, optional=optional)
+    return build_messages(task, cv_raw_text, job_description)
@@ -0,0 +1,291 @@
+# checkpointer.py — MemorySaver with per-thread size accounting and caps
+# every super-step of every session adds a checkpoint, and all of them stay in
+# memory for the life of the process: cv_raw_text and the drafts are re-serialized
+# whenever they change, and HITL 2 rounds keep adding more
+#
+# BoundedMemorySaver reports, per thread: serialized state size (by channel),
+# checkpoint count and total bytes retained; once a thread has more than
+# max_checkpoints checkpoints or more than max_bytes retained, its oldest
+# checkpoints are evicted — or, with spill_dir set, moved to disk and loaded
+# back only if someone asks for that exact checkpoint (state history / time travel)
+#
+# the latest checkpoints are never touched, so resuming after a HITL pause works
+# the same. DeltaChannel fields (interview_qa) are not stored in checkpoints — their
+# value is rebuilt by replaying the writes of earlier checkpoints — so before the
+# oldest checkpoint goes, its children get their delta values stored as snapshots,
+# and nothing left in memory (or restored from spill) depends on an evicted one
+#
+# env:
+#   CHECKPOINT_MAX_PER_THREAD=20       checkpoints kept in memory per thread
+#   CHECKPOINT_MAX_BYTES=5000000       bytes kept in memory per thread
+#   CHECKPOINT_SPILL_DIR=              folder for evicted checkpoints ("" = drop them)
+
+import os                                          # env + spill paths
+import pickle                                      # spill files hold already-serialized bytes
+import shutil                                      # removing a thread's spill folder
+import hashlib                                     # filesystem-safe thread ids
+import threading                                   # sessions share one checkpointer
+from typing import get_type_hints                  # finding DeltaChannel fields
+from langgraph.channels.delta import DeltaChannel
+from langgraph.checkpoint.memory import MemorySaver
+from graph.state import AppState
+from graph import metrics                          # size observations + eviction counters
+
+
+MAX_CHECKPOINTS_PER_THREAD = int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "20"))
+MAX_BYTES_PER_THREAD = int(os.getenv("CHECKPOINT_MAX_BYTES", "5000000"))
+SPILL_DIR = os.getenv("CHECKPOINT_SPILL_DIR", "")
+
+# never evict the newest checkpoints — the one a paused run resumes from and its parent
+MIN_KEPT_CHECKPOINTS = 2
+
+
+def delta_channels(schema) -> dict:
+    """The DeltaChannel fields of a state schema — name → channel."""
+    return {
+        name: annotation
+        for name, hint in get_type_hints(schema, include_extras=True).items()
+        for annotation in getattr(hint, "__metadata__", ())
+        if isinstance(annotation, DeltaChannel)
+    }
+
+
+DELTA_CHANNELS = delta_channels(AppState)
+
+
+class BoundedMemorySaver(MemorySaver):
+    """MemorySaver that accounts for retained bytes per thread and caps them."""
+
+    def __init__(self, max_checkpoints: int = MAX_CHECKPOINTS_PER_THREAD,
+                 max_bytes: int = MAX_BYTES_PER_THREAD, spill_dir: str = SPILL_DIR,
+                 delta_channels: dict = None, **kwargs):
+        super().__init__(**kwargs)
+        self.max_checkpoints = max_checkpoints
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.delta_channels = DELTA_CHANNELS if delta_channels is None else delta_channels
+        self._lock = threading.RLock()
+        self._evicted = {}            # thread_id → checkpoints evicted so far
+        self._spilled = {}            # thread_id → checkpoints currently on disk
+        self._blob_keys = {}          # thread_id → its keys in self.blobs (blobs is one flat dict)
+
+    # --- accounting ---
+
+    def _checkpoint_ids(self, thread_id: str, checkpoint_ns: str) -> list:
+        return sorted(self.storage.get(thread_id, {}).get(checkpoint_ns, {}))
+
+    def _checkpoint_bytes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> int:
+        checkpoint, metadata, _parent = self.storage[thread_id][checkpoint_ns][checkpoint_id]
+        writes = self.writes.get((thread_id, checkpoint_ns, checkpoint_id), {})
+        return len(checkpoint[1]) + len(metadata[1]) + sum(len(value[1]) for _task, _channel, value, _path in writes.values())
+
+    def _channel_versions(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> dict:
+        checkpoint = self.storage[thread_id][checkpoint_ns][checkpoint_id][0]
+        return self.serde.loads_typed(checkpoint).get("channel_versions", {})
+
+    def thread_stats(self, thread_id: str) -> dict:
+        """
+        Memory retained for one thread:
+        checkpoints, bytes (checkpoints + pending writes + channel blobs), the serialized
+        size of the latest state per channel, and how many checkpoints were evicted / spilled.
+        """
+
+        with self._lock:
+            namespaces = self.storage.get(thread_id, {})
+            checkpoints = sum(len(ids) for ids in namespaces.values())
+            checkpoint_bytes = sum(
+                self._checkpoint_bytes(thread_id, namespace, checkpoint_id)
+                for namespace, ids in namespaces.items() for checkpoint_id in ids
+            )
+            blob_bytes = sum(len(self.blobs[key][1]) for key in self._blob_keys.get(thread_id, ()) if key in self.blobs)
+
+            # latest root-namespace state — what a resume actually loads
+            channels = {}
+            latest_ids = self._checkpoint_ids(thread_id, "")
+            if latest_ids:
+                for channel, version in self._channel_versions(thread_id, "", latest_ids[-1]).items():
+                    blob = self.blobs.get((thread_id, "", channel, version))
+                    if blob is not None and blob[0] != "empty":
+                        channels[channel] = len(blob[1])
+
+            return {
+                "checkpoints": checkpoints,
+                "bytes": checkpoint_bytes + blob_bytes,
+                "state_bytes": sum(channels.values()),
+                "state_bytes_by_channel": dict(sorted(channels.items(), key=lambda item: -item[1])),
+                "evicted": self._evicted.get(thread_id, 0),
+                "spilled": self._spilled.get(thread_id, 0),
+            }
+
+    def stats(self) -> dict:
+        """Totals over every thread held in memory."""
+
+        with self._lock:
+            threads = {thread_id: self.thread_stats(thread_id) for thread_id in list(self.storage)}
+        return {
+            "threads": len(threads),
+            "checkpoints": sum(stats["checkpoints"] for stats in threads.values()),
+            "bytes": sum(stats["bytes"] for stats in threads.values()),
+            "largest_thread_bytes": max((stats["bytes"] for stats in threads.values()), default=0),
+        }
+
+    # --- caps ---
+
+    def _enforce_caps(self, thread_id: str, checkpoint_ns: str) -> None:
+        ids = self._checkpoint_ids(thread_id, checkpoint_ns)
+        stats = self.thread_stats(thread_id)
+        metrics.observe("checkpoint.state_bytes", stats["state_bytes"])
+        metrics.observe("checkpoint.thread_bytes", stats["bytes"])
+
+        over_count = len(ids) > self.max_checkpoints
+        over_bytes = stats["bytes"] > self.max_bytes
+        if not (over_count or over_bytes):
+            return
+
+        retained = stats["bytes"]
+        for checkpoint_id in ids[:-MIN_KEPT_CHECKPOINTS]:
+            if len(self._checkpoint_ids(thread_id, checkpoint_ns)) <= self.max_checkpoints and retained <= self.max_bytes:
+                break
+            retained -= self._evict(thread_id, checkpoint_ns, checkpoint_id)
+
+        metrics.increment("checkpoint.cap_hits.count" if over_count else "checkpoint.cap_hits.bytes")
+
+    def _evict(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> int:
+        """Removes one checkpoint (spilling it first, if configured). Returns the bytes freed."""
+
+        freed = self._checkpoint_bytes(thread_id, checkpoint_ns, checkpoint_id)
+        freed -= self._snapshot_children(thread_id, checkpoint_ns, checkpoint_id)
+        referenced = self._channel_versions(thread_id, checkpoint_ns, checkpoint_id)
+        saved = self.storage[thread_id][checkpoint_ns].pop(checkpoint_id)
+        writes = self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), {})
+
+        # channel blobs are shared between checkpoints — drop only the ones no kept checkpoint uses
+        still_used = set()
+        for kept_id in self._checkpoint_ids(thread_id, checkpoint_ns):
+            still_used.update(self._channel_versions(thread_id, checkpoint_ns, kept_id).items())
+        blobs = {}
+        for channel, version in referenced.items():
+            key = (thread_id, checkpoint_ns, channel, version)
+            if key in self.blobs:
+                blobs[key] = self.blobs[key]
+                if (channel, version) not in still_used:
+                    freed += len(self.blobs.pop(key)[1])
+                    self._blob_keys.get(thread_id, set()).discard(key)
+
+        if self.spill_dir:
+            path = self._spill_path(thread_id, checkpoint_ns, checkpoint_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as spill_file:
+                pickle.dump({"checkpoint": saved, "writes": writes, "blobs": blobs}, spill_file)
+            self._spilled[thread_id] = self._spilled.get(thread_id, 0) + 1
+            metrics.increment("checkpoint.spilled")
+        else:
+            metrics.increment("checkpoint.evicted")
+
+        self._evicted[thread_id] = self._evicted.get(thread_id, 0) + 1
+        return freed
+
+    def _snapshot_children(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> int:
+        """
+        Stores the delta channel values of checkpoint_id's children, which would
+        otherwise be rebuilt from checkpoint_id and its ancestors. Returns the bytes added.
+        """
+
+        added = 0
+        for child_id, (_checkpoint, _metadata, parent_id) in list(self.storage[thread_id][checkpoint_ns].items()):
+            if parent_id != checkpoint_id:
+                continue
+
+            # only channels the child does not already hold a value (or snapshot) for
+            versions = self._channel_versions(thread_id, checkpoint_ns, child_id)
+            replayed = [
+                channel for channel in self.delta_channels
+                if channel in versions
+                and self.blobs.get((thread_id, checkpoint_ns, channel, versions[channel]), ("empty",))[0] == "empty"
+            ]
+            if not replayed:
+                continue
+
+            config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": child_id}}
+            histories = super().get_delta_channel_history(config=config, channels=replayed)
+            for channel in replayed:
+                history, spec = histories[channel], self.delta_channels[channel]
+                rebuilt = spec.from_checkpoint(history.get("seed", spec.ValueType()))
+                rebuilt.replay_writes(history["writes"])
+
+                # stored as a plain value — DeltaChannel.from_checkpoint and the ancestor walk
+                # read it like a snapshot (the value at this checkpoint, before its own writes),
+                # without the private _DeltaSnapshot wrapper (langgraph-checkpoint >= 4.2)
+                # the blob is keyed by version — later checkpoints sharing it hold the same value
+                key = (thread_id, checkpoint_ns, channel, versions[channel])
+                self.blobs[key] = self.serde.dumps_typed(rebuilt.get())
+                self._blob_keys.setdefault(thread_id, set()).add(key)
+                added += len(self.blobs[key][1])
+                metrics.increment("checkpoint.delta_snapshots")
+        return added
+
+    # --- spill files ---
+
+    def _spill_folder(self, thread_id: str) -> str:
+        return os.path.join(self.spill_dir, hashlib.sha256(thread_id.encode("utf-8")).hexdigest()[:24])
+
+    def _spill_path(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        namespace = hashlib.sha256(checkpoint_ns.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self._spill_folder(thread_id), namespace, f"{checkpoint_id}.pkl")
+
+    def _restore(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> None:
+        # brings a spilled checkpoint back into memory — the next put() re-applies the caps
+        path = self._spill_path(thread_id, checkpoint_ns, checkpoint_id)
+        if not self.spill_dir or not os.path.exists(path):
+            return
+
+        with open(path, "rb") as spill_file:
+            spilled = pickle.load(spill_file)
+        self.storage[thread_id][checkpoint_ns][checkpoint_id] = spilled["checkpoint"]
+        if spilled["writes"]:
+            self.writes[(thread_id, checkpoint_ns, checkpoint_id)] = spilled["writes"]
+        for key, blob in spilled["blobs"].items():
+            self.blobs.setdefault(key, blob)
+            self._blob_keys.setdefault(thread_id, set()).add(key)
+
+        os.remove(path)
+        self._spilled[thread_id] = max(0, self._spilled.get(thread_id, 0) - 1)
+        metrics.increment("checkpoint.restored")
+
+    # --- MemorySaver overrides (the async variants delegate to these) ---
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            saved_config = super().put(config, checkpoint, metadata, new_versions)
+            thread_id, checkpoint_ns = saved_config["configurable"]["thread_id"], saved_config["configurable"]["checkpoint_ns"]
+            self._blob_keys.setdefault(thread_id, set()).update(
+                (thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items()
+            )
+            self._enforce_caps(thread_id, checkpoint_ns)
+            return saved_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._lock:
+            return super().put_writes(config, writes, task_id, task_path)
+
+    def get_delta_channel_history(self, *, config, channels):
+        with self._lock:
+            return super().get_delta_channel_history(config=config, channels=channels)
+
+    def get_tuple(self, config):
+        with self._lock:
+            configurable = config["configurable"]
+            checkpoint_id = configurable.get("checkpoint_id")
+            thread_id, checkpoint_ns = configurable["thread_id"], configurable.get("checkpoint_ns", "")
+            if checkpoint_id and checkpoint_id not in self.storage.get(thread_id, {}).get(checkpoint_ns, {}):
+                self._restore(thread_id, checkpoint_ns, checkpoint_id)
+            return super().get_tuple(config)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            super().delete_thread(thread_id)
+            self._evicted.pop(thread_id, None)
+            self._spilled.pop(thread_id, None)
+            self._blob_keys.pop(thread_id, None)
+            if self.spill_dir:
+                shutil.rmtree(self._spill_folder(thread_id), ignore_errors=True)
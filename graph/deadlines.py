@@ -0,0 +1,141 @@
+# deadlines.py — latency budgets, per-node deadlines and hedged requests
+# every graph run (start → first pause, feedback → next pause) gets a latency
+# budget; the absolute deadline travels in config["configurable"]["deadline"]
+# and each LLM node derives its own deadline from it, so one slow provider
+# response cannot stall a session indefinitely
+#
+# idempotent structured calls can also be hedged: if the first request has not
+# answered after roughly the p95 latency of that route, an identical second
+# request is sent and whichever answers first wins — the other is cancelled
+
+import os                              # env overrides
+import time                            # monotonic clock
+import asyncio                         # timeouts + cancellation
+from graph import metrics              # deadline / hedge counters + route latencies
+
+
+# seconds one run may take before it is cancelled (user think time at HITL pauses is not counted)
+SESSION_BUDGET_SECONDS = float(os.getenv("SESSION_LATENCY_BUDGET", "180"))
+
+# max seconds per node — a node's deadline is the earlier of this and the run deadline
+NODE_BUDGETS = {
+    "analyze_jd": 30.0,
+    "write_cover_letter": 60.0,
+    "prepare_interview": 90.0,
+    "run_qa_check": 30.0,
+}
+
+# hedge delay when a route has too few latency samples for a useful p95
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "8"))
+HEDGE_MIN_SAMPLES = 20
+
+
+class DeadlineExceeded(TimeoutError):
+    """A node ran past its deadline — its in-flight requests were cancelled."""
+
+
+def run_deadline(budget: float = None) -> float:
+    """Absolute deadline (monotonic clock) for a run starting now."""
+    return time.monotonic() + (SESSION_BUDGET_SECONDS if budget is None else budget)
+
+
+def node_budget(node: str) -> float:
+    """Max seconds a single node may take."""
+    return NODE_BUDGETS.get(node, SESSION_BUDGET_SECONDS)
+
+
+def node_deadline(config: dict, node: str) -> float:
+    """
+    Deadline for one node — the run deadline from the config, capped by the node's own budget.
+    Nodes called outside a graph run (no deadline in config) only get the node budget.
+    """
+
+    own_deadline = time.monotonic() + node_budget(node)
+    run_deadline_value = ((config or {}).get("configurable") or {}).get("deadline")
+    if run_deadline_value is None:
+        return own_deadline
+    return min(own_deadline, run_deadline_value)
+
+
+def remaining(deadline: float) -> float:
+    """Seconds left until the deadline (negative once it has passed)."""
+    return deadline - time.monotonic()
+
+
+def _exceeded(node: str) -> DeadlineExceeded:
+    metrics.increment(f"deadline.{node}.exceeded")
+    return DeadlineExceeded(f"{node} ran past its deadline")
+
+
+async def with_deadline(awaitable, deadline: float, node: str):
+    """Awaits `awaitable`, cancelling it and raising DeadlineExceeded when the deadline passes."""
+
+    timeout = remaining(deadline)
+    if timeout <= 0:
+        # never started — close the coroutine so it does not warn about not being awaited
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise _exceeded(node)
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise _exceeded(node) from None
+
+
+def hedge_delay(node: str, model: str) -> float:
+    """
+    How long to wait before sending a hedged duplicate — the p95 latency of
+    the (node, model) route, or HEDGE_DEFAULT_DELAY until there are enough samples.
+    """
+
+    latencies = metrics.get_observations(f"route.{node}.{model}.latency_seconds")
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY
+
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+async def hedged(call, deadline: float, node: str, delay: float):
+    """
+    Runs `call()` (a coroutine factory for an idempotent request).
+    If it has not finished after `delay` seconds, starts a second identical request;
+    the first successful response wins and the other request is cancelled.
+    Raises DeadlineExceeded when neither answers before the deadline.
+    """
+
+    first = asyncio.ensure_future(call())
+    pending = {first}
+    hedge_sent = False
+    error = None
+
+    try:
+        while pending:
+            timeout = remaining(deadline)
+            if timeout <= 0:
+                raise _exceeded(node)
+
+            wait_seconds = timeout if hedge_sent else min(delay, timeout)
+            done, pending = await asyncio.wait(pending, timeout=wait_seconds, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task.exception() is None:
+                    if hedge_sent:
+                        metrics.increment(f"hedge.{node}.won" if task is not first else f"hedge.{node}.lost")
+                    return task.result()
+                error = task.exception()
+
+            # first request is slow — send the duplicate while there is still time
+            if not done and not hedge_sent and remaining(deadline) > 0:
+                hedge_sent = True
+                metrics.increment(f"hedge.{node}.sent")
+                pending.add(asyncio.ensure_future(call()))
+
+        # every request failed — surface the last error
+        raise error
+
+    finally:
+        # loser (or everything, on deadline) — cancel so the HTTP request is aborted
+        for task in pending:
+            task.cancel()
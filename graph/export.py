@@ -0,0 +1,346 @@
+# export.py — downloadable copies of the final package (Markdown, DOCX, PDF)
+# documents are rendered in a small worker pool so the event loop keeps serving
+# other sessions, and every file is cached on disk under the content hash of
+# final_output — the same package (a re-opened chat, a batch re-run) is never
+# rendered twice, and concurrent requests for it share one render
+#
+#   async for export in export_package(final_output):
+#       ...                       # Export(format, filename, path, cached) as each file finishes
+#
+# the files hold cover letters and CV-derived answers, so the folder is pruned after
+# every render: files unused for EXPORT_MAX_AGE_HOURS go, then the least recently
+# used ones until the folder is under EXPORT_MAX_BYTES (a cache hit counts as a use)
+#
+# env:
+#   EXPORT_DIR=.cache/exports     where rendered files are kept
+#   EXPORT_WORKERS=2              render threads
+#   EXPORT_MAX_AGE_HOURS=24       rendered files unused for longer are deleted
+#   EXPORT_MAX_BYTES=200000000    size cap for the whole folder
+
+import os                                          # paths
+import re                                          # filename slug
+import json                                        # canonical encoding for the hash
+import html                                        # escaping for the PDF layout
+import time                                        # render timings
+import asyncio                                     # as-completed delivery
+import hashlib                                     # content hash
+import threading                                   # pool + in-flight map are process-wide
+from dataclasses import dataclass                  # typed results
+from concurrent.futures import ThreadPoolExecutor  # render pool
+from graph import metrics                          # render / cache counters
+
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(".cache", "exports"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+EXPORT_MAX_AGE_SECONDS = float(os.getenv("EXPORT_MAX_AGE_HOURS", "24")) * 3600
+EXPORT_MAX_BYTES = int(os.getenv("EXPORT_MAX_BYTES", "200000000"))
+
+# formats in the order they usually finish — Markdown is instant, PDF the slowest
+FORMATS = ("md", "docx", "pdf")
+
+MIME_TYPES = {
+    "md": "text/markdown",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# (content hash, format) → concurrent.futures.Future of the file path
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+# one prune at a time — both render threads finish renders
+_prune_lock = threading.Lock()
+
+
+@dataclass
+class Export:
+    """One rendered file of the package."""
+
+    format: str
+    filename: str
+    path: str
+    mime: str
+    cached: bool
+
+
+# --- Content hash ---
+
+def content_hash(final_output: dict) -> str:
+    """Stable hash of the package — identical content → identical files."""
+    encoded = json.dumps(final_output, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def export_filename(final_output: dict, file_format: str) -> str:
+    role = final_output.get("meta", {}).get("role", "") or "application"
+    slug = re.sub(r"[^a-z0-9]+", "_", role.lower()).strip("_")[:60] or "application"
+    return f"application_package_{slug}.{file_format}"
+
+
+# --- Renderers ---
+# pure functions of final_output — they run in the worker pool
+
+def render_markdown(final_output: dict) -> str:
+    cover_letter = final_output.get("cover_letter", {})
+    qa_data = final_output.get("interview_qa", {})
+    gap_data = final_output.get("gap_report", {})
+    meta = final_output.get("meta", {})
+
+    lines = [
+        f"# Application Package — {meta.get('role', '')}",
+        "",
+        f"- Experience level: {meta.get('experience_level', '') or '—'}",
+        f"- Match score: {meta.get('match_score', 0)}/10",
+        f"- Questions: {meta.get('total_questions', 0)}",
+        f"- Gaps: {meta.get('total_gaps', 0)}",
+        "",
+        "## Cover Letter",
+        "",
+        cover_letter.get("content", ""),
+        "",
+        "## Interview Preparation",
+        "",
+    ]
+    for number, qa in enumerate(qa_data.get("qa_pairs", []), 1):
+        lines += [
+            f"### Q{number} [{qa.get('category', '').upper()}]",
+            "",
+            qa.get("question", ""),
+            "",
+            f"*Suggested answer:* {qa.get('suggested_answer', '')}",
+            "",
+        ]
+
+    lines += [
+        "## Gap Report",
+        "",
+        f"**Overall:** {gap_data.get('overall_assessment', '')}",
+        "",
+    ]
+    for gap in gap_data.get("gaps", []):
+        lines += [f"- **{gap.get('gap', '')}** ({gap.get('severity', '')}) — {gap.get('advice', '')}"]
+
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def render_docx(final_output: dict) -> bytes:
+    from io import BytesIO
+    from docx import Document
+
+    cover_letter = final_output.get("cover_letter", {})
+    qa_data = final_output.get("interview_qa", {})
+    gap_data = final_output.get("gap_report", {})
+    meta = final_output.get("meta", {})
+
+    document = Document()
+    document.add_heading(f"Application Package — {meta.get('role', '')}", level=0)
+    document.add_paragraph(
+        f"Match score: {meta.get('match_score', 0)}/10 · "
+        f"{meta.get('total_questions', 0)} questions · {meta.get('total_gaps', 0)} gaps"
+    )
+
+    document.add_heading("Cover Letter", level=1)
+    for paragraph in cover_letter.get("content", "").split("\n\n"):
+        if paragraph.strip():
+            document.add_paragraph(paragraph.strip())
+
+    document.add_heading("Interview Preparation", level=1)
+    for number, qa in enumerate(qa_data.get("qa_pairs", []), 1):
+        document.add_heading(f"Q{number} [{qa.get('category', '').upper()}] {qa.get('question', '')}", level=2)
+        document.add_paragraph(qa.get("suggested_answer", ""))
+
+    document.add_heading("Gap Report", level=1)
+    document.add_paragraph(gap_data.get("overall_assessment", ""))
+    for gap in gap_data.get("gaps", []):
+        item = document.add_paragraph(style="List Bullet")
+        item.add_run(f"{gap.get('gap', '')} ({gap.get('severity', '')})").bold = True
+        item.add_run(f" — {gap.get('advice', '')}")
+
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _package_html(final_output: dict) -> str:
+    cover_letter = final_output.get("cover_letter", {})
+    qa_data = final_output.get("interview_qa", {})
+    gap_data = final_output.get("gap_report", {})
+    meta = final_output.get("meta", {})
+    escape = html.escape
+
+    parts = [
+        f"<h1>Application Package — {escape(str(meta.get('role', '')))}</h1>",
+        f"<p>Match score: {meta.get('match_score', 0)}/10 · "
+        f"{meta.get('total_questions', 0)} questions · {meta.get('total_gaps', 0)} gaps</p>",
+        "<h2>Cover Letter</h2>",
+    ]
+    parts += [f"<p>{escape(paragraph.strip())}</p>" for paragraph in cover_letter.get("content", "").split("\n\n") if paragraph.strip()]
+
+    parts.append("<h2>Interview Preparation</h2>")
+    for number, qa in enumerate(qa_data.get("qa_pairs", []), 1):
+        parts.append(f"<h3>Q{number} [{escape(qa.get('category', '').upper())}] {escape(qa.get('question', ''))}</h3>")
+        parts.append(f"<p><i>{escape(qa.get('suggested_answer', ''))}</i></p>")
+
+    parts.append("<h2>Gap Report</h2>")
+    parts.append(f"<p>{escape(gap_data.get('overall_assessment', ''))}</p><ul>")
+    for gap in gap_data.get("gaps", []):
+        parts.append(f"<li><b>{escape(gap.get('gap', ''))}</b> ({escape(gap.get('severity', ''))}) — {escape(gap.get('advice', ''))}</li>")
+    parts.append("</ul>")
+
+    return "\n".join(parts)
+
+
+def render_pdf(final_output: dict) -> bytes:
+    from io import BytesIO
+    import fitz
+
+    # PyMuPDF's Story flows the HTML over as many A4 pages as it needs
+    story = fitz.Story(html=_package_html(final_output), user_css="body { font-family: sans-serif; font-size: 11pt; }")
+    page_rect = fitz.paper_rect("a4")
+    content_rect = page_rect + (56, 56, -56, -56)
+
+    buffer = BytesIO()
+    writer = fitz.DocumentWriter(buffer)
+    more = True
+    while more:
+        device = writer.begin_page(page_rect)
+        more, _ = story.place(content_rect)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    "md": lambda final_output: render_markdown(final_output).encode("utf-8"),
+    "docx": render_docx,
+    "pdf": render_pdf,
+}
+
+
+# --- Cache + pool ---
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="export")
+        return _pool
+
+
+def _cache_path(digest: str, file_format: str) -> str:
+    return os.path.join(EXPORT_DIR, f"{digest}.{file_format}")
+
+
+def _render_to_cache(final_output: dict, digest: str, file_format: str) -> str:
+    started = time.perf_counter()
+    content = RENDERERS[file_format](final_output)
+
+    # write to a temp file and swap — a crash never leaves a half-written cached file
+    path = _cache_path(digest, file_format)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as export_file:
+        export_file.write(content)
+    os.replace(temp_path, path)
+
+    metrics.observe(f"export.{file_format}.seconds", time.perf_counter() - started)
+    metrics.observe(f"export.{file_format}.bytes", len(content))
+    prune_exports()
+    return path
+
+
+def prune_exports(max_age_seconds: float = EXPORT_MAX_AGE_SECONDS, max_bytes: int = EXPORT_MAX_BYTES) -> int:
+    """
+    Deletes rendered files unused for max_age_seconds, then the least recently used
+    ones until EXPORT_DIR holds at most max_bytes. Returns the number of files deleted.
+    """
+
+    with _prune_lock:
+        files = []
+        try:
+            names = os.listdir(EXPORT_DIR)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            path = os.path.join(EXPORT_DIR, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        # newest first — walk down, keep files while they are young and fit the cap
+        files.sort(reverse=True)
+        now, kept_bytes, deleted = time.time(), 0, 0
+        for modified, size, path in files:
+            if now - modified <= max_age_seconds and kept_bytes + size <= max_bytes:
+                kept_bytes += size
+                continue
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass
+
+    if deleted:
+        metrics.increment("export.pruned", deleted)
+    return deleted
+
+
+def _touch(path: str) -> None:
+    # a cache hit counts as a use — prune_exports() drops the least recently used files
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def _submit(final_output: dict, digest: str, file_format: str):
+    # one render per (package, format) even when several sessions ask at once
+    key = (digest, file_format)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is None:
+            future = _executor().submit(_render_to_cache, final_output, digest, file_format)
+            _in_flight[key] = future
+            future.add_done_callback(lambda _future, key=key: _in_flight.pop(key, None))
+    return future
+
+
+# --- Public API ---
+
+async def export_package(final_output: dict, formats: tuple = FORMATS):
+    """
+    Async iterator of Export results, yielded as each format finishes.
+    Cached files are yielded first, without touching the pool.
+    A format whose renderer fails is skipped (counted in export.<format>.failed).
+    """
+
+    digest = content_hash(final_output)
+    pending = {}
+
+    for file_format in formats:
+        path = _cache_path(digest, file_format)
+        if os.path.exists(path):
+            metrics.increment("export.cache_hits")
+            _touch(path)
+            yield Export(file_format, export_filename(final_output, file_format), path, MIME_TYPES[file_format], True)
+        else:
+            metrics.increment("export.cache_misses")
+            # the render may be shared with other sessions (_in_flight) — shield it, so
+            # this caller going away (chat closed) does not cancel it for everyone else
+            waiter = asyncio.shield(asyncio.wrap_future(_submit(final_output, digest, file_format)))
+            pending[waiter] = file_format
+
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            file_format = pending.pop(future)
+            if future.cancelled() or future.exception() is not None:
+                metrics.increment(f"export.{file_format}.failed")
+                continue
+            yield Export(file_format, export_filename(final_output, file_format), future.result(), MIME_TYPES[file_format], False)
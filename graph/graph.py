@@ -1,15 +1,31 @@
 # graph.py — builds and compiles the full LangGraph pipeline
 # wires all nodes together, defines edges, sets HITL interrupt points
 
-from langgraph.graph import StateGraph, START, END          # core graph building blocks
-from langgraph.checkpoint.memory import MemorySaver         # in-memory checkpointer for HITL persistence
+import threading                                            # one build even with concurrent first requests
 from graph.state import AppState                            # our shared state
-from graph.nodes.parser import parse_cv                     # node 1 — CV file parser
-from graph.nodes.jd_analyzer import analyze_jd              # node 2 — JD analyzer
-from graph.nodes.cover_letter import write_cover_letter     # node 3 — cover letter writer
-from graph.nodes.interview_prep import prepare_interview    # node 4 — interview Q&A generator
-from graph.nodes.qa_agent import run_qa_check               # node 5 — gap analyzer
-from graph.nodes.assembler import assemble_output           # node 6 — final assembler
+
+# langgraph and the node modules (which pull in langchain / openai / PyMuPDF) are
+# imported inside build_graph() — importing this module stays cheap, and the
+# compiled graph is only built when something first asks for it (get_graph())
+
+
+# --- Validation Router ---
+# decides whether the checked draft goes to the user or back to the LLM
+
+def route_after_validation(state: AppState) -> str:
+    """
+    Called after the cover letter validator runs.
+    If a rule could not be fixed locally — send it back for one more LLM pass.
+    Otherwise the draft is ready for the user at HITL 1.
+    """
+
+    # validator sets retry only for unfixable violations within the retry limit
+    report = state.get("cover_letter_report", {}) or {}
+
+    if report.get("retry"):
+        return "retry_cover_letter"         # edge label — loops back to cover_letter node
+
+    return "ready_for_review"               # edge label — goes to hitl_1 pause
 
 
 # --- HITL Router Functions ---
@@ -30,6 +46,14 @@ def route_after_hitl_1(state: AppState) -> str:
     if feedback == "approve" or feedback == "":
         return "proceed_to_interview"       # edge label — goes to interview_prep node
 
+    # picking one of the shown variants without extra feedback ("2", "approve 2") also
+    # approves it — a number with no such variant is feedback like any other
+    from graph.nodes.cover_letter import parse_variant_choice   # loaded with the graph, cheap here
+    variants = state.get("cover_letter_variants", []) or []
+    choice, remaining_feedback = parse_variant_choice(feedback)
+    if choice is not None and 1 <= choice <= len(variants) and not remaining_feedback:
+        return "proceed_to_interview"
+
     # otherwise user gave edit instructions — regenerate cover letter
     return "regenerate_cover_letter"        # edge label — loops back to cover_letter node
 
@@ -80,22 +104,43 @@ def hitl_2_node(state: AppState) -> dict:
 def set_cover_letter_final(state: AppState) -> dict:
     """
     Small utility node — runs when user approves cover letter at HITL 1.
-    Copies cover_letter_draft into cover_letter_final in state.
+    Copies cover_letter_draft (or the picked variant) into cover_letter_final in state.
     This way downstream agents always read from cover_letter_final.
     """
 
+    from graph.nodes.cover_letter import parse_variant_choice   # "2" / "approve 2" at HITL 1
+
+    # user picked one of several variants — that one is the approved version
+    variants = state.get("cover_letter_variants", []) or []
+    choice, _ = parse_variant_choice(state.get("hitl_1_feedback", ""))
+    if choice is not None and 1 <= choice <= len(variants):
+        return {"cover_letter_final": variants[choice - 1]["content"]}
+
     # copy draft to final — this is the approved version
     return {"cover_letter_final": state.get("cover_letter_draft", "")}
 
 
 # --- Build the Graph ---
 
-def build_graph():
+def build_graph(checkpointer=None):
     """
     Builds and compiles the full LangGraph pipeline.
     Returns a compiled graph ready to be invoked by Chainlit.
+    `checkpointer` defaults to a BoundedMemorySaver using the configured
+    checkpoint serializer (graph/serde.py).
     """
 
+    from langgraph.graph import StateGraph, START, END          # core graph building blocks
+    from graph.checkpointer import BoundedMemorySaver           # in-memory checkpointer for HITL persistence, size-capped
+    from graph.serde import checkpoint_serializer               # compact (compressed msgpack) checkpoint encoding
+    from graph.nodes.parser import parse_cv                     # node 1 — CV file parser
+    from graph.nodes.jd_analyzer import analyze_jd              # node 2 — JD analyzer
+    from graph.nodes.cover_letter import write_cover_letter     # node 3 — cover letter writer
+    from graph.nodes.letter_validator import validate_cover_letter  # node 3b — cover letter rule checker
+    from graph.nodes.interview_prep import prepare_interview    # node 4 — interview Q&A generator
+    from graph.nodes.qa_agent import run_qa_check               # node 5 — gap analyzer
+    from graph.nodes.assembler import assemble_output           # node 6 — final assembler
+
     # initialize StateGraph with our AppState schema
     graph_builder = StateGraph(AppState)
 
@@ -105,6 +150,7 @@ def build_graph():
     graph_builder.add_node("parse_cv", parse_cv)                        # node 1
     graph_builder.add_node("analyze_jd", analyze_jd)                    # node 2
     graph_builder.add_node("write_cover_letter", write_cover_letter)    # node 3
+    graph_builder.add_node("validate_cover_letter", validate_cover_letter)  # rule checker
     graph_builder.add_node("hitl_1", hitl_1_node)                       # HITL 1 pause
     graph_builder.add_node("set_cover_letter_final", set_cover_letter_final)  # utility
     graph_builder.add_node("prepare_interview", prepare_interview)       # node 4
@@ -123,9 +169,20 @@ def build_graph():
     # analyze JD → write cover letter
     graph_builder.add_edge("analyze_jd", "write_cover_letter")
 
-    # write cover letter → HITL 1 pause
-    # graph stops here and waits for user
-    graph_builder.add_edge("write_cover_letter", "hitl_1")
+    # write cover letter → validate against the hard writing rules
+    graph_builder.add_edge("write_cover_letter", "validate_cover_letter")
+
+    # validator → HITL 1 pause, or back to the writer if a rule needs the LLM
+    # graph stops at hitl_1 and waits for user
+    graph_builder.add_conditional_edges(
+        "validate_cover_letter",            # from this node
+        route_after_validation,             # call this router function
+        {
+            # router return value → next node name
+            "ready_for_review": "hitl_1",                   # draft passes (or retries used up)
+            "retry_cover_letter": "write_cover_letter"      # unfixable rule violation
+        }
+    )
 
     # HITL 1 → conditional routing based on user feedback
     graph_builder.add_conditional_edges(
@@ -165,7 +222,8 @@ def build_graph():
     # --- Compile with checkpointer ---
     # MemorySaver enables state persistence across HITL interrupts
     # without this, state would be lost when graph pauses
-    checkpointer = MemorySaver()
+    if checkpointer is None:
+        checkpointer = BoundedMemorySaver(serde=checkpoint_serializer())
 
     # compile graph with:
     # checkpointer — for state persistence across interrupts
@@ -178,7 +236,27 @@ def build_graph():
     return compiled_graph
 
 
-# --- Singleton graph instance ---
-# build once when module is imported
-# Chainlit app.py imports this directly
-graph = build_graph()
\ No newline at end of file
+# --- Shared graph instance ---
+# built on first use rather than at import time — the CLI's --help, batch tools
+# and the Chainlit app's import no longer pay for langgraph + every node module
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """The shared compiled graph — built once, on the first call."""
+
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
+
+
+def __getattr__(name: str):
+    # keeps `from graph.graph import graph` working — builds the graph on first access
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
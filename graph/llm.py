@@ -0,0 +1,153 @@
+# llm.py — single place where nodes call the chat model
+# wraps text and structured calls so token usage (including prompt-cache hits),
+# latency and cost are read from the response and recorded per node / per model
+# in graph.metrics — which model a node uses is decided in graph/router.py
+
+import time                        # call latency
+from langchain_core.messages import AIMessage  # raw message for truncated responses
+from graph import metrics          # usage counters
+from graph.repair import repair    # local fix-up of malformed structured output
+
+
+# USD per 1M tokens (input, cached input, output) — update when pricing changes
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+
+def model_name(llm) -> str:
+    """Configured model of a chat model instance ("" if it does not say)."""
+    return getattr(llm, "model_name", "") or getattr(llm, "model", "") or ""
+
+
+def usage_cost(model: str, usage: dict) -> float:
+    """
+    Prices one response's usage_metadata in USD.
+    Model names may come back versioned ("gpt-4o-2024-08-06") — the longest
+    matching price key wins, so "gpt-4o-mini" is not priced as "gpt-4o".
+    """
+
+    matches = [name for name in MODEL_PRICES if model.startswith(name)]
+    if not matches:
+        return 0.0
+    input_price, cached_price, output_price = MODEL_PRICES[max(matches, key=len)]
+
+    input_tokens = usage.get("input_tokens", 0)
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    return (
+        (input_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + usage.get("output_tokens", 0) * output_price
+    ) / 1e6
+
+
+def record_route(node: str, model: str, seconds: float, message=None) -> None:
+    """
+    Per-route metrics — one route = one (node, model) pair.
+    route.<node>.<model>.calls / .latency_seconds / .cost_usd
+    """
+
+    usage = getattr(message, "usage_metadata", None) or {}
+    metrics.increment(f"route.{node}.{model}.calls")
+    metrics.observe(f"route.{node}.{model}.latency_seconds", seconds)
+    if usage:
+        metrics.observe(f"route.{node}.{model}.cost_usd", usage_cost(model, usage))
+
+
+def record_usage(node: str, message) -> None:
+    """
+    Records token usage from an AIMessage's usage_metadata.
+    cached_tokens = prompt tokens the provider served from its prefix cache.
+    """
+
+    usage = getattr(message, "usage_metadata", None) or {}
+    if not usage:
+        return
+
+    input_tokens = usage.get("input_tokens", 0)
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+    metrics.increment(f"llm.{node}.calls")
+    metrics.increment(f"llm.{node}.input_tokens", input_tokens)
+    metrics.increment(f"llm.{node}.cached_tokens", cached_tokens)
+    metrics.increment(f"llm.{node}.output_tokens", usage.get("output_tokens", 0))
+
+    # share of the prompt served from cache — the number prompt layout is tuned for
+    if input_tokens:
+        metrics.observe(f"llm.{node}.cache_hit_ratio", cached_tokens / input_tokens)
+
+
+# all helpers are async — a cancelled task aborts the underlying HTTP request,
+# which is what lets graph.deadlines enforce node deadlines
+
+async def ainvoke_text(llm, messages: list, node: str, config: dict = None):
+    """Plain text call — returns the AIMessage."""
+    started = time.perf_counter()
+    response = await llm.ainvoke(messages, config=config)
+    record_route(node, model_name(llm), time.perf_counter() - started, response)
+    record_usage(node, response)
+    return response
+
+
+async def abatch_text(llm, requests: list, node: str, config: dict = None) -> list:
+    """Several plain text calls sent concurrently — returns the AIMessages in order."""
+    started = time.perf_counter()
+    responses = await llm.abatch(requests, config=config)
+    elapsed = time.perf_counter() - started
+    for response in responses:
+        # concurrent requests — each one took about as long as the whole batch
+        record_route(node, model_name(llm), elapsed, response)
+        record_usage(node, response)
+    return responses
+
+
+def _truncated_result(error) -> dict:
+    # the response hit the token limit mid-JSON — keep its text so it can be repaired
+    completion = error.completion
+    usage = completion.usage
+    raw = AIMessage(
+        content=completion.choices[0].message.content or "",
+        usage_metadata={
+            "input_tokens": usage.prompt_tokens,
+            "output_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        } if usage else None,
+    )
+    return {"raw": raw, "parsed": None, "parsing_error": error}
+
+
+async def ainvoke_structured(llm, schema, messages: list, node: str, config: dict = None):
+    """
+    Structured call — returns the parsed pydantic object.
+    include_raw=True keeps the raw AIMessage so its usage metadata can be recorded
+    and, when parsing fails, so the payload can be repaired locally (graph/repair.py)
+    instead of paying for another round-trip.
+    """
+
+    # the openai SDK is already loaded by the chat model at this point
+    import openai
+
+    structured_llm = llm.with_structured_output(schema, include_raw=True)
+    started = time.perf_counter()
+    try:
+        result = await structured_llm.ainvoke(messages, config=config)
+    except openai.LengthFinishReasonError as error:
+        result = _truncated_result(error)
+    record_route(node, model_name(llm), time.perf_counter() - started, result["raw"])
+    record_usage(node, result["raw"])
+
+    # per-schema fix-ups run on every response; a failed parse is repaired from the raw payload
+    parsed = result.get("parsed") if result.get("parsing_error") is None else None
+    repaired, changed = repair(schema, result["raw"], parsed)
+
+    if repaired is None:
+        # not repairable — raise like with_structured_output did; callers may refetch
+        metrics.increment(f"repair.{node}.unrepaired")
+        if result.get("parsing_error") is not None:
+            raise result["parsing_error"]
+        raise ValueError(f"{node}: model returned no {schema.__name__}")
+
+    if changed:
+        metrics.increment(f"repair.{node}.repaired")
+    return repaired
@@ -0,0 +1,86 @@
+# metrics.py — tiny in-process metrics registry shared by all nodes
+# counters for "how many times did X happen", observations for "how long / how big was X"
+# no external dependency — snapshot() returns a plain dict you can log or expose
+
+import threading                               # nodes may run in worker threads
+from collections import defaultdict            # auto-initialising counters
+
+
+# one lock guards both tables — updates are tiny so contention is negligible
+_lock = threading.Lock()
+
+# counter name → running total
+_counters = defaultdict(int)
+
+# observation name → list of recorded values (latencies, sizes, token counts ...)
+_observations = defaultdict(list)
+
+# keep only the most recent values per observation so memory stays bounded
+MAX_OBSERVATIONS = 1000
+
+
+def increment(name: str, amount: int = 1) -> None:
+    """
+    Adds `amount` to the counter called `name`.
+    Counter names are dotted strings, e.g. "cover_letter.violations.greeting".
+    """
+    with _lock:
+        _counters[name] += amount
+
+
+def observe(name: str, value: float) -> None:
+    """
+    Records a single measurement (latency in seconds, size in bytes, etc.).
+    Only the last MAX_OBSERVATIONS values are kept per name.
+    """
+    with _lock:
+        values = _observations[name]
+        values.append(value)
+
+        # drop the oldest values once the window is full
+        if len(values) > MAX_OBSERVATIONS:
+            del values[: len(values) - MAX_OBSERVATIONS]
+
+
+def get_counter(name: str) -> int:
+    """Returns the current value of a counter (0 if it was never incremented)."""
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def get_observations(name: str) -> list:
+    """Returns a copy of the recorded values for an observation name."""
+    with _lock:
+        return list(_observations.get(name, []))
+
+
+def snapshot() -> dict:
+    """
+    Returns a point-in-time copy of every metric.
+    Observations are summarised as count / mean / p50 / p95 / max.
+    """
+    with _lock:
+        counters = dict(_counters)
+        observations = {name: list(values) for name, values in _observations.items()}
+
+    summaries = {}
+    for name, values in observations.items():
+        if not values:
+            continue
+        ordered = sorted(values)
+        summaries[name] = {
+            "count": len(ordered),
+            "mean": sum(ordered) / len(ordered),
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+        }
+
+    return {"counters": counters, "observations": summaries}
+
+
+def reset() -> None:
+    """Clears every metric — handy between benchmark runs."""
+    with _lock:
+        _counters.clear()
+        _observations.clear()
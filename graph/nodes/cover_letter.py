@@ -1,36 +1,178 @@
 # cover_letter.py — generates a personalized cover letter
 # uses JD analysis + raw CV text to write a targeted letter
 # also handles regeneration if user sends feedback at HITL 1
+# local feedback is applied as a paragraph-level patch instead of a full rewrite
 
 import os                                                    # for env variables
-from dotenv import load_dotenv                               # load .env file
-from langchain_openai import ChatOpenAI                      # OpenAI LLM
-from langchain_core.messages import SystemMessage, HumanMessage  # message types
+import re                                                    # spotting whole-letter feedback
+from graph.router import get_llm                             # per-node model config
+from graph.prompts import build_messages                    # cache-friendly prompt layout
+from graph.budget import budgeted_messages, fit_cv, BudgetExceeded  # prompts within the token budget
+from graph.llm import ainvoke_text, abatch_text, ainvoke_structured  # model calls + usage recording
+from graph.deadlines import node_deadline, with_deadline     # per-node deadline from the run budget
+from langchain_core.runnables import RunnableConfig           # carries the run deadline
+from pydantic import BaseModel, Field                        # structured patch schema
+from typing import List                                      # typed list
 from graph.state import AppState                             # shared state
+from graph.nodes.letter_validator import RULE_DESCRIPTIONS, split_letter, join_letter
+from graph import metrics                                    # edit mode counters
 
-# load environment variables from .env
-load_dotenv()
 
+# how many alternative letters the first generation produces (1 = classic single draft)
+# variants are generated concurrently and the user picks one at HITL 1
+COVER_LETTER_VARIANTS = int(os.getenv("COVER_LETTER_VARIANTS", "1"))
 
-def write_cover_letter(state: AppState) -> dict:
+# one emphasis per variant — keeps the alternatives genuinely different
+VARIANT_ANGLES = [
+    "Lead with the most relevant technical achievement from the CV.",
+    "Lead with measurable impact and results the applicant delivered.",
+    "Lead with motivation for this role and how the applicant works with teams.",
+]
+
+# tag for calls in a streamed node whose tokens must not reach the user: concurrent
+# variants (their tokens would interleave) and the JSON of a targeted-edit patch
+NO_STREAM_TAG = "no_stream"
+
+# HITL 1 replies that pick a variant: "2", "approve 2", "pick #2", "2: <feedback>"
+# or "option 2 - <feedback>" — a bare "2-3 years should be 5" is feedback, not a choice,
+# so "-" only separates feedback after a keyword
+VARIANT_CHOICE_PATTERN = re.compile(
+    r"^\s*(approve|pick|choose|option|use)?\s*#?(\d+)\s*(?:([:\-])\s*(.*))?$",
+    re.IGNORECASE | re.DOTALL
+)
+
+# targeted edit mode — set COVER_LETTER_EDIT_MODE=false to always regenerate in full
+EDIT_MODE_ENABLED = os.getenv("COVER_LETTER_EDIT_MODE", "true").lower() != "false"
+
+# feedback that clearly affects the whole letter — skip the patch attempt entirely
+GLOBAL_FEEDBACK_PATTERN = re.compile(
+    r"\b(tone|shorter|longer|shorten|lengthen|rewrite|restructure|formal|casual|"
+    r"whole|entire|overall|everything|start over|from scratch|completely|different angle)\b",
+    re.IGNORECASE
+)
+
+
+# --- Structured Patch Schema ---
+# the model returns only the paragraphs it changes, not the whole letter
+
+class ParagraphEdit(BaseModel):
+    """Replacement text for one body paragraph"""
+
+    # 1-based index of the body paragraph (greeting and sign-off are not counted)
+    paragraph: int = Field(description="Number of the body paragraph to replace: 1, 2 or 3")
+
+    # full new text of that paragraph
+    new_text: str = Field(description="The complete rewritten paragraph")
+
+
+class CoverLetterPatch(BaseModel):
+    """Paragraph-level patch for the current cover letter"""
+
+    # local = only some paragraphs change, global = the whole letter must be rewritten
+    scope: str = Field(description="'local' if the feedback only needs specific paragraphs rewritten, 'global' if tone, length or structure of the whole letter must change")
+
+    # only the paragraphs that change — empty when scope is global
+    edits: List[ParagraphEdit] = Field(description="Rewritten paragraphs; leave empty when scope is global")
+
+
+def parse_variant_choice(feedback: str) -> tuple:
+    """
+    Reads a variant choice out of HITL 1 feedback.
+    Returns (variant_number, remaining_feedback) — variant_number is None when
+    the feedback does not start with a choice. "2" → (2, ""), "2: shorter" → (2, "shorter").
+    """
+
+    match = VARIANT_CHOICE_PATTERN.match(feedback or "")
+    if not match:
+        return None, feedback
+    keyword, number, separator, remaining = match.groups()
+    if separator == "-" and not keyword:
+        return None, feedback
+    return int(number), (remaining or "").strip()
+
+
+def apply_patch(letter: str, patch: CoverLetterPatch) -> str:
+    """
+    Applies a paragraph patch to the letter locally.
+    Returns the patched letter, or an empty string when the patch is unusable
+    (global scope, no edits, or a paragraph number that does not exist).
+    """
+
+    if patch.scope.strip().lower() != "local" or not patch.edits:
+        return ""
+
+    parts = split_letter(letter)
+    paragraphs = parts["paragraphs"]
+
+    for edit in patch.edits:
+        if not 1 <= edit.paragraph <= len(paragraphs) or not edit.new_text.strip():
+            return ""
+        paragraphs[edit.paragraph - 1] = " ".join(edit.new_text.split())
+
+    return join_letter(parts)
+
+
+async def request_patch(llm, letter: str, feedback: str, task_context: str, state: AppState, deadline: float,
+                        config: RunnableConfig = None) -> str:
+    """
+    Asks the model for a paragraph-level patch for the user's feedback.
+    Returns the patched letter, or an empty string if the edit turned out to be global.
+    """
+
+    # number the body paragraphs so the model can reference them
+    paragraphs = split_letter(letter)["paragraphs"]
+    numbered = "\n\n".join(f"[{i}] {text}" for i, text in enumerate(paragraphs, 1))
+
+    messages = budgeted_messages(
+        config, "write_cover_letter",
+        task=f"""
+            TASK (cover letter writer — targeted edit):
+            {task_context}
+
+            The user wants a change to this cover letter. If the change can be made by
+            rewriting specific body paragraphs, return scope "local" with ONLY those
+            paragraphs rewritten. If the whole letter must change, return scope "global"
+            and no edits. Do not invent anything that is not in the CV.
+
+            BODY PARAGRAPHS:
+            {numbered}
+
+            USER FEEDBACK:
+            {feedback}
+        """,
+        cv_raw_text=state.get("cv_raw_text", ""),
+        job_description=state.get("job_description", ""),
+        schema=CoverLetterPatch
+    )
+
+    patch = await with_deadline(
+        ainvoke_structured(llm, CoverLetterPatch, messages, node="write_cover_letter", config={"tags": [NO_STREAM_TAG]}),
+        deadline, "write_cover_letter"
+    )
+    return apply_patch(letter, patch)
+
+
+async def write_cover_letter(state: AppState, config: RunnableConfig = None) -> dict:
     """
     Cover Letter Agent node — writes a personalized cover letter.
     Uses jd_analysis + cv_raw_text from state.
     If hitl_1_feedback exists, it means user requested changes — regenerate accordingly.
-    Writes result into state['cover_letter_draft'].
+    If the validator flagged an unfixable rule violation, rewrite only to satisfy the rules.
+    With COVER_LETTER_VARIANTS > 1 the first generation writes several letters concurrently.
+    Writes result into state['cover_letter_draft'] (and state['cover_letter_variants']).
+    Must finish before the node deadline derived from the run budget in `config`.
     """
 
-    # initialize OpenAI LLM
-    llm = ChatOpenAI(
-        model="gpt-4o",                          # latest capable model
-        temperature=0.4,                         # slight creativity for natural writing
-        api_key=os.getenv("OPENAI_API_KEY")      # key from .env
-    )
+    # routed model for this node (gpt-4o by default, see graph/router.py)
+    llm = get_llm("write_cover_letter", temperature=0.4)   # slight creativity for natural writing
+    deadline = node_deadline(config, "write_cover_letter")
 
     # pull what we need from shared state
     jd_analysis = state.get("jd_analysis", {})          # structured JD info
     cv_raw_text = state.get("cv_raw_text", "")          # parsed CV text
+    job_description = state.get("job_description", "")  # raw JD — part of the cached prefix
     hitl_feedback = state.get("hitl_1_feedback", "")    # user feedback if regenerating
+    report = state.get("cover_letter_report", {}) or {}  # validator result for the last draft
 
     # extract fields from jd_analysis dict for cleaner prompt building
     role = jd_analysis.get("role", "the role")
@@ -40,71 +182,136 @@ def write_cover_letter(state: AppState) -> dict:
     keywords = ", ".join(jd_analysis.get("keywords", []))
     experience_level = jd_analysis.get("experience_level", "")
 
-# system prompt — defines the agent's role and rules
-    system_prompt = SystemMessage(content=f"""
-        You are an expert cover letter writer with 10+ years of hiring experience.
-        You write compelling, personalized cover letters that get interviews.
-
-        Rules:
-        - Always open with exactly "Hi there,"
-        - Always maintain professional tone throughout
-        - Be specific and concise — Maximum 250 words total
-        - Always close with "Best regards," or "Sincerely,"
-        - Do NOT use generic phrases like "I am writing to apply for..."
-        - Do NOT fabricate experience not present in the CV
-        - Naturally weave in these keywords: {keywords}
-        - Keep it to exactly 3 paragraphs, concise and impactful
-        - End with a confident, specific call to action
-    """)
-
-    # build human message differently based on whether this is
-    # a first generation or a regeneration after HITL feedback
-    if hitl_feedback and hitl_feedback.lower() != "approve":
+    # per-session details the rules refer to — these go in the task, after the
+    # shared rules + CV + JD prefix, so the prefix stays identical across calls
+    task_context = f"""
+            JOB ROLE: {role}
+            REQUIRED SKILLS: {required_skills}
+            EXPERIENCE LEVEL: {experience_level}
+            KEYWORDS TO WEAVE IN: {keywords}
+    """
+
+    # build the task differently based on whether this is
+    # a validator retry, a regeneration after HITL feedback or a first generation
+    if report.get("retry"):
+
+        # --- RULE-FIX PATH ---
+        # validator found violations it cannot fix locally (e.g. too long)
+        broken_rules = "\n".join(
+            f"- {RULE_DESCRIPTIONS[rule]}" for rule in report.get("unfixable", [])
+        )
+        task = f"""
+            TASK (cover letter writer — rule fix):
+            The cover letter below breaks these rules:
+            {broken_rules}
+
+            It is currently {report.get('word_count', 0)} words long.
+
+            COVER LETTER:
+            {state.get('cover_letter_draft', '')}
+
+            Rewrite it so it follows every rule. Keep the facts, keywords and
+            call to action — change only what is needed to satisfy the rules.
+        """
+
+    elif hitl_feedback and hitl_feedback.lower() != "approve":
+
+        # feedback may target one of several variants: "2: mention Kubernetes"
+        # after this round there is a single draft again, so variants are cleared
+        previous_letter = state.get("cover_letter_draft", "")
+        variants = state.get("cover_letter_variants", []) or []
+        choice, choice_feedback = parse_variant_choice(hitl_feedback)
+        if choice is not None and 1 <= choice <= len(variants) and choice_feedback:
+            previous_letter = variants[choice - 1]["content"]
+            hitl_feedback = choice_feedback
+
+        # --- TARGETED EDIT PATH ---
+        # most feedback touches one paragraph — patch it locally instead of a full rewrite
+        if EDIT_MODE_ENABLED and previous_letter and not GLOBAL_FEEDBACK_PATTERN.search(hitl_feedback):
+            patched_letter = await request_patch(llm, previous_letter, hitl_feedback, task_context, state, deadline, config)
+            if patched_letter:
+                metrics.increment("cover_letter.edit.patched")
+                return {"cover_letter_draft": patched_letter, "cover_letter_variants": []}
+            metrics.increment("cover_letter.edit.global_fallback")
+        else:
+            metrics.increment("cover_letter.edit.full_regeneration")
 
         # --- REGENERATION PATH ---
         # user gave feedback at HITL 1, incorporate it into new version
-        human_message = HumanMessage(content=f"""
+        task = f"""
+            TASK (cover letter writer — rewrite):
+            {task_context}
+
             Here is the previously generated cover letter and the user's feedback.
             Rewrite the cover letter incorporating the feedback precisely.
 
             PREVIOUS COVER LETTER:
-            {state.get('cover_letter_draft', '')}
+            {previous_letter}
 
             USER FEEDBACK:
             {hitl_feedback}
 
-            JOB ROLE: {role}
-            REQUIRED SKILLS: {required_skills}
-            EXPERIENCE LEVEL: {experience_level}
-
-            APPLICANT CV:
-            {cv_raw_text}
-
             Write an improved cover letter based on the feedback above.
-        """)
+        """
 
     else:
 
         # --- FIRST GENERATION PATH ---
         # fresh cover letter generation from JD + CV
-        human_message = HumanMessage(content=f"""
+        task = f"""
+            TASK (cover letter writer):
             Write a personalized cover letter for the following:
-
-            JOB ROLE: {role}
-            REQUIRED SKILLS: {required_skills}
+            {task_context}
+            TONE OF THE JD: {tone}
             KEY RESPONSIBILITIES:
             {responsibilities}
-            EXPERIENCE LEVEL: {experience_level}
-
-            APPLICANT CV:
-            {cv_raw_text}
 
             Write a compelling cover letter that highlights relevant experience
             and directly addresses the role requirements.
-        """)
+        """
+
+        # --- MULTI-VARIANT PATH ---
+        # one request per angle, sent concurrently — the user picks one at HITL 1
+        # the angle is appended to the task, so all variants share the cached prefix
+        variant_count = min(COVER_LETTER_VARIANTS, len(VARIANT_ANGLES))
+        if variant_count > 1:
+            # budgeted once for all variants, so they keep sharing the same (maybe truncated) CV
+            # variants are optional — without the budget for all of them a single draft is written
+            try:
+                cv_raw_text = fit_cv(config, "write_cover_letter", task, cv_raw_text, job_description,
+                                     calls=variant_count, optional=True)
+            except BudgetExceeded:
+                variant_count = 1
+        if variant_count > 1:
+            variant_requests = [
+                build_messages(task + f"\n\nEMPHASIS: {angle}", cv_raw_text, job_description)
+                for angle in VARIANT_ANGLES[:variant_count]
+            ]
+            responses = await with_deadline(
+                abatch_text(llm, variant_requests, node="write_cover_letter", config={"tags": [NO_STREAM_TAG]}),
+                deadline, "write_cover_letter"
+            )
+            variants = [
+                {"angle": angle, "content": response.content}
+                for angle, response in zip(VARIANT_ANGLES, responses)
+            ]
+            metrics.increment("cover_letter.variants_generated", len(variants))
+            return {"cover_letter_draft": variants[0]["content"], "cover_letter_variants": variants}
 
     # invoke LLM — returns AIMessage, we extract .content for plain text
-    response = llm.invoke([system_prompt, human_message])
+    # a validator retry is not streamed: the bubble already holds the rejected draft,
+    # and the UI shows the validated version once the run ends
+    response = await with_deadline(
+        ainvoke_text(
+            llm, budgeted_messages(config, "write_cover_letter", task, cv_raw_text, job_description),
+            node="write_cover_letter", config={"tags": [NO_STREAM_TAG]} if report.get("retry") else None
+        ),
+        deadline, "write_cover_letter"
+    )
+
+    # validator retries rewrite the current draft only — keep any variants around
+    if report.get("retry"):
+        return {"cover_letter_draft": response.content}
 
     # store draft in state — HITL 1 will let user review this
-    return {"cover_letter_draft": response.content}
\ No newline at end of file
+    return {"cover_letter_draft": response.content, "cover_letter_variants": []}
@@ -1,17 +1,21 @@
 # interview_prep.py — generates personalized interview Q&A
 # uses JD analysis + CV text + approved cover letter as full context
 # handles follow-up requests from HITL 2 (more questions, different focus)
-
-import os                                                    # for env variables
-from dotenv import load_dotenv                               # load .env file
-from langchain_openai import ChatOpenAI                      # OpenAI LLM
-from langchain_core.messages import SystemMessage, HumanMessage  # message types
+# first generation reuses question stems from the question bank when a similar
+# role was seen before — the LLM then only answers them and adds gap questions
+
+import asyncio                                               # bank file access off the event loop
+from graph.router import get_llm                             # per-node model config
+from graph.prompts import build_messages                     # cache-friendly prompt layout
+from graph.budget import budgeted_messages, fit_qa_history, estimate_messages, BudgetExceeded  # prompts within the token budget
+from graph.llm import ainvoke_structured                     # model call + usage recording
+from graph.deadlines import node_deadline, with_deadline     # per-node deadline from the run budget
+from langchain_core.runnables import RunnableConfig           # carries the run deadline
 from pydantic import BaseModel, Field                        # structured output
 from typing import List                                      # typed list
 from graph.state import AppState                             # shared state
-
-# load environment variables
-load_dotenv()
+from graph.question_bank import question_bank, QUESTION_BANK_ENABLED  # reusable question stems
+from graph import metrics                                    # bank usage counters
 
 
 # --- Structured Output Schema ---
@@ -37,27 +41,48 @@ class InterviewQAList(BaseModel):
     qa_pairs: List[QAPair] = Field(description="List of interview questions with suggested answers")
 
 
-def prepare_interview(state: AppState) -> dict:
+class PersonalizedAnswers(BaseModel):
+    """Answers for question stems taken from the question bank, plus CV-based questions"""
+
+    # one answer per bank question, in the same order
+    suggested_answers: List[str] = Field(description="One personalized suggested answer per listed question, in the same order")
+
+    # behavioral and gap questions depend on this applicant's CV, so they are always written fresh
+    cv_questions: List[QAPair] = Field(description="Behavioral and gap-related questions with suggested answers")
+
+
+def answer_bank_questions(questions: list, answers: PersonalizedAnswers) -> list:
+    """
+    Pairs bank questions with their answers and appends the CV-based questions.
+    Returns [] when the answer count does not line up — the caller regenerates.
+    """
+
+    if len(answers.suggested_answers) != len(questions):
+        return []
+
+    qa_list = [
+        {"question": question["question"], "category": question["category"], "suggested_answer": answer}
+        for question, answer in zip(questions, answers.suggested_answers)
+    ]
+    return qa_list + [qa.model_dump() for qa in answers.cv_questions]
+
+
+async def prepare_interview(state: AppState, config: RunnableConfig = None) -> dict:
     """
     Interview Prep Agent node — generates categorized Q&A.
     Uses full context: JD analysis + CV + approved cover letter.
     If hitl_2_feedback exists, generates additional/focused questions.
-    Writes result into state['interview_qa'].
+    Appends the new Q&A to state['interview_qa'].
     """
 
-    # initialize OpenAI LLM
-    llm = ChatOpenAI(
-        model="gpt-4o",                         # latest capable model
-        temperature=0.4,                        # some variety but still grounded
-        api_key=os.getenv("OPENAI_API_KEY")     # key from .env
-    )
-
-    # bind structured output schema
-    structured_llm = llm.with_structured_output(InterviewQAList)
+    # routed model for this node (gpt-4o by default, see graph/router.py)
+    llm = get_llm("prepare_interview", temperature=0.4)   # some variety but still grounded
+    deadline = node_deadline(config, "prepare_interview")
 
     # pull context from shared state
     jd_analysis = state.get("jd_analysis", {})
     cv_raw_text = state.get("cv_raw_text", "")
+    job_description = state.get("job_description", "")        # raw JD — part of the cached prefix
     cover_letter_final = state.get("cover_letter_final", "")   # approved letter
     hitl_2_feedback = state.get("hitl_2_feedback", "")         # user request at HITL 2
     existing_qa = state.get("interview_qa", [])                # already generated Q&A
@@ -68,27 +93,25 @@ def prepare_interview(state: AppState) -> dict:
     responsibilities = "\n".join(jd_analysis.get("responsibilities", []))
     experience_level = jd_analysis.get("experience_level", "")
 
-    # system prompt — strict rules for quality Q&A generation
-    system_prompt = SystemMessage(content=f"""
-        You are an expert interview coach with deep knowledge of hiring processes.
-        You generate realistic, role-specific interview questions and personalized answers.
-
-        Rules:
-        - Questions must be realistic and actually asked in interviews for: {role}
-        - Suggested answers must be grounded in the applicant's actual CV — no fabrication
-        - Cover all categories: role-specific, behavioral, situational, gap-related
-        - Behavioral questions should follow STAR format hints in suggested answers
-        - Suggested answers should be 3-5 sentences, specific and confident
-    """)
-
     # build prompt based on whether this is first gen or HITL 2 follow-up
-    if hitl_2_feedback and hitl_2_feedback.lower() != "accept":
+    is_follow_up = hitl_2_feedback and hitl_2_feedback.lower() != "accept"
+    if is_follow_up:
 
         # --- FOLLOW-UP PATH ---
         # user wants more questions or a specific focus area
-        human_message = HumanMessage(content=f"""
+        # the history grows every round — it is the first thing trimmed when the budget is tight
+        context_tokens = estimate_messages(
+            build_messages(hitl_2_feedback + cover_letter_final, cv_raw_text, job_description), InterviewQAList
+        )
+        # a follow-up round is optional — refused once the budget is spent (no new questions)
+        try:
+            qa_history = fit_qa_history(config, "prepare_interview", existing_qa, context_tokens)
+        except BudgetExceeded:
+            return {}
+        task = f"""
+            TASK (interview coach — follow-up):
             The applicant already has these interview questions generated:
-            {existing_qa}
+            {qa_history}
 
             USER REQUEST FOR MORE:
             {hitl_2_feedback}
@@ -100,18 +123,63 @@ def prepare_interview(state: AppState) -> dict:
             REQUIRED SKILLS: {required_skills}
             EXPERIENCE LEVEL: {experience_level}
 
-            APPLICANT CV:
-            {cv_raw_text}
-
             APPROVED COVER LETTER:
             {cover_letter_final}
-        """)
+        """
 
     else:
 
+        # --- QUESTION BANK PATH ---
+        # a similar role was seen before — reuse its question stems, the LLM
+        # only writes the answers for this CV plus the CV-based questions
+        bank_questions = []
+        if QUESTION_BANK_ENABLED:
+            bank_questions = await asyncio.to_thread(
+                question_bank.lookup, role, jd_analysis.get("required_skills", []), experience_level
+            )
+
+        if bank_questions:
+            numbered = "\n".join(
+                f"{i}. [{question['category']}] {question['question']}"
+                for i, question in enumerate(bank_questions, 1)
+            )
+            task = f"""
+                TASK (interview coach — answer prepared questions):
+                These interview questions are commonly asked for this role:
+                {numbered}
+
+                Write one personalized suggested answer per question, in the same order,
+                grounded in the applicant's actual CV content. Then write, with answers:
+                - 3 behavioral questions (based on CV experience, STAR format hints)
+                - 2 gap-related questions (areas where the CV may not fully match the JD)
+
+                JOB ROLE: {role}
+                EXPERIENCE LEVEL: {experience_level}
+
+                APPROVED COVER LETTER:
+                {cover_letter_final}
+            """
+
+            answers = await with_deadline(
+                ainvoke_structured(
+                    llm, PersonalizedAnswers,
+                    budgeted_messages(config, "prepare_interview", task, cv_raw_text, job_description, schema=PersonalizedAnswers),
+                    node="prepare_interview"
+                ),
+                deadline, "prepare_interview"
+            )
+            qa_list = answer_bank_questions(bank_questions, answers)
+            if qa_list:
+                metrics.increment("question_bank.reused_questions", len(bank_questions))
+                return {"interview_qa": qa_list}
+
+            # answers did not line up with the questions — fall back to a full generation
+            metrics.increment("question_bank.answer_mismatch")
+
         # --- FIRST GENERATION PATH ---
         # generate default 12 questions across all categories
-        human_message = HumanMessage(content=f"""
+        task = f"""
+            TASK (interview coach):
             Generate exactly 12 interview questions with personalized suggested answers.
 
             Distribution:
@@ -126,25 +194,35 @@ def prepare_interview(state: AppState) -> dict:
             {responsibilities}
             EXPERIENCE LEVEL: {experience_level}
 
-            APPLICANT CV:
-            {cv_raw_text}
-
             APPROVED COVER LETTER:
             {cover_letter_final}
 
             Ground every suggested answer in the applicant's actual CV content.
-        """)
+        """
 
     # invoke structured LLM — returns InterviewQAList pydantic object
-    result = structured_llm.invoke([system_prompt, human_message])
+    # a follow-up round is optional work — refused once the budget is spent (no new questions)
+    try:
+        messages = budgeted_messages(
+            config, "prepare_interview", task, cv_raw_text, job_description,
+            schema=InterviewQAList, optional=bool(is_follow_up)
+        )
+    except BudgetExceeded:
+        return {}
+    result = await with_deadline(
+        ainvoke_structured(llm, InterviewQAList, messages, node="prepare_interview"),
+        deadline, "prepare_interview"
+    )
 
     # convert each QAPair to dict and build the full list
     qa_list = [qa.model_dump() for qa in result.qa_pairs]
 
-    # if this is a follow-up, APPEND new Q&A to existing ones
-    # if first generation, just use the new list
-    if hitl_2_feedback and hitl_2_feedback.lower() != "accept" and existing_qa:
-        qa_list = existing_qa + qa_list    # merge old + new questions
+    # first generation — keep the reusable (JD-only) question stems for similar roles later
+    if QUESTION_BANK_ENABLED and not is_follow_up:
+        await asyncio.to_thread(
+            question_bank.add, role, jd_analysis.get("required_skills", []), experience_level, qa_list
+        )
 
-    # return updated Q&A list into shared state
+    # return only the new Q&A — interview_qa is append-only (see graph/state.py),
+    # so a follow-up round's questions are added after the existing ones
     return {"interview_qa": qa_list}
\ No newline at end of file
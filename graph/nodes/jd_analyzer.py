@@ -1,16 +1,21 @@
 # jd_analyzer.py — uses OpenAI to extract structured info from the job description
 # this is our first real LLM-powered agent node
+# optional fused mode: one call over JD + CV returns the analysis AND the gap report
 
 import os                                        # to access env variables
-from dotenv import load_dotenv                   # to load .env file
-from langchain_openai import ChatOpenAI          # OpenAI LLM via LangChain
-from langchain_core.messages import SystemMessage, HumanMessage  # message types
+import hashlib                                   # cache key for identical JDs
+import threading                                 # cache is shared by concurrent sessions
+from collections import OrderedDict              # small LRU cache
+from graph.budget import budgeted_messages       # cache-friendly prompt layout within the token budget
+from langchain_core.runnables import RunnableConfig  # carries the run deadline
+from graph.router import ainvoke_routed          # small model first, escalate if needed
+from graph.deadlines import node_deadline        # per-node deadline from the run budget
 from pydantic import BaseModel, Field            # for structured output schema
 from typing import List                          # for typed lists
 from graph.state import AppState                 # our shared state
-
-# load .env so OPENAI_API_KEY is available
-load_dotenv()
+from graph import metrics                        # cache hit counters
+from graph.nodes.qa_agent import GapAdvice, build_qa_flags  # fused mode gap report
+from graph.skill_matcher import match_skills     # fused mode match score
 
 
 # --- Structured Output Schema ---
@@ -39,43 +44,165 @@ class JDAnalysis(BaseModel):
     keywords: List[str] = Field(description="Important keywords from JD to use in cover letter and answers")
 
 
-def analyze_jd(state: AppState) -> dict:
+class FusedAnalysis(BaseModel):
+    """JD analysis and CV gap report from a single structured call"""
+
+    # same fields as the regular JD analysis
+    jd: JDAnalysis = Field(description="Structured analysis of the job description")
+
+    # gaps between the CV and the JD found in the same pass
+    gap_report: GapAdvice = Field(description="Genuine skill and experience gaps between the CV and the JD")
+
+
+def analysis_is_confident(analysis: JDAnalysis) -> bool:
     """
-    JD Analyzer node — reads job description from state,
-    sends it to OpenAI, returns structured analysis.
-    Writes result into state['jd_analysis'].
+    Cheap sanity check on a small-model extraction — every JD names a role,
+    some skills and some keywords; an empty field means the model missed it.
     """
+    return bool(analysis.role.strip() and analysis.required_skills and analysis.keywords)
+
+
+# fused mode — set FUSED_ANALYSIS=true to let analyze_jd also produce the gap report
+# one request instead of two, and the JD + CV are only sent once
+FUSED_ANALYSIS = os.getenv("FUSED_ANALYSIS", "false").lower() == "true"
+
+
+# --- Analysis Cache ---
+# identical JD text → identical extraction (temperature 0), so reuse it
+# across sessions and batch runs instead of paying for another gpt-4o call
+
+JD_CACHE_SIZE = int(os.getenv("JD_CACHE_SIZE", "256"))     # max cached analyses
+_jd_cache = OrderedDict()                                   # jd hash → analysis dict
+_jd_cache_lock = threading.Lock()
+
+
+def jd_cache_key(job_description: str) -> str:
+    """Hash of the JD with whitespace normalized — reformatted pastes still hit."""
+    normalized = " ".join(job_description.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def get_cached_analysis(job_description: str):
+    """Returns a copy of the cached analysis for this JD, or None."""
+    key = jd_cache_key(job_description)
+    with _jd_cache_lock:
+        if key not in _jd_cache:
+            return None
+        _jd_cache.move_to_end(key)                         # mark as recently used
+        return dict(_jd_cache[key])
+
 
-    # initialize OpenAI LLM — gpt-4o is latest capable model
-    llm = ChatOpenAI(
-        model="gpt-4o",               # latest OpenAI model
-        temperature=0,                # 0 = deterministic, we want consistent extraction
-        api_key=os.getenv("OPENAI_API_KEY")  # load key from .env
+def store_analysis(job_description: str, analysis: dict) -> None:
+    """Stores an analysis, evicting the least recently used entry when full."""
+    key = jd_cache_key(job_description)
+    with _jd_cache_lock:
+        _jd_cache[key] = dict(analysis)
+        _jd_cache.move_to_end(key)
+        while len(_jd_cache) > JD_CACHE_SIZE:
+            _jd_cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """Empties the analysis cache — used by benchmarks to measure cold calls."""
+    with _jd_cache_lock:
+        _jd_cache.clear()
+
+
+async def analyze_jd_and_gaps(job_description: str, cv_raw_text: str, deadline: float = None, config: RunnableConfig = None) -> dict:
+    """
+    Fused mode — one structured call over JD + CV.
+    Returns {"jd_analysis": ..., "qa_flags": ...} so run_qa_check can skip its own call.
+    """
+
+    # task last — rules + CV + JD form the shared cached prefix
+    messages = budgeted_messages(
+        config, "analyze_jd",
+        task="""
+            TASK (job description analyzer + career advisor):
+            Extract the structured analysis of the job description above, then compare
+            the applicant's CV against it — list every genuine gap with severity and
+            actionable advice, and give a one sentence overall assessment.
+        """,
+        cv_raw_text=cv_raw_text,
+        job_description=job_description,
+        schema=FusedAnalysis
     )
 
-    # bind structured output schema to LLM
-    # this forces the LLM to return a valid JDAnalysis object
-    structured_llm = llm.with_structured_output(JDAnalysis)
+    result = await ainvoke_routed(
+        "analyze_jd", FusedAnalysis, messages,
+        is_confident=lambda fused: analysis_is_confident(fused.jd),
+        deadline=deadline
+    )
+    jd_analysis = result.jd.model_dump()
+
+    # match score + coverage still come from the local matcher
+    match = match_skills(cv_raw_text, jd_analysis["required_skills"], jd_analysis["keywords"])
+    qa_flags = build_qa_flags(
+        match,
+        [gap.model_dump() for gap in result.gap_report.gaps],
+        result.gap_report.overall_assessment
+    )
 
-    # system prompt — tells LLM exactly what its job is
-    system_prompt = SystemMessage(content="""
-        You are an expert job description analyzer.
-        Your job is to extract structured information from job descriptions accurately.
-        Be precise, concise, and extract only what is explicitly stated or strongly implied.
-        Do not hallucinate skills or responsibilities not present in the JD.
-    """)
+    return {"jd_analysis": jd_analysis, "qa_flags": qa_flags}
 
-    # human message — passes the actual JD text to the LLM
-    human_message = HumanMessage(content=f"""
-        Analyze the following job description and extract structured information:
 
-        {state['job_description']}
-    """)
+async def analyze_jd(state: AppState, config: RunnableConfig = None) -> dict:
+    """
+    JD Analyzer node — reads job description from state,
+    sends it to OpenAI, returns structured analysis.
+    Writes result into state['jd_analysis'].
+    Skipped when the analysis was seeded into state; cached per JD text otherwise.
+    In fused mode it also writes state['qa_flags'] from the same call.
+    Must finish before the node deadline derived from the run budget in `config`.
+    """
+
+    # analysis seeded before the graph started (batch mode) — nothing to do
+    if state.get("jd_analysis"):
+        return {}
+
+    # same JD analyzed before in this process — reuse it
+    cached_analysis = get_cached_analysis(state["job_description"])
+    if cached_analysis is not None:
+        metrics.increment("jd_analysis.cache_hits")
+        return {"jd_analysis": cached_analysis}
+    metrics.increment("jd_analysis.cache_misses")
+
+    # this node's share of the run's latency budget
+    deadline = node_deadline(config, "analyze_jd")
+
+    # fused mode — JD analysis and gap report in one request
+    # (only on a cache miss: a cached JD makes the plain gap check the cheaper path)
+    if FUSED_ANALYSIS and state.get("cv_raw_text"):
+        metrics.increment("jd_analysis.fused_calls")
+        result = await analyze_jd_and_gaps(state["job_description"], state["cv_raw_text"], deadline, config)
+        store_analysis(state["job_description"], result["jd_analysis"])
+        return result
+
+    # shared rules, then the JD, then the task — extraction needs no CV, and leaving it
+    # out makes the request identical for every user who pastes the same posting,
+    # so concurrent sessions share one in-flight call (graph/singleflight.py)
+    messages = budgeted_messages(
+        config, "analyze_jd",
+        task="""
+            TASK (job description analyzer):
+            Analyze the job description above and extract structured information.
+        """,
+        cv_raw_text="",
+        job_description=state["job_description"],
+        schema=JDAnalysis
+    )
 
-    # invoke the LLM with our messages
-    # structured_llm returns a JDAnalysis pydantic object directly
-    jd_analysis_result = structured_llm.invoke([system_prompt, human_message])
+    # routed call — small model first, escalates on invalid or thin output
+    # temperature 0 = deterministic, we want consistent extraction
+    # returns a JDAnalysis pydantic object directly
+    jd_analysis_result = await ainvoke_routed(
+        "analyze_jd", JDAnalysis, messages,
+        is_confident=analysis_is_confident,
+        deadline=deadline
+    )
 
     # convert pydantic object to dict so it can be stored in state
     # model_dump() is the pydantic v2 way to convert to dict
-    return {"jd_analysis": jd_analysis_result.model_dump()}
\ No newline at end of file
+    jd_analysis = jd_analysis_result.model_dump()
+    store_analysis(state["job_description"], jd_analysis)
+    return {"jd_analysis": jd_analysis}
\ No newline at end of file
@@ -0,0 +1,313 @@
+# letter_validator.py — checks the cover letter draft against the hard writing rules
+# deterministic node, no LLM here — fixes what it safely can and only asks for
+# an LLM retry when a rule cannot be fixed locally (e.g. the letter is too long)
+
+import re                                  # pattern matching for greetings, sign-offs, phrases
+from graph.state import AppState           # shared state
+from graph import metrics                  # violation counters
+
+
+# --- Rules ---
+# these mirror the rules in the cover letter system prompt
+
+REQUIRED_GREETING = "Hi there,"                          # exact opening line
+ALLOWED_CLOSINGS = ["Best regards,", "Sincerely,"]       # accepted sign-off lines
+DEFAULT_CLOSING = "Best regards,"                        # used when we have to insert/replace one
+MAX_WORDS = 250                                          # hard word limit for the whole letter
+REQUIRED_PARAGRAPHS = 3                                  # body paragraphs between greeting and closing
+
+# how many times we send the letter back to the LLM for unfixable violations
+# per generation — after that the draft goes to HITL 1 as-is
+MAX_VALIDATION_RETRIES = 1
+
+# human readable rule descriptions — used in the retry prompt and in the UI
+RULE_DESCRIPTIONS = {
+    "greeting": f'Open with exactly "{REQUIRED_GREETING}"',
+    "closing": 'Close with "Best regards," or "Sincerely,"',
+    "paragraphs": f"Keep it to exactly {REQUIRED_PARAGRAPHS} paragraphs",
+    "word_limit": f"Maximum {MAX_WORDS} words total",
+    "banned_phrase": 'Do NOT use generic phrases like "I am writing to apply for..."',
+}
+
+# any short salutation line we are allowed to swap for the required greeting
+GREETING_PATTERN = re.compile(r"^(hi|hello|hey|dear|greetings|to whom)\b", re.IGNORECASE)
+
+# a salutation sharing its line with the first sentence: "Dear Hiring Manager, I am excited..."
+INLINE_GREETING_PATTERN = re.compile(
+    r"^((?:hi|hello|hey|dear|greetings|to whom)\b[^,:!.\n]*[,:!])\s+(\S.*)$",
+    re.IGNORECASE
+)
+
+# longest salutation we treat as a greeting rather than part of the body
+MAX_GREETING_WORDS = 6
+
+# sign-off lines we recognise — anything matching is replaced by an allowed closing
+CLOSING_PATTERN = re.compile(
+    r"^(best regards|kind regards|warm regards|warmest regards|regards|sincerely|"
+    r"yours sincerely|sincerely yours|yours truly|best wishes|best|thank you|thanks|"
+    r"many thanks|cheers|respectfully)\s*[,.!]?$",
+    re.IGNORECASE
+)
+
+# the generic opener the prompt forbids
+BANNED_PHRASE_PATTERN = re.compile(r"\bI(?:\s+am|'m|’m)\s+writing\s+to\s+apply\s+for\b", re.IGNORECASE)
+
+# splits a paragraph into sentences (keeps punctuation on the sentence)
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+# --- Parsing helpers ---
+
+def count_words(text: str) -> int:
+    """Counts whitespace separated words — same rough measure a reader would use."""
+    return len(text.split())
+
+
+def split_letter(text: str) -> dict:
+    """
+    Splits a letter into its parts:
+    greeting line, list of body paragraphs, closing line and signature lines.
+    Missing parts come back as empty strings / lists.
+    """
+
+    lines = text.strip().splitlines()
+
+    # --- closing: look for a sign-off line near the end of the letter ---
+    closing = ""
+    signature = []
+    non_empty_indexes = [i for i, line in enumerate(lines) if line.strip()]
+    for index in reversed(non_empty_indexes[-4:]):
+        if CLOSING_PATTERN.match(lines[index].strip()):
+            closing = lines[index].strip()
+            signature = [line.strip() for line in lines[index + 1:] if line.strip()]
+            lines = lines[:index]
+            break
+
+    # --- greeting: first non-empty line if it looks like a salutation, or the ---
+    # --- salutation at its start when the body text follows on the same line ---
+    greeting = ""
+    for index, line in enumerate(lines):
+        if not line.strip():
+            continue
+        candidate = line.strip()
+        inline = INLINE_GREETING_PATTERN.match(candidate)
+        if inline and len(inline.group(1).split()) <= MAX_GREETING_WORDS:
+            greeting = inline.group(1)
+            lines = [inline.group(2)] + lines[index + 1:]
+        elif len(candidate.split()) <= MAX_GREETING_WORDS and GREETING_PATTERN.match(candidate):
+            greeting = candidate
+            lines = lines[index + 1:]
+        break
+
+    # --- body: whatever is left, split on blank lines ---
+    body_text = "\n".join(lines).strip()
+    paragraphs = [
+        " ".join(block.split())                          # collapse hard-wrapped lines
+        for block in re.split(r"\n\s*\n", body_text)
+        if block.strip()
+    ]
+
+    return {
+        "greeting": greeting,
+        "paragraphs": paragraphs,
+        "closing": closing,
+        "signature": signature,
+    }
+
+
+def join_letter(parts: dict) -> str:
+    """Rebuilds letter text from the parts produced by split_letter."""
+
+    blocks = [parts["greeting"]] if parts["greeting"] else []
+    blocks.extend(parts["paragraphs"])
+
+    # sign-off and name stay on consecutive lines
+    if parts["closing"]:
+        blocks.append("\n".join([parts["closing"]] + parts["signature"]))
+
+    return "\n\n".join(blocks)
+
+
+def find_violations(text: str) -> list:
+    """
+    Returns the names of every rule the letter breaks (keys of RULE_DESCRIPTIONS).
+    Pure check — does not modify anything.
+    """
+
+    parts = split_letter(text)
+    violations = []
+
+    if parts["greeting"] != REQUIRED_GREETING:
+        violations.append("greeting")
+
+    if parts["closing"] not in ALLOWED_CLOSINGS:
+        violations.append("closing")
+
+    if len(parts["paragraphs"]) != REQUIRED_PARAGRAPHS:
+        violations.append("paragraphs")
+
+    if count_words(text) > MAX_WORDS:
+        violations.append("word_limit")
+
+    if BANNED_PHRASE_PATTERN.search(text):
+        violations.append("banned_phrase")
+
+    return violations
+
+
+# --- Deterministic fixes ---
+# each fixer edits the parts dict in place and returns True if it managed a fix
+
+def _fix_greeting(parts: dict) -> bool:
+    # swap whatever salutation was used (or none) for the required one
+    parts["greeting"] = REQUIRED_GREETING
+    return True
+
+
+def _fix_closing(parts: dict) -> bool:
+    # replace a non-standard sign-off, or add one if it is missing entirely
+    parts["closing"] = DEFAULT_CLOSING
+    return True
+
+
+def _fix_paragraphs(parts: dict) -> bool:
+    paragraphs = parts["paragraphs"]
+
+    # too many paragraphs — merge the shortest neighbouring pair until we have 3
+    while len(paragraphs) > REQUIRED_PARAGRAPHS:
+        pair_lengths = [
+            count_words(paragraphs[i]) + count_words(paragraphs[i + 1])
+            for i in range(len(paragraphs) - 1)
+        ]
+        i = pair_lengths.index(min(pair_lengths))
+        paragraphs[i:i + 2] = [paragraphs[i] + " " + paragraphs[i + 1]]
+
+    # too few paragraphs — split the longest one at the sentence boundary nearest its middle
+    while 0 < len(paragraphs) < REQUIRED_PARAGRAPHS:
+        longest = max(range(len(paragraphs)), key=lambda i: count_words(paragraphs[i]))
+        sentences = SENTENCE_SPLIT_PATTERN.split(paragraphs[longest])
+        if len(sentences) < 2:
+            return False                          # nothing sensible to split — needs the LLM
+        middle = len(sentences) // 2
+        paragraphs[longest:longest + 1] = [
+            " ".join(sentences[:middle]),
+            " ".join(sentences[middle:]),
+        ]
+
+    return len(paragraphs) == REQUIRED_PARAGRAPHS
+
+
+def _fix_banned_phrase(parts: dict) -> bool:
+    # drop the sentence containing the generic opener, as long as the paragraph survives
+    for index, paragraph in enumerate(parts["paragraphs"]):
+        sentences = SENTENCE_SPLIT_PATTERN.split(paragraph)
+        kept = [s for s in sentences if not BANNED_PHRASE_PATTERN.search(s)]
+        if len(kept) == len(sentences):
+            continue
+        if not kept:
+            return False                          # whole paragraph is the phrase — needs the LLM
+        parts["paragraphs"][index] = " ".join(kept)
+    return True
+
+
+# rule name → fixer; word_limit has no safe local fix, trimming content needs the LLM
+FIXERS = {
+    "greeting": _fix_greeting,
+    "closing": _fix_closing,
+    "paragraphs": _fix_paragraphs,
+    "banned_phrase": _fix_banned_phrase,
+}
+
+
+def check_cover_letter(text: str) -> tuple:
+    """
+    Validates a letter and applies every deterministic fix it can.
+    Returns (fixed_text, report) where report is:
+    {"violations": [...], "fixed": [...], "unfixable": [...], "word_count": int}
+    The original text is returned untouched when there is nothing to fix.
+    """
+
+    violations = find_violations(text)
+
+    # nothing wrong — keep the model's formatting exactly as written
+    if not violations:
+        return text, {"violations": [], "fixed": [], "unfixable": [], "word_count": count_words(text)}
+
+    parts = split_letter(text)
+    fixed = []
+
+    # banned phrase first — dropping a sentence can change paragraph structure
+    for rule in ["banned_phrase", "greeting", "closing", "paragraphs"]:
+        if rule in violations and FIXERS[rule](parts):
+            fixed.append(rule)
+
+    fixed_text = join_letter(parts) if fixed else text
+
+    # re-check the result — anything still broken needs an LLM retry
+    unfixable = find_violations(fixed_text)
+
+    report = {
+        "violations": violations,
+        "fixed": [rule for rule in fixed if rule not in unfixable],
+        "unfixable": unfixable,
+        "word_count": count_words(fixed_text),
+    }
+    return fixed_text, report
+
+
+# --- Node ---
+
+def validate_cover_letter(state: AppState) -> dict:
+    """
+    Validator node — runs on cover_letter_draft (and any variants) before HITL 1.
+    Applies deterministic fixes and records a report in state['cover_letter_report'].
+    Sets report['retry'] when a violation can only be fixed by the LLM,
+    which routes the graph back to write_cover_letter (at most MAX_VALIDATION_RETRIES times).
+    """
+
+    draft = state.get("cover_letter_draft", "")
+    variants = state.get("cover_letter_variants", []) or []
+
+    # retries only count while we are looping on the same generation —
+    # a previous report without retry means this draft is a fresh generation
+    previous_report = state.get("cover_letter_report", {}) or {}
+    retries = previous_report.get("retries", 0) if previous_report.get("retry") else 0
+
+    if len(variants) > 1 and not previous_report.get("retry"):
+
+        # --- fresh set of variants ---
+        # fix every variant and put clean ones first — a clean alternative
+        # makes an LLM retry unnecessary; the first variant becomes the draft
+        checked = [(variant, check_cover_letter(variant["content"])) for variant in variants]
+        checked.sort(key=lambda item: len(item[1][1]["unfixable"]))
+        variants = [
+            {**variant, "content": fixed_text, "unfixable": variant_report["unfixable"]}
+            for variant, (fixed_text, variant_report) in checked
+        ]
+        fixed_draft, report = checked[0][1]
+
+    else:
+
+        # --- single draft (or a retried first variant) ---
+        fixed_draft, report = check_cover_letter(draft)
+        if len(variants) > 1:
+            variants = [{**variants[0], "content": fixed_draft, "unfixable": report["unfixable"]}] + variants[1:]
+
+    # only go back to the LLM for violations we could not fix locally
+    retry = bool(report["unfixable"]) and retries < MAX_VALIDATION_RETRIES
+
+    # violation counters — one per rule plus totals
+    metrics.increment("cover_letter.checked")
+    for rule in report["violations"]:
+        metrics.increment(f"cover_letter.violations.{rule}")
+    metrics.increment("cover_letter.fixed_locally", len(report["fixed"]))
+    if retry:
+        metrics.increment("cover_letter.llm_retries")
+
+    report["retry"] = retry
+    report["retries"] = retries + 1 if retry else retries
+
+    result = {"cover_letter_draft": fixed_draft, "cover_letter_report": report}
+    if len(variants) > 1:
+        result["cover_letter_variants"] = variants
+    return result
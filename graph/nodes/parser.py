@@ -2,17 +2,24 @@
 # this is a deterministic node, no LLM needed here, just file parsing
 
 import os                          # for file path and extension handling
-import fitz                        # PyMuPDF — for reading PDF files
-from docx import Document          # python-docx — for reading DOCX files
 from graph.state import AppState   # our shared state
+from graph.preflight import extract_text, PreflightError, MAX_UPLOAD_BYTES  # checked, in-memory extraction
 
 
 def parse_cv(state: AppState) -> dict:
     """
     Parser node — reads CV file from uploads/ folder and extracts plain text.
     Writes extracted text into state['cv_raw_text'].
+    Skipped when state['cv_raw_text'] is already set.
+    Raises PreflightError for a file that is not a readable PDF / DOCX CV — its
+    error message must never reach the LLM nodes as if it were the CV.
     """
 
+    # CV already parsed before the graph started (e.g. batch mode parses once
+    # and seeds every thread) — nothing to do
+    if state.get("cv_raw_text"):
+        return {}
+
     # get the file path stored in state by Chainlit before graph runs
     cv_file_path = state.get("cv_file_path", "")
 
@@ -20,48 +27,23 @@ def parse_cv(state: AppState) -> dict:
     if not cv_file_path:
         return {"cv_raw_text": "No CV file provided."}
 
-    # get file extension to decide which parser to use
+    # get file extension — only used to reject obviously wrong files early,
+    # the actual type is decided by graph/preflight.py from the file's magic bytes
     # os.path.splitext returns ("filename", ".pdf") — we take index 1
     file_extension = os.path.splitext(cv_file_path)[1].lower()
 
-    # --- PDF parsing ---
-    if file_extension == ".pdf":
-
-        # open the PDF file using PyMuPDF
-        pdf_document = fitz.open(cv_file_path)
-
-        # initialize empty string to collect text from all pages
-        extracted_text = ""
-
-        # loop through every page in the PDF
-        for page_number in range(len(pdf_document)):
-
-            # get the page object
-            page = pdf_document[page_number]
-
-            # extract plain text from this page and add to our string
-            extracted_text += page.get_text()
-
-        # close the PDF after reading
-        pdf_document.close()
-
-    # --- DOCX parsing ---
-    elif file_extension == ".docx":
-
-        # open the DOCX file using python-docx
-        docx_document = Document(cv_file_path)
+    # --- unsupported file type ---
+    if file_extension not in (".pdf", ".docx"):
+        raise PreflightError(f"Unsupported file type: {file_extension}. Please upload PDF or DOCX.", "extension")
 
-        # each paragraph in docx is a separate object
-        # we join all paragraph texts with newline between them
-        extracted_text = "\n".join([
-            paragraph.text                        # get text of each paragraph
-            for paragraph in docx_document.paragraphs  # loop all paragraphs
-            if paragraph.text.strip()             # skip empty paragraphs
-        ])
+    # read the file once and parse from memory — preflight checks size, pages,
+    # decompressed size and caps extraction time before any text comes back
+    with open(cv_file_path, "rb") as cv_file:
+        data = cv_file.read(MAX_UPLOAD_BYTES + 1)
 
-    # --- unsupported file type ---
-    else:
-        extracted_text = f"Unsupported file type: {file_extension}. Please upload PDF or DOCX."
+    # a rejected file raises PreflightError — callers report it (the CLI writes it
+    # to <output>.errors.jsonl), the pipeline does not run on it
+    extracted_text = extract_text(data)
 
     # return dict — LangGraph merges this into the shared state
-    return {"cv_raw_text": extracted_text}
\ No newline at end of file
+    return {"cv_raw_text": extracted_text}
@@ -1,17 +1,17 @@
 # qa_agent.py — compares CV against JD and finds skill/experience gaps
 # gives user an honest picture of weak spots before the interview
 # no fabrication — only flags what's genuinely missing or weak
+# coverage and match score come from the local skill matcher — the LLM only
+# writes severity + advice for the skills the matcher marks missing or weak
 
-import os                                                    # for env variables
-from dotenv import load_dotenv                               # load .env file
-from langchain_openai import ChatOpenAI                      # OpenAI LLM
-from langchain_core.messages import SystemMessage, HumanMessage  # message types
+from graph.budget import budgeted_messages                  # cache-friendly prompt layout within the token budget
+from langchain_core.runnables import RunnableConfig           # carries the run deadline
+from graph.router import ainvoke_routed                      # small model first, escalate if needed
+from graph.deadlines import node_deadline                    # per-node deadline from the run budget
 from pydantic import BaseModel, Field                        # structured output
 from typing import List                                      # typed list
 from graph.state import AppState                             # shared state
-
-# load environment variables from .env
-load_dotenv()
+from graph.skill_matcher import match_skills, normalize_tokens  # local coverage + match score, skill tokens
 
 
 # --- Structured Output Schema ---
@@ -29,35 +29,76 @@ class GapItem(BaseModel):
     advice: str = Field(description="Specific advice on how to address or handle this gap")
 
 
-class GapReport(BaseModel):
-    """Full gap report comparing CV against JD requirements"""
-
-    # list of all identified gaps
-    gaps: List[GapItem] = Field(description="List of identified gaps between CV and JD")
+class GapAdvice(BaseModel):
+    """Advice for the gaps pre-computed by the local skill matcher"""
 
-    # overall match score out of 10
-    match_score: int = Field(description="Overall match score between CV and JD out of 10")
+    # one item per missing / weak skill the matcher found
+    gaps: List[GapItem] = Field(description="One entry per missing or weak skill, with severity and advice")
 
     # one line overall assessment
     overall_assessment: str = Field(description="One sentence overall assessment of the application strength")
 
 
-def run_qa_check(state: AppState) -> dict:
+def build_qa_flags(match: dict, gaps: list, overall_assessment: str) -> dict:
+    """
+    Shapes the gap report stored in state['qa_flags'].
+    Match score and per-skill coverage always come from the local matcher.
+    """
+    return {
+        "gaps": gaps,                                    # list of gap dicts
+        "match_score": match["match_score"],             # local score out of 10
+        "overall_assessment": overall_assessment,        # one line summary
+        "skill_coverage": match["skills"]                # per-skill coverage from matcher
+    }
+
+
+# severities the UI and the assembler understand
+SEVERITIES = {"critical", "moderate", "minor"}
+
+# share of a skill's words the written gaps must mention — advice may paraphrase
+# "5+ years of experience with distributed systems" as "distributed systems experience"
+SKILL_MENTION_RATIO = 0.5
+
+
+def _mentions(written_tokens: set, skill: str) -> bool:
+    # compares normalized tokens (aliases, plurals, stopwords handled); numbers like "5" say nothing
+    tokens = {token for token in normalize_tokens(skill) if not token.isdigit()}
+    if not tokens:
+        return True
+    return len(tokens & written_tokens) >= SKILL_MENTION_RATIO * len(tokens)
+
+
+def advice_is_confident(advice: GapAdvice, match: dict) -> bool:
+    """
+    Cheap sanity check on small-model gap advice — one entry per missing or
+    weak skill, each mentioning most of its skill's words (in normalized form,
+    so paraphrases pass), with a known severity and some advice.
+    """
+
+    expected = match["missing"] + match["weak"]
+    if len(advice.gaps) < len(expected):
+        return False
+
+    written = set(normalize_tokens(" ".join(f"{gap.gap} {gap.advice}" for gap in advice.gaps)))
+    if not all(_mentions(written, skill) for skill in expected):
+        return False
+
+    return all(gap.severity.strip().lower() in SEVERITIES and gap.advice.strip() for gap in advice.gaps)
+
+
+async def run_qa_check(state: AppState, config: RunnableConfig = None) -> dict:
     """
     QA Agent node — performs gap analysis between CV and JD.
     Uses jd_analysis + cv_raw_text from state.
+    Skill coverage and match score are computed locally by the skill matcher;
+    the LLM is only asked for severity + advice on missing or weak skills.
     Writes result into state['qa_flags'].
+    Skipped when the fused analysis mode already produced the gap report.
     """
 
-    # initialize OpenAI LLM
-    llm = ChatOpenAI(
-        model="gpt-4o",                         # latest capable model
-        temperature=0,                          # 0 = deterministic gap analysis
-        api_key=os.getenv("OPENAI_API_KEY")     # key from .env
-    )
-
-    # bind structured output schema
-    structured_llm = llm.with_structured_output(GapReport)
+    # gap report already written by analyze_jd in fused mode — nothing to do
+    if state.get("qa_flags"):
+        return {}
 
     # pull what we need from shared state
     jd_analysis = state.get("jd_analysis", {})
@@ -66,51 +107,56 @@ def run_qa_check(state: AppState) -> dict:
     # extract from jd_analysis for cleaner prompt
     role = jd_analysis.get("role", "the role")
     required_skills = jd_analysis.get("required_skills", [])
-    responsibilities = jd_analysis.get("responsibilities", [])
     experience_level = jd_analysis.get("experience_level", "")
     keywords = jd_analysis.get("keywords", [])
 
-    # system prompt — strict honest gap analysis rules
-    system_prompt = SystemMessage(content="""
-        You are a brutally honest but constructive career advisor.
-        Your job is to compare a CV against job requirements and identify gaps.
-
-        Rules:
-        - Only flag gaps that are genuinely missing or weak in the CV
-        - Do NOT fabricate gaps that don't exist
-        - Be specific — name the exact skill or experience missing
-        - Severity: critical = dealbreaker, moderate = noticeable, minor = nice to have
-        - Advice must be actionable and interview-focused
-        - Match score: 10 = perfect match, 1 = very poor match
-        - Be honest but constructive — this helps the applicant prepare
-    """)
-
-    # human message — passes full context for comparison
-    human_message = HumanMessage(content=f"""
-        Compare this applicant's CV against the job requirements and identify gaps.
+    # --- local matching — milliseconds, no tokens ---
+    match = match_skills(cv_raw_text, required_skills, keywords)
+
+    # the JD names no required skills — the score is neutral and there are no gaps to rate
+    if not required_skills:
+        qa_flags = build_qa_flags(match, [], f"The job description for {role} lists no specific required skills, so the match score is neutral — tailor your CV to its responsibilities instead.")
+        return {"qa_flags": qa_flags}
+
+    # everything covered — nothing for the LLM to advise on
+    if not match["missing"] and not match["weak"]:
+        qa_flags = build_qa_flags(match, [], f"Your CV covers every required skill for {role}.")
+        return {"qa_flags": qa_flags}
+
+    # task — only the matcher output; the CV + JD sit in the shared (cached) prefix
+    task = f"""
+        TASK (career advisor — gap analysis):
+        A matching engine has already compared the CV against the job requirements.
+        Rate and advise on the gaps it found.
+
+        - Write exactly one entry per listed gap — do not add or drop gaps
+        - Missing skills are usually critical or moderate, weak ones moderate or minor
+        - Use the applicant's covered skills to suggest adjacent experience to highlight
 
         JOB ROLE: {role}
         EXPERIENCE LEVEL REQUIRED: {experience_level}
-        REQUIRED SKILLS: {", ".join(required_skills)}
-        KEY RESPONSIBILITIES: {chr(10).join(responsibilities)}
-        IMPORTANT KEYWORDS: {", ".join(keywords)}
+        LOCAL MATCH SCORE: {match['match_score']}/10
 
-        APPLICANT CV:
-        {cv_raw_text}
+        MISSING SKILLS (not found in CV): {", ".join(match['missing']) or "none"}
+        WEAK SKILLS (only partly evidenced): {", ".join(match['weak']) or "none"}
+        COVERED SKILLS: {", ".join(match['covered']) or "none"}
+        MISSING KEYWORDS: {", ".join(match['missing_keywords']) or "none"}
 
-        Identify all gaps, assign severity, provide actionable advice for each.
-        Give an honest match score and overall assessment.
-    """)
+        Assign severity and actionable advice for each missing and weak skill,
+        then give a one sentence overall assessment.
+    """
 
-    # invoke structured LLM — returns GapReport pydantic object
-    result = structured_llm.invoke([system_prompt, human_message])
+    # routed call at temperature 0 — small model first, escalates when the
+    # advice is invalid or skips gaps; returns GapAdvice pydantic object
+    messages = budgeted_messages(config, "run_qa_check", task, cv_raw_text, state.get("job_description", ""), schema=GapAdvice)
+    result = await ainvoke_routed(
+        "run_qa_check", GapAdvice, messages,
+        is_confident=lambda advice: advice_is_confident(advice, match),
+        deadline=node_deadline(config, "run_qa_check")
+    )
 
     # build qa_flags dict with full gap report data
-    qa_flags = {
-        "gaps": [gap.model_dump() for gap in result.gaps],   # list of gap dicts
-        "match_score": result.match_score,                    # score out of 10
-        "overall_assessment": result.overall_assessment       # one line summary
-    }
+    qa_flags = build_qa_flags(match, [gap.model_dump() for gap in result.gaps], result.overall_assessment)
 
     # return gap report into shared state
-    return {"qa_flags": qa_flags}
\ No newline at end of file
+    return {"qa_flags": qa_flags}
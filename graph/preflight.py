@@ -0,0 +1,162 @@
+# preflight.py — checks an uploaded CV before any extraction work is done
+# the file extension says nothing about what was uploaded: a 200-page PDF or a
+# zip bomb renamed to .docx used to go straight into PyMuPDF / python-docx on the worker
+#
+#   1. sniff        — magic bytes decide the type (%PDF- / a zip with word/document.xml)
+#   2. bound        — upload size, PDF page count, DOCX entry count + decompressed size
+#   3. extract      — from the in-memory bytes (fitz.open(stream=...), BytesIO for DOCX),
+#                     with a wall-clock cap checked between pages / paragraphs
+#
+# every rejection raises PreflightError with a message that can be shown to the user
+#
+# env:
+#   CV_MAX_BYTES=10000000                 max upload size
+#   CV_MAX_PAGES=20                       max PDF pages
+#   CV_MAX_UNCOMPRESSED_BYTES=50000000    max total decompressed DOCX size
+#   CV_EXTRACTION_TIMEOUT=15              seconds extraction may take
+
+import os                                          # env limits
+import io                                          # in-memory file objects
+import time                                        # extraction deadline
+import asyncio                                     # extraction off the event loop
+import zipfile                                     # DOCX container checks
+from graph import metrics                          # rejection counters + timings
+
+
+MAX_UPLOAD_BYTES = int(os.getenv("CV_MAX_BYTES", "10000000"))
+MAX_PDF_PAGES = int(os.getenv("CV_MAX_PAGES", "20"))
+MAX_UNCOMPRESSED_BYTES = int(os.getenv("CV_MAX_UNCOMPRESSED_BYTES", "50000000"))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("CV_EXTRACTION_TIMEOUT", "15"))
+
+# a real CV .docx has a few dozen zip entries and compresses maybe 10:1
+MAX_ZIP_ENTRIES = 1000
+MAX_COMPRESSION_RATIO = 100
+
+# PDF allows junk before the header — readers look in the first 1 KB
+PDF_HEADER_WINDOW = 1024
+
+
+class PreflightError(ValueError):
+    """The upload was rejected — the message is safe to show to the user."""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+        metrics.increment(f"preflight.rejected.{reason}")
+
+
+# --- Sniff + bound ---
+
+def sniff(data: bytes) -> str:
+    """'pdf' or 'docx' from the file's magic bytes — raises PreflightError otherwise."""
+
+    if b"%PDF-" in data[:PDF_HEADER_WINDOW]:
+        return "pdf"
+    if data[:4] == b"PK\x03\x04":
+        return "docx"
+    raise PreflightError("This file is not a PDF or DOCX document. Please upload your CV as PDF or DOCX.", "unknown_type")
+
+
+def check_docx_container(data: bytes) -> None:
+    """Rejects zips that are not Word documents or that would decompress to too much."""
+
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise PreflightError("This DOCX file is damaged and cannot be opened.", "corrupt") from None
+
+    with archive:
+        entries = archive.infolist()
+        if "word/document.xml" not in archive.namelist():
+            raise PreflightError("This file is a zip archive, not a Word document.", "not_docx")
+        if len(entries) > MAX_ZIP_ENTRIES:
+            raise PreflightError("This DOCX file has an unusual structure and was rejected.", "zip_entries")
+
+        # sizes come from the zip directory — nothing is decompressed to check them
+        uncompressed = sum(entry.file_size for entry in entries)
+        compressed = max(1, sum(entry.compress_size for entry in entries))
+        if uncompressed > MAX_UNCOMPRESSED_BYTES or uncompressed / compressed > MAX_COMPRESSION_RATIO:
+            raise PreflightError("This DOCX file expands to far more data than a CV should and was rejected.", "decompressed_size")
+
+
+def check_upload(data: bytes) -> str:
+    """Runs every cheap check on the raw bytes. Returns the sniffed type ('pdf' / 'docx')."""
+
+    if not data:
+        raise PreflightError("The uploaded file is empty.", "empty")
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise PreflightError(f"The file is larger than {MAX_UPLOAD_BYTES // 1_000_000} MB — please upload a shorter CV.", "size")
+
+    kind = sniff(data)
+    if kind == "docx":
+        check_docx_container(data)
+    return kind
+
+
+# --- Extraction from memory ---
+
+def _check_deadline(deadline: float) -> None:
+    if time.monotonic() > deadline:
+        raise PreflightError("Reading this CV took too long — please upload a simpler file.", "timeout")
+
+
+def _extract_pdf(data: bytes, deadline: float) -> str:
+    import fitz
+
+    try:
+        document = fitz.open(stream=data, filetype="pdf")
+    except Exception:
+        raise PreflightError("This PDF is damaged and cannot be opened.", "corrupt") from None
+
+    with document:
+        if document.needs_pass:
+            raise PreflightError("This PDF is password protected — please upload an unlocked copy.", "encrypted")
+        if document.page_count > MAX_PDF_PAGES:
+            raise PreflightError(f"The PDF has {document.page_count} pages — CVs over {MAX_PDF_PAGES} pages are not accepted.", "pages")
+
+        pages = []
+        for page in document:
+            _check_deadline(deadline)
+            pages.append(page.get_text())
+    return "".join(pages)
+
+
+def _extract_docx(data: bytes, deadline: float) -> str:
+    from docx import Document
+
+    try:
+        document = Document(io.BytesIO(data))
+    except Exception:
+        raise PreflightError("This DOCX file is damaged and cannot be opened.", "corrupt") from None
+    _check_deadline(deadline)
+
+    paragraphs = []
+    for paragraph in document.paragraphs:
+        _check_deadline(deadline)
+        if paragraph.text.strip():
+            paragraphs.append(paragraph.text)
+    return "\n".join(paragraphs)
+
+
+def extract_text(data: bytes) -> str:
+    """
+    Checks the upload and extracts its plain text from memory, within
+    EXTRACTION_TIMEOUT_SECONDS. Raises PreflightError when the file is rejected.
+    """
+
+    kind = check_upload(data)
+    started = time.monotonic()
+    deadline = started + EXTRACTION_TIMEOUT_SECONDS
+
+    text = _extract_pdf(data, deadline) if kind == "pdf" else _extract_docx(data, deadline)
+    if not text.strip():
+        raise PreflightError("No text could be found in this CV — if it is a scanned image, please upload a text-based PDF or DOCX.", "no_text")
+
+    metrics.observe(f"preflight.{kind}.extract_seconds", time.monotonic() - started)
+    metrics.observe("preflight.upload_bytes", len(data))
+    return text
+
+
+async def read_cv(data: bytes) -> str:
+    """extract_text() in a worker thread, so the event loop keeps serving other sessions."""
+    return await asyncio.to_thread(extract_text, data)
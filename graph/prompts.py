@@ -0,0 +1,85 @@
+# prompts.py — shared prompt layout for every LLM call in the pipeline
+# providers cache the longest identical prefix of a request, so every call
+# in a session is laid out the same way:
+#
+#   1. SystemMessage  — SYSTEM_RULES, identical for every node and every session
+#   2. HumanMessage   — session context: the applicant's CV, then the job description
+#   3. HumanMessage   — the per-call task (which agent, feedback, previous drafts ...)
+#
+# 1 + 2 never change inside a session, so after the first call they are served
+# from the provider's prompt cache; only the short task message is new each time
+
+import textwrap                                                    # tidy indented task strings
+from langchain_core.messages import SystemMessage, HumanMessage   # message types
+
+
+# --- Shared Rules ---
+# rules for all agents in one stable block — per-session data (role, keywords ...)
+# must NOT be formatted into this string, it goes into the task message instead
+
+SYSTEM_RULES = """You are a job application copilot made of several expert agents that share the context below:
+a job description analyzer, a cover letter writer with 10+ years of hiring experience,
+an interview coach with deep knowledge of hiring processes, and a brutally honest but
+constructive career advisor. Every request ends with a TASK telling you which agent you
+are acting as — follow that task only.
+
+General rules:
+- Ground everything in the applicant's CV and the job description — never fabricate experience
+- Extract only what is explicitly stated or strongly implied in the job description
+- Do not hallucinate skills or responsibilities not present in the job description
+- Be precise, concise and specific
+
+Job description analyzer rules:
+- Extract structured information from the job description accurately
+
+Cover letter writer rules:
+- Always open with exactly "Hi there,"
+- Always maintain professional tone throughout
+- Be specific and concise — Maximum 250 words total
+- Always close with "Best regards," or "Sincerely,"
+- Do NOT use generic phrases like "I am writing to apply for..."
+- Do NOT fabricate experience not present in the CV
+- Naturally weave in the keywords given in the task
+- Keep it to exactly 3 paragraphs, concise and impactful
+- End with a confident, specific call to action
+
+Interview coach rules:
+- Questions must be realistic and actually asked in interviews for the role
+- Suggested answers must be grounded in the applicant's actual CV — no fabrication
+- Cover all categories: role-specific, behavioral, situational, gap-related
+- Behavioral questions should follow STAR format hints in suggested answers
+- Suggested answers should be 3-5 sentences, specific and confident
+
+Career advisor (gap analysis) rules:
+- Only flag gaps that are genuinely missing or weak in the CV — do NOT fabricate gaps
+- Be specific — name the exact skill or experience missing
+- Severity: critical = dealbreaker, moderate = noticeable, minor = nice to have
+- Advice must be actionable and interview-focused
+- Be honest but constructive — this helps the applicant prepare"""
+
+
+def context_message(cv_raw_text: str = "", job_description: str = "") -> HumanMessage:
+    """
+    Session context block — CV first, then the JD.
+    Built the same way for every call so the bytes are identical across calls.
+    """
+
+    sections = []
+    if cv_raw_text:
+        sections.append(f"APPLICANT CV:\n{cv_raw_text.strip()}")
+    if job_description:
+        sections.append(f"JOB DESCRIPTION:\n{job_description.strip()}")
+
+    return HumanMessage(content="\n\n".join(sections) or "No context provided.")
+
+
+def build_messages(task: str, cv_raw_text: str = "", job_description: str = "") -> list:
+    """
+    Full message list for one call: shared rules, session context, then the task.
+    `task` is the only part that should differ between calls in a session.
+    """
+    return [
+        SystemMessage(content=SYSTEM_RULES),
+        context_message(cv_raw_text, job_description),
+        HumanMessage(content=textwrap.dedent(task).strip()),
+    ]
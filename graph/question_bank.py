@@ -0,0 +1,190 @@
+# question_bank.py — persistent bank of interview question stems, keyed by role + skills
+# question text for "Senior Backend Engineer" with similar required skills barely
+# changes between sessions, so role-specific and situational questions are stored
+# once and reused; the suggested answers and the CV-based questions (behavioral and
+# gap-related) are written fresh by the LLM for every applicant
+#
+# the bank is shared by every user — nothing derived from one applicant's CV may go in
+#
+# lookup is local: each entry is a TF-IDF vector over normalized role / level /
+# skill tokens, and a query is scored against all entries with one matrix product
+
+import os                                          # bank path
+import json                                        # persistence
+import math                                        # idf
+import threading                                   # shared by concurrent sessions
+import numpy as np                                 # vectorized similarity
+from graph.skill_matcher import normalize_tokens, normalize_skill
+from graph import metrics                          # hit / miss counters
+
+
+# where the bank is stored between runs
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", os.path.join(".cache", "question_bank.json"))
+
+# set QUESTION_BANK=false to always generate questions from scratch
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK", "true").lower() != "false"
+
+# cosine similarity needed to reuse an entry's questions
+SIMILARITY_THRESHOLD = float(os.getenv("QUESTION_BANK_THRESHOLD", "0.8"))
+
+# categories worth reusing — they come from the JD alone. Behavioral questions are
+# built from the applicant's CV (employers, projects) and gap-related ones from its
+# mismatches, so storing them would show one applicant's CV to other users
+REUSABLE_CATEGORIES = {"role-specific", "situational"}
+
+# oldest entries are dropped beyond this size
+MAX_ENTRIES = 500
+
+# role tokens count more than any single skill — "data engineer" vs "data scientist"
+ROLE_WEIGHT = 2.0
+
+
+def profile_tokens(role: str, required_skills: list, experience_level: str = "") -> dict:
+    """
+    Weighted bag of tokens describing a posting: role + level tokens (weighted),
+    plus the tokens of every normalized required skill.
+    """
+
+    weights = {}
+    for token in normalize_tokens(f"{role} {experience_level}"):
+        weights[token] = weights.get(token, 0.0) + ROLE_WEIGHT
+    for skill in required_skills:
+        for token in normalize_skill(skill).split():
+            weights[token] = weights.get(token, 0.0) + 1.0
+    return weights
+
+
+class QuestionBank:
+    """
+    JSON-backed list of entries:
+    {"role", "experience_level", "skills", "tokens", "questions": [{"question", "category"}], "uses"}
+    """
+
+    def __init__(self, path: str = QUESTION_BANK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None          # loaded lazily on first use
+        self._index = None            # (vocabulary, idf, normalized matrix) — rebuilt after changes
+
+    # --- persistence ---
+
+    def _load(self) -> list:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as bank_file:
+                    self._entries = json.load(bank_file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._entries = []
+        return self._entries
+
+    def _save(self) -> None:
+        # write to a temp file and swap, so a crash never leaves half a bank behind
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as bank_file:
+            json.dump(self._entries, bank_file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    # --- similarity index ---
+
+    def _build_index(self):
+        entries = self._load()
+        vocabulary = {}
+        for entry in entries:
+            for token in entry["tokens"]:
+                vocabulary.setdefault(token, len(vocabulary))
+
+        counts = np.zeros((len(entries), len(vocabulary)))
+        for row, entry in enumerate(entries):
+            for token, weight in entry["tokens"].items():
+                counts[row, vocabulary[token]] = weight
+
+        # smoothed idf — tokens every posting shares ("engineer") matter less
+        document_frequency = (counts > 0).sum(axis=0)
+        idf = np.log((1 + len(entries)) / (1 + document_frequency)) + 1
+
+        matrix = counts * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        self._index = (vocabulary, idf, matrix)
+        return self._index
+
+    def _query_vector(self, tokens: dict, vocabulary: dict, idf: np.ndarray) -> np.ndarray:
+        vector = np.zeros(len(vocabulary))
+        for token, weight in tokens.items():
+            if token in vocabulary:
+                vector[vocabulary[token]] = weight
+
+        # unseen tokens still count toward the norm — a query full of new skills scores lower
+        unseen = sum(weight * (math.log(1 + len(self._entries)) + 1) for token, weight in tokens.items() if token not in vocabulary)
+        vector = vector * idf
+        norm = math.sqrt(float(vector @ vector) + unseen ** 2)
+        return vector / norm if norm else vector
+
+    # --- public API ---
+
+    def lookup(self, role: str, required_skills: list, experience_level: str = "") -> list:
+        """
+        Question stems from the most similar stored posting, or [] below SIMILARITY_THRESHOLD.
+        """
+
+        tokens = profile_tokens(role, required_skills, experience_level)
+        with self._lock:
+            entries = self._load()
+            if not entries or not tokens:
+                metrics.increment("question_bank.misses")
+                return []
+
+            vocabulary, idf, matrix = self._index or self._build_index()
+            similarities = matrix @ self._query_vector(tokens, vocabulary, idf)
+            best = int(np.argmax(similarities))
+            metrics.observe("question_bank.best_similarity", float(similarities[best]))
+
+            if similarities[best] < SIMILARITY_THRESHOLD:
+                metrics.increment("question_bank.misses")
+                return []
+
+            entries[best]["uses"] = entries[best].get("uses", 0) + 1
+            metrics.increment("question_bank.hits")
+            # banks written before behavioral questions were excluded may still hold some
+            return [
+                dict(question) for question in entries[best]["questions"]
+                if question.get("category", "").strip().lower() in REUSABLE_CATEGORIES
+            ]
+
+    def add(self, role: str, required_skills: list, experience_level: str, qa_pairs: list) -> None:
+        """Stores the reusable question stems (no answers) of a freshly generated set."""
+
+        questions = [
+            {"question": qa["question"], "category": qa["category"]}
+            for qa in qa_pairs
+            if qa.get("category", "").strip().lower() in REUSABLE_CATEGORIES
+        ]
+        tokens = profile_tokens(role, required_skills, experience_level)
+        if not questions or not tokens:
+            return
+
+        with self._lock:
+            entries = self._load()
+            entries.append({
+                "role": role,
+                "experience_level": experience_level,
+                "skills": [normalize_skill(skill) for skill in required_skills],
+                "tokens": tokens,
+                "questions": questions,
+                "uses": 0,
+            })
+            del entries[:-MAX_ENTRIES]
+            self._index = None
+            self._save()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+
+# one bank per process — shared by every session
+question_bank = QuestionBank()
@@ -0,0 +1,271 @@
+# repair.py — local repair + coercion of structured LLM output before validation
+# a slightly malformed response (JSON cut off at the token limit, "High" instead
+# of "critical", a paragraph number as "2") used to fail the whole call and cost another
+# model round-trip — most of these can be fixed here in milliseconds
+#
+#   1. raw_payload()        — pull the JSON text / args out of the raw AIMessage
+#   2. load_json()          — strip code fences, close truncated JSON
+#   3. coerce()             — walk the pydantic schema: fix types, apply per-field
+#                             fix-up rules, drop broken list items, fill missing fields
+#   4. schema validation    — done by the caller (graph/llm.py)
+
+import re                                          # number / fence extraction
+import json                                        # parsing
+import typing                                      # field type introspection
+from pydantic import BaseModel                     # schema classes
+
+
+# --- Per-field fix-up rules ---
+# keyed by schema class name so this module does not import the node modules
+
+SEVERITY_SYNONYMS = {
+    "critical": "critical", "high": "critical", "severe": "critical", "major": "critical",
+    "blocker": "critical", "dealbreaker": "critical",
+    "moderate": "moderate", "medium": "moderate", "mid": "moderate", "noticeable": "moderate",
+    "minor": "minor", "low": "minor", "small": "minor", "nice to have": "minor",
+}
+
+CATEGORY_SYNONYMS = {
+    "role-specific": "role-specific", "role specific": "role-specific", "technical": "role-specific",
+    "behavioral": "behavioral", "behavioural": "behavioral",
+    "situational": "situational", "scenario": "situational", "hypothetical": "situational",
+    "gap-related": "gap-related", "gap related": "gap-related", "gap": "gap-related",
+}
+
+
+def normalize_severity(value) -> str:
+    # only known synonyms are mapped — an unknown label is left as written, so the
+    # node's confidence check (qa_agent.advice_is_confident) can reject it and escalate
+    text = str(value).strip().lower().replace("_", " ")
+    return SEVERITY_SYNONYMS.get(text, value)
+
+
+def normalize_category(value) -> str:
+    text = str(value).strip().lower().replace("_", " ")
+    return CATEGORY_SYNONYMS.get(text, text.replace(" ", "-"))
+
+
+FIELD_FIXERS = {
+    ("GapItem", "severity"): normalize_severity,
+    ("QAPair", "category"): normalize_category,
+}
+
+
+# --- Raw payload ---
+
+def raw_payload(message):
+    """
+    The structured payload of a raw AIMessage — tool call args (dict or string)
+    for function calling, otherwise the text content (json_schema / json_mode).
+    """
+
+    for call in getattr(message, "tool_calls", None) or []:
+        return call.get("args")
+    for call in getattr(message, "invalid_tool_calls", None) or []:
+        return call.get("args")
+
+    content = getattr(message, "content", "")
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content
+
+
+# --- JSON repair ---
+
+def _closers(text: str) -> str:
+    """What has to be appended to close every open string / object / array in `text`."""
+
+    stack, in_string, escaped = [], False, False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+
+    return ('"' if in_string else "") + "".join(reversed(stack))
+
+
+def _comma_positions(text: str) -> list:
+    """Positions of commas outside strings — places where a truncated value can be cut off."""
+
+    positions, in_string, escaped = [], False, False
+    for position, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ",":
+            positions.append(position)
+    return positions
+
+
+def load_json(text: str):
+    """
+    Parses model JSON, repairing the common breakages:
+    markdown fences, text around the object, trailing commas and truncation.
+    Returns the parsed value, or None if it cannot be repaired.
+    """
+
+    text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text.strip())
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        return None
+    text = text[start:]
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    # trailing commas before a closer
+    text = re.sub(r",\s*([}\]])", r"\1", text)
+
+    # truncated — close everything that is open; if the last value is broken,
+    # cut back to the previous comma and try again
+    candidates = [text] + [text[:position] for position in reversed(_comma_positions(text))]
+    for candidate in candidates:
+        candidate = candidate.rstrip().rstrip(",:")
+        try:
+            return json.loads(candidate + _closers(candidate))
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+# --- Coercion against the schema ---
+
+def _first_number(value):
+    # "7", "7/10", "7 out of 10", "score: 7.5" → 7 / 7.5
+    match = re.search(r"-?\d+(?:\.\d+)?", str(value))
+    return float(match.group()) if match else None
+
+
+def _coerce_value(annotation, value):
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    # Optional[X] / X | None
+    if origin is typing.Union:
+        non_none = [arg for arg in args if arg is not type(None)]
+        if value is None:
+            return None
+        return _coerce_value(non_none[0], value) if non_none else value
+
+    if origin in (list, typing.List):
+        item_type = args[0] if args else typing.Any
+        if isinstance(value, str):
+            # "python, sql" or one item per line
+            value = [part.strip(" -•\t") for part in re.split(r"[,;\n]", value) if part.strip(" -•\t")]
+        elif not isinstance(value, list):
+            value = [value]
+        items = []
+        for item in value:
+            # items are not padded with empty fields — a half-written item should fail
+            if isinstance(item_type, type) and issubclass(item_type, BaseModel) and isinstance(item, dict):
+                coerced = coerce(item_type, item, fill_missing=False)
+            else:
+                coerced = _coerce_value(item_type, item)
+            # list items that cannot be salvaged (e.g. the half-written last one) are dropped
+            if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+                try:
+                    item_type.model_validate(coerced)
+                except Exception:
+                    continue
+            items.append(coerced)
+        return items
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return coerce(annotation, value) if isinstance(value, dict) else value
+
+    if annotation is int and not isinstance(value, bool) and not isinstance(value, int):
+        number = _first_number(value)
+        return int(round(number)) if number is not None else value
+
+    if annotation is float and isinstance(value, str):
+        number = _first_number(value)
+        return number if number is not None else value
+
+    if annotation is str and not isinstance(value, str):
+        if isinstance(value, list):
+            return ", ".join(str(item) for item in value)
+        if value is not None:
+            return str(value)
+
+    return value
+
+
+def coerce(schema, data: dict, fill_missing: bool = True) -> dict:
+    """
+    Returns a copy of `data` shaped for `schema`: wrong types converted,
+    per-field fix-ups applied and (with fill_missing) missing list/str fields
+    filled with empty values.
+    """
+
+    if not isinstance(data, dict):
+        return data
+
+    fixed = {}
+    for name, field in schema.model_fields.items():
+        if name in data:
+            value = _coerce_value(field.annotation, data[name])
+        elif fill_missing and field.is_required():
+            # truncated responses lose their last fields — empty values let the
+            # caller's confidence checks decide whether that is good enough
+            origin = typing.get_origin(field.annotation)
+            if origin in (list, typing.List):
+                value = []
+            elif field.annotation is str:
+                value = ""
+            else:
+                continue
+        else:
+            continue
+
+        fixer = FIELD_FIXERS.get((schema.__name__, name))
+        if fixer is not None and value is not None:
+            try:
+                value = fixer(value)
+            except (TypeError, ValueError):
+                pass
+        fixed[name] = value
+
+    return fixed
+
+
+def repair(schema, raw_message, parsed=None):
+    """
+    Best-effort schema object for a structured response.
+    Starts from the parsed object when there is one (so fix-up rules still apply),
+    otherwise from the repaired raw payload.
+    Returns (object or None, changed) — changed is True when anything was fixed.
+    """
+
+    if parsed is not None:
+        original = parsed.model_dump()
+    else:
+        payload = raw_payload(raw_message)
+        original = load_json(payload) if isinstance(payload, str) else payload
+        if not isinstance(original, dict):
+            return None, False
+
+    fixed = coerce(schema, original)
+    try:
+        result = schema.model_validate(fixed)
+    except Exception:
+        return None, False
+
+    return result, parsed is None or fixed != original
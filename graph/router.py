@@ -0,0 +1,170 @@
+# router.py — which model each node calls, with an optional small → large cascade
+# extraction-style nodes (analyze_jd, run_qa_check) sit on the critical path and
+# don't need the flagship model, so they try a small fast model first and only
+# escalate to the large one when its output fails validation or looks unreliable
+# writing nodes (cover letter, interview answers) go straight to the large model
+# idempotent routes (temperature 0 extraction) are also hedged — see graph/deadlines.py
+# and identical temperature 0 requests from concurrent sessions share one in-flight
+# request — see graph/singleflight.py
+#
+# per-node overrides via env:
+#   MODEL_ANALYZE_JD=gpt-4o            primary model for a node
+#   MODEL_ANALYZE_JD_FALLBACK=         escalation model ("" = no cascade for that node)
+#   MODEL_CASCADE=false                never escalate, primary model only
+
+import os                                        # env overrides
+from pydantic import ValidationError             # schema validation failures
+from langchain_core.exceptions import OutputParserException  # unparseable tool output
+from graph.llm import ainvoke_structured         # structured call + usage recording
+from graph.deadlines import node_budget, node_deadline, hedge_delay, hedged, with_deadline
+from graph.singleflight import request_key, single_flight
+from graph import metrics                        # escalation counters
+
+
+# node → primary model, the model it escalates to, and whether calls are hedged
+# (only idempotent temperature 0 extraction may be hedged — duplicates must be interchangeable)
+DEFAULT_ROUTES = {
+    "analyze_jd": {"model": "gpt-4o-mini", "fallback": "gpt-4o", "hedge": True},
+    "run_qa_check": {"model": "gpt-4o-mini", "fallback": "gpt-4o", "hedge": True},
+    "write_cover_letter": {"model": "gpt-4o", "fallback": "", "hedge": False},
+    "prepare_interview": {"model": "gpt-4o", "fallback": "", "hedge": False},
+}
+
+# master switch for escalation
+CASCADE_ENABLED = os.getenv("MODEL_CASCADE", "true").lower() != "false"
+
+# builds the chat models — None = langchain_openai.ChatOpenAI
+# benchmarks swap in a local stand-in model (benchmarks/local_model.py)
+_chat_model_factory = None
+
+
+def use_chat_model(factory) -> None:
+    """
+    Makes get_llm() call `factory(model=..., temperature=..., timeout=..., api_key=...)`
+    instead of ChatOpenAI. None restores the default.
+    """
+    global _chat_model_factory
+    _chat_model_factory = factory
+
+
+def route_for(node: str) -> dict:
+    """Model config for a node — DEFAULT_ROUTES with MODEL_<NODE>[_FALLBACK] env overrides."""
+
+    route = dict(DEFAULT_ROUTES.get(node, {"model": "gpt-4o", "fallback": "", "hedge": False}))
+    prefix = f"MODEL_{node.upper()}"
+    route["model"] = os.getenv(prefix, route["model"])
+    route["fallback"] = os.getenv(f"{prefix}_FALLBACK", route["fallback"])
+    return route
+
+
+def get_llm(node: str, temperature: float = 0, model: str = ""):
+    """
+    Chat model for a node — its routed primary model unless `model` is given.
+    The HTTP timeout is the node budget, a backstop behind the deadline cancellation.
+    """
+
+    if _chat_model_factory is not None:
+        factory = _chat_model_factory
+    else:
+        # langchain_openai (and the openai SDK under it) is slow to import — load it on first use
+        from langchain_openai import ChatOpenAI as factory
+
+    return factory(
+        model=model or route_for(node)["model"],
+        temperature=temperature,
+        timeout=node_budget(node),
+        api_key=os.getenv("OPENAI_API_KEY")
+    )
+
+
+async def ainvoke_routed(node: str, schema, messages: list, temperature: float = 0, is_confident=None, deadline: float = None):
+    """
+    Structured call through the node's route, within the node's deadline.
+    Tries the primary model; escalates once to the fallback model when the
+    response does not validate against `schema` or `is_confident(result)` is False.
+    Hedged routes send a duplicate request after the route's p95 latency.
+    Temperature 0 requests are shared with identical concurrent callers.
+    Returns the parsed pydantic object; raises DeadlineExceeded when time runs out.
+    """
+
+    route = route_for(node)
+    if deadline is None:
+        deadline = node_deadline(None, node)
+    models = [route["model"]]
+    if CASCADE_ENABLED and route["fallback"] and route["fallback"] != route["model"]:
+        models.append(route["fallback"])
+
+    metrics.increment(f"route.{node}.requests")
+
+    for attempt, model in enumerate(models):
+        last_attempt = attempt == len(models) - 1
+        llm = get_llm(node, temperature, model)
+
+        def call(llm=llm):
+            return ainvoke_structured(llm, schema, messages, node=node)
+
+        def send(call=call, model=model, shared_deadline=deadline):
+            if route["hedge"]:
+                return hedged(call, shared_deadline, node, hedge_delay(node, model))
+            return with_deadline(call(), shared_deadline, node)
+
+        try:
+            if temperature == 0:
+                # a shared request may outlive this caller — it runs on the node budget,
+                # while this caller stops waiting at its own deadline
+                key = request_key(model, temperature, messages, schema)
+                shared = single_flight(key, lambda: send(shared_deadline=node_deadline(None, node)), node)
+                result = await with_deadline(shared, deadline, node)
+            else:
+                result = await send()
+        except (ValidationError, OutputParserException, ValueError):
+            # the small model could not produce a valid object, even after local
+            # repair — escalate, which refetches from the larger model
+            if last_attempt:
+                raise
+            metrics.increment(f"route.{node}.escalations")
+            metrics.increment(f"route.{node}.escalations.invalid_output")
+            metrics.increment(f"repair.{node}.refetched")
+            continue
+
+        if last_attempt or is_confident is None or is_confident(result):
+            return result
+
+        # valid but thin — let the larger model try
+        metrics.increment(f"route.{node}.escalations")
+        metrics.increment(f"route.{node}.escalations.low_confidence")
+
+
+def route_stats() -> dict:
+    """
+    Per-node routing summary built from graph.metrics:
+    requests, escalations, escalation_rate and per-model calls / latency / cost.
+    """
+
+    snapshot = metrics.snapshot()
+    counters, observations = snapshot["counters"], snapshot["observations"]
+
+    stats = {}
+    for node in DEFAULT_ROUTES:
+        requests = counters.get(f"route.{node}.requests", 0)
+        escalations = counters.get(f"route.{node}.escalations", 0)
+
+        models = {}
+        prefix = f"route.{node}."
+        for name, calls in counters.items():
+            if name.startswith(prefix) and name.endswith(".calls"):
+                model = name[len(prefix):-len(".calls")]
+                models[model] = {
+                    "calls": calls,
+                    "latency_seconds": observations.get(f"{prefix}{model}.latency_seconds", {}),
+                    "cost_usd": observations.get(f"{prefix}{model}.cost_usd", {}),
+                }
+
+        stats[node] = {
+            "requests": requests,
+            "escalations": escalations,
+            "escalation_rate": escalations / requests if requests else 0.0,
+            "models": models,
+        }
+
+    return stats
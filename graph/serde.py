@@ -0,0 +1,141 @@
+# serde.py — compact checkpoint serializer
+# every super-step serializes each changed AppState channel: cv_raw_text, the
+# job description, cover letter drafts, the interview_qa list and the final_output
+# tree — mostly prose, which compresses several times over
+#
+# CompactSerializer keeps LangGraph's default encoding (JsonPlusSerializer, which
+# writes msgpack) and compresses any serialized value of COMPRESS_MIN_BYTES or more;
+# small values (feedback strings, flags, versions) are stored as they are, so they
+# pay nothing. The codec is recorded in the type tag ("msgpack+zstd"), the same way
+# LangGraph's EncryptedSerializer records its cipher — blobs written without
+# compression (or by the default serializer) still load. A blob is always decoded
+# with the codec its tag names: a zstd blob read without zstandard installed raises
+#
+# env:
+#   CHECKPOINT_SERIALIZER=compact        "compact" or "jsonplus" (LangGraph's default)
+#   CHECKPOINT_COMPRESSION=zstd          "zstd" (requirements.txt; writes zlib, counted, if zstandard is missing), "zlib" or "none"
+#   CHECKPOINT_COMPRESS_MIN_BYTES=512    smallest serialized value worth compressing
+
+import os                                          # env switches
+import zlib                                        # always-available codec
+import threading                                   # zstd contexts are per thread
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from graph import metrics                          # compression counters
+
+
+SERIALIZER = os.getenv("CHECKPOINT_SERIALIZER", "compact").lower()
+COMPRESSION = os.getenv("CHECKPOINT_COMPRESSION", "zstd").lower()
+COMPRESS_MIN_BYTES = int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "512"))
+
+# fast levels — checkpoints are written on every super-step, on the request path
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 1
+
+
+# --- Codecs ---
+
+class _Zlib:
+    name = "zlib"
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, ZLIB_LEVEL)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class _Zstd:
+    name = "zstd"
+
+    def __init__(self):
+        import zstandard
+        self._zstandard = zstandard
+        self._local = threading.local()       # compressor objects are not thread-safe
+
+    def _contexts(self):
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = self._zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            self._local.decompressor = self._zstandard.ZstdDecompressor()
+        return self._local
+
+    def compress(self, data: bytes) -> bytes:
+        return self._contexts().compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._contexts().decompressor.decompress(data)
+
+
+def _codec(name: str):
+    # codec for writing — a missing zstandard falls back to zlib, which any install can read
+    if name == "none":
+        return None
+    if name == "zstd":
+        try:
+            return _Zstd()
+        except ImportError:
+            metrics.increment("checkpoint.serde.zstd_unavailable")
+            return _Zlib()
+    return _Zlib()
+
+
+def _decoder(name: str):
+    # codec for reading — exactly the one named in the blob's tag, never a substitute
+    if name == "zlib":
+        return _Zlib()
+    if name == "zstd":
+        try:
+            return _Zstd()
+        except ImportError:
+            raise ImportError(
+                "checkpoint blob is zstd-compressed but the zstandard package is not installed "
+                "(pip install zstandard)"
+            ) from None
+    raise ValueError(f"checkpoint blob uses an unknown compression codec: {name!r}")
+
+
+# --- Serializer ---
+
+class CompactSerializer(JsonPlusSerializer):
+    """
+    JsonPlusSerializer (msgpack) with compression of large values.
+    A subclass rather than a wrapper, so LangGraph's strict-msgpack allowlist
+    (LANGGRAPH_STRICT_MSGPACK) still applies to it.
+    """
+
+    def __init__(self, compression: str = COMPRESSION, min_bytes: int = COMPRESS_MIN_BYTES, **kwargs):
+        super().__init__(**kwargs)
+        self.min_bytes = min_bytes
+        self.codec = _codec(compression)
+        # decoding never depends on the configured codec — any blob written earlier loads
+        self._decoders = {"zlib": _Zlib()}
+        if self.codec is not None:
+            self._decoders[self.codec.name] = self.codec
+
+    def dumps_typed(self, obj) -> tuple:
+        type_name, data = super().dumps_typed(obj)
+        if self.codec is None or len(data) < self.min_bytes:
+            return type_name, data
+
+        compressed = self.codec.compress(data)
+        if len(compressed) >= len(data):
+            return type_name, data
+        metrics.increment("checkpoint.serde.bytes_saved", len(data) - len(compressed))
+        return f"{type_name}+{self.codec.name}", compressed
+
+    def loads_typed(self, data: tuple):
+        type_name, payload = data
+        if "+" not in type_name:
+            return super().loads_typed(data)
+
+        type_name, codec_name = type_name.split("+", 1)
+        if codec_name not in self._decoders:
+            self._decoders[codec_name] = _decoder(codec_name)
+        return super().loads_typed((type_name, self._decoders[codec_name].decompress(payload)))
+
+
+def checkpoint_serializer(name: str = SERIALIZER) -> SerializerProtocol:
+    """The serializer the graph's checkpointer uses — see CHECKPOINT_SERIALIZER."""
+    if name == "jsonplus":
+        return JsonPlusSerializer()
+    return CompactSerializer()
@@ -0,0 +1,296 @@
+# session.py — UI-independent async API around the compiled graph
+# one CopilotSession = one thread_id = one application package
+# handles starting a run, resuming after HITL pauses and streaming events,
+# so Chainlit (app.py), the CLI (main.py) or any async web backend can drive
+# the pipeline without re-implementing the pause / resume plumbing
+#
+#   session = CopilotSession()
+#   result = await session.start(cv_file_path="cv.pdf", job_description=jd)
+#   while result.stage != "done":
+#       result = await session.submit_feedback("approve" if result.stage == "hitl_1" else "accept")
+#
+# many sessions can share one compiled graph — MemorySaver keys state by thread_id
+# every run (start → pause, feedback → next pause) gets its own latency budget;
+# a node that runs past its deadline raises DeadlineExceeded and the same call
+# can simply be repeated to retry from the last checkpoint
+# cancel() aborts a run in progress (user pressed stop / closed the tab) —
+# open model streams are closed and the wasted work is counted in graph.metrics
+# token budgets (graph/budget.py) are per session and, when a user_id is given, per user —
+# prompt estimates reserved by the nodes are settled with the real usage after every run
+
+import uuid                                        # default thread ids
+import asyncio                                     # cancelling a run in progress
+from dataclasses import dataclass, field          # typed results
+from typing import AsyncIterator, Optional
+from graph.graph import get_graph                 # shared compiled graph, built on first use
+from graph.nodes.cover_letter import NO_STREAM_TAG  # variant / patch tokens are not streamed
+from graph.deadlines import run_deadline          # per-run latency budget
+from graph import metrics                          # wasted work counters
+from graph.budget import ledger                    # session / user token budgets
+from langchain_core.callbacks import UsageMetadataCallbackHandler  # tokens used by a run
+
+
+# nodes whose tokens are streamed to the caller as they are generated
+STREAMED_NODES = ["write_cover_letter"]
+
+# how long cancel() waits for a cancelled run to unwind before discarding its thread
+CANCEL_GRACE_SECONDS = 5.0
+
+# HITL pause node → state key its feedback is written to
+FEEDBACK_KEYS = {
+    "hitl_1": "hitl_1_feedback",
+    "hitl_2": "hitl_2_feedback",
+}
+
+
+# --- Typed Results ---
+
+@dataclass
+class StageResult:
+    """Where the pipeline stopped and what it produced so far."""
+
+    # "hitl_1" (cover letter review), "hitl_2" (Q&A review) or "done"
+    stage: str
+
+    # current cover letter draft and its alternatives / validator report
+    cover_letter_draft: str = ""
+    cover_letter_variants: list = field(default_factory=list)
+    cover_letter_report: dict = field(default_factory=dict)
+
+    # interview Q&A generated so far
+    interview_qa: list = field(default_factory=list)
+
+    # assembled package — only set when stage == "done"
+    final_output: dict = field(default_factory=dict)
+
+    # True when this run refused optional work (more questions, letter variants)
+    # because the session or user token budget was spent
+    budget_exhausted: bool = False
+
+    # full state values, for anything not surfaced above
+    values: dict = field(default_factory=dict)
+
+
+@dataclass
+class SessionEvent:
+    """
+    One streamed event.
+    type "token"    — text is a chunk of the cover letter being written
+    type "node_end" — node finished running
+    type "result"   — last event of a run, result holds the StageResult
+    """
+
+    type: str
+    node: str = ""
+    text: str = ""
+    result: Optional[StageResult] = None
+
+
+# --- Session ---
+
+class CopilotSession:
+    """
+    One application package run, driven step by step.
+    start() runs until the first HITL pause, submit_feedback() answers the
+    current pause and runs until the next one (or the end).
+    stream_start() / stream_feedback() do the same but yield SessionEvents.
+    """
+
+    def __init__(self, graph=None, thread_id: str = "", latency_budget: float = None, user_id: str = ""):
+        self.graph = graph or get_graph()
+        self.thread_id = thread_id or str(uuid.uuid4())
+        self.user_id = user_id                 # "" = only the session budget applies
+        self.config = {"configurable": {"thread_id": self.thread_id, "user_id": user_id}}
+        self.latency_budget = latency_budget   # seconds per run — None = SESSION_LATENCY_BUDGET
+        self.stage = "new"                     # "new" → "hitl_1" / "hitl_2" → "done"
+        self._task = None                      # task driving the run in progress, if any
+
+    # --- streaming API ---
+
+    async def stream_start(
+        self,
+        job_description: str,
+        cv_file_path: str = "",
+        cv_raw_text: str = "",
+        jd_analysis: dict = None,
+    ) -> AsyncIterator[SessionEvent]:
+        """
+        Starts the pipeline and yields events until the first pause.
+        cv_raw_text / jd_analysis may be passed pre-computed (batch mode) —
+        the matching nodes then skip their work.
+        """
+
+        if self.stage != "new":
+            raise RuntimeError(f"session already started (stage: {self.stage})")
+
+        initial_state = {"job_description": job_description, "cv_file_path": cv_file_path}
+        if cv_raw_text:
+            initial_state["cv_raw_text"] = cv_raw_text
+        if jd_analysis:
+            initial_state["jd_analysis"] = jd_analysis
+
+        async for event in self._run(initial_state):
+            yield event
+
+    async def stream_feedback(self, feedback: str) -> AsyncIterator[SessionEvent]:
+        """Answers the current HITL pause with feedback and yields events until the next one."""
+
+        if self.stage not in FEEDBACK_KEYS:
+            raise RuntimeError(f"session is not waiting for feedback (stage: {self.stage})")
+
+        await self.graph.aupdate_state(self.config, {FEEDBACK_KEYS[self.stage]: feedback.strip()})
+
+        async for event in self._run(None):
+            yield event
+
+    # --- awaitable API ---
+
+    async def start(self, job_description: str, cv_file_path: str = "", cv_raw_text: str = "", jd_analysis: dict = None) -> StageResult:
+        """Starts the pipeline and returns once it pauses at HITL 1."""
+        return await self._drain(self.stream_start(job_description, cv_file_path, cv_raw_text, jd_analysis))
+
+    async def submit_feedback(self, feedback: str) -> StageResult:
+        """Answers the current pause and returns at the next pause or the end."""
+        return await self._drain(self.stream_feedback(feedback))
+
+    async def get_result(self) -> StageResult:
+        """Current StageResult without running anything."""
+        snapshot = await self.graph.aget_state(self.config)
+        return self._to_result(snapshot)
+
+    def memory_stats(self) -> dict:
+        """
+        Checkpoint memory held for this thread — checkpoints, bytes retained, latest
+        state size by channel, evicted / spilled counts (see graph/checkpointer.py).
+        Empty for checkpointers without accounting.
+        """
+        thread_stats = getattr(self.graph.checkpointer, "thread_stats", None)
+        return thread_stats(self.thread_id) if thread_stats is not None else {}
+
+    def token_usage(self) -> dict:
+        """
+        Estimated vs actual tokens for this session (see graph/budget.py) —
+        estimated_input / estimated_output, actual_input / actual_output, used,
+        budget, and how many calls were degraded, went over budget or were refused.
+        """
+        return ledger.session_usage(self.thread_id)
+
+    # --- cancellation ---
+
+    @property
+    def running(self) -> bool:
+        """True while a run is in progress."""
+        return self._task is not None and not self._task.done()
+
+    async def cancel(self, discard: bool = False) -> None:
+        """
+        Cancels the run in progress, if any — in-flight model requests and their
+        streams are aborted (including hedged duplicates and variant batches).
+        discard=True also deletes this thread's checkpoints: use it when the user
+        is gone for good. Without it the session can retry from the last checkpoint.
+        """
+
+        task = self._task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+            # let the run unwind (and count its waste) before its checkpoints are dropped
+            await asyncio.wait({task}, timeout=CANCEL_GRACE_SECONDS)
+
+        if discard:
+            await self.graph.checkpointer.adelete_thread(self.thread_id)
+            ledger.forget(self.thread_id)
+            metrics.increment("session.discarded_threads")
+
+    # --- internals ---
+
+    async def _run(self, graph_input) -> AsyncIterator[SessionEvent]:
+        # fresh deadline for this run — nodes derive their own deadlines from it
+        # the usage handler totals the tokens of every model call that completes in this run
+        usage = UsageMetadataCallbackHandler()
+        run_config = {
+            "configurable": {**self.config["configurable"], "deadline": run_deadline(self.latency_budget)},
+            "callbacks": [usage],
+        }
+
+        # bookkeeping for cancel() — what would be thrown away if the run stops now
+        running_nodes = set()           # nodes started but not finished
+        open_streams = {}               # model call run_id → chunks streamed so far
+
+        # optional work refused so far — compared after the run (graph/budget.py)
+        refused_before = ledger.session_usage(self.thread_id)["refused"]
+
+        self._task = asyncio.current_task()
+        try:
+            # one astream_events pass — None as input resumes from the last checkpoint
+            async for event in self.graph.astream_events(graph_input, config=run_config, version="v2"):
+                node_name = event.get("metadata", {}).get("langgraph_node", "")
+                is_node_event = node_name and event.get("name") == node_name
+
+                if event["event"] == "on_chat_model_stream":
+                    open_streams[event["run_id"]] = open_streams.get(event["run_id"], 0) + 1
+                    if node_name not in STREAMED_NODES:
+                        continue
+                    # variants would interleave and a patch is JSON — callers get both in the result
+                    if NO_STREAM_TAG in event.get("tags", []):
+                        continue
+                    token = event["data"]["chunk"].content
+                    if token:
+                        yield SessionEvent(type="token", node=node_name, text=token)
+
+                elif event["event"] == "on_chat_model_end":
+                    open_streams.pop(event["run_id"], None)
+
+                elif event["event"] == "on_chain_start" and is_node_event:
+                    running_nodes.add(node_name)
+
+                elif event["event"] == "on_chain_end" and is_node_event:
+                    running_nodes.discard(node_name)
+                    yield SessionEvent(type="node_end", node=node_name)
+
+        except asyncio.CancelledError:
+            # nothing this run produced will reach the user — count it as waste:
+            # tokens of finished calls + chunks of streams that were cut off (≈ 1 token each)
+            completed_tokens = sum(u.get("total_tokens", 0) for u in usage.usage_metadata.values())
+            metrics.increment("session.cancelled_runs")
+            metrics.increment("session.wasted_tokens", completed_tokens + sum(open_streams.values()))
+            metrics.increment("session.aborted_streams", len(open_streams))
+            metrics.increment("session.wasted_node_slots", len(running_nodes))
+            raise
+
+        finally:
+            self._task = None
+            # swap this run's reservations for what the provider actually counted
+            ledger.settle(
+                self.thread_id, self.user_id,
+                sum(u.get("input_tokens", 0) for u in usage.usage_metadata.values()),
+                sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values()),
+            )
+
+        result = await self.get_result()
+        result.budget_exhausted = ledger.session_usage(self.thread_id)["refused"] > refused_before
+        self.stage = result.stage
+        yield SessionEvent(type="result", result=result)
+
+    async def _drain(self, events: AsyncIterator[SessionEvent]) -> StageResult:
+        # consume a stream and keep only the final result
+        result = None
+        async for event in events:
+            if event.type == "result":
+                result = event.result
+        return result
+
+    def _to_result(self, snapshot) -> StageResult:
+        values = snapshot.values or {}
+
+        # next node tells us where the graph paused — empty means it reached END
+        stage = snapshot.next[0] if snapshot.next else "done"
+
+        return StageResult(
+            stage=stage,
+            cover_letter_draft=values.get("cover_letter_draft", ""),
+            cover_letter_variants=values.get("cover_letter_variants", []) or [],
+            cover_letter_report=values.get("cover_letter_report", {}) or {},
+            interview_qa=values.get("interview_qa", []) or [],
+            final_output=values.get("final_output", {}) or {},
+            values=dict(values),
+        )
@@ -0,0 +1,82 @@
+# singleflight.py — share one in-flight LLM request between identical callers
+# when many users paste the same trending posting at once, every session fires
+# the same temperature 0 analyze_jd call (and, for the same CV, the same gap
+# advice call) — the first caller becomes the leader and sends the request,
+# everyone else with the same canonical key awaits the leader's future
+#
+# only deterministic (temperature 0) calls may be shared — anything with
+# sampling would hand several users the same "random" answer
+
+import json                            # canonical request encoding
+import asyncio                         # shared futures
+import hashlib                         # request key
+from graph import metrics              # leader / shared counters
+
+
+# (event loop id, request key) → _Flight
+# keyed by loop too — a future can only be awaited on the loop that created it
+_in_flight = {}
+
+
+class _Flight:
+    """One shared request and how many callers are still waiting for it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+def request_key(model: str, temperature: float, messages: list, schema=None) -> str:
+    """
+    Canonical hash of everything that determines the response:
+    model, temperature, message types + contents and the output schema.
+    """
+
+    payload = {
+        "model": model,
+        "temperature": temperature,
+        "messages": [[message.type, message.content] for message in messages],
+        "schema": schema.model_json_schema() if schema is not None else None,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+async def single_flight(key: str, call, node: str = ""):
+    """
+    Awaits `call()` — or, if an identical request is already in flight, its result.
+    Each caller may be cancelled (deadline, user left) without affecting the others;
+    the shared request itself is only cancelled once nobody is waiting for it.
+    """
+
+    flight_key = (id(asyncio.get_running_loop()), key)
+    flight = _in_flight.get(flight_key)
+
+    if flight is None:
+        flight = _Flight(asyncio.ensure_future(call()))
+        _in_flight[flight_key] = flight
+
+        # forget the request as soon as it settles — later callers send a fresh one
+        def forget(_task, flight_key=flight_key, flight=flight):
+            if _in_flight.get(flight_key) is flight:
+                del _in_flight[flight_key]
+
+        flight.task.add_done_callback(forget)
+        metrics.increment(f"singleflight.{node}.leaders")
+    else:
+        metrics.increment(f"singleflight.{node}.shared")
+
+    flight.waiters += 1
+    try:
+        # shield — one caller's cancellation must not cancel everyone's request
+        return await asyncio.shield(flight.task)
+    finally:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            flight.task.cancel()
+            metrics.increment(f"singleflight.{node}.abandoned")
+
+
+def in_flight_count() -> int:
+    """Number of distinct requests currently shared."""
+    return len(_in_flight)
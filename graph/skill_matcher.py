@@ -0,0 +1,344 @@
+# skill_matcher.py — deterministic CV vs JD skill matching, no LLM needed
+# normalizes skill names through an alias table, indexes the CV as tokens + n-grams,
+# and scores every required skill / keyword at once with NumPy
+# used by the QA agent so the LLM only writes advice for missing or weak skills
+
+import re                          # tokenizing
+import numpy as np                 # vectorized coverage scoring
+
+
+# --- Alias Table ---
+# different spellings of the same skill collapse to one canonical form
+# applied to normalized text (lowercase, punctuation already mapped below)
+
+SKILL_ALIASES = {
+    "k8s": "kubernetes",
+    "golang": "go",
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "reactjs": "react",
+    "react js": "react",
+    "vuejs": "vue",
+    "vue js": "vue",
+    "node": "nodejs",
+    "node js": "nodejs",
+    "amazon web services": "aws",
+    "google cloud platform": "gcp",
+    "google cloud": "gcp",
+    "microsoft azure": "azure",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "llms": "llm",
+    "large language models": "llm",
+    "large language model": "llm",
+    "cicd": "ci cd",
+    "continuous integration": "ci cd",
+    "continuous delivery": "ci cd",
+    "continuous deployment": "ci cd",
+    "restful": "rest",
+    "rest apis": "rest api",
+    "sklearn": "scikit learn",
+    "tf": "tensorflow",
+    "gh actions": "github actions",
+    "oop": "object oriented programming",
+    "tdd": "test driven development",
+    "ux": "user experience",
+    "ui": "user interface",
+}
+
+# skills whose canonical token is also an everyday word or letter — "I like to go
+# hiking", "R&D", "plan C" — a CV mention only counts next to programming context
+AMBIGUOUS_SKILLS = {"go", "r", "c"}
+
+# spellings that name an ambiguous skill outright, checked on the raw CV text
+# ("golang" is aliased to "go" before the context check could see it)
+EXPLICIT_SPELLINGS = {
+    "go": re.compile(r"\bgolang\b", re.IGNORECASE),
+}
+
+# words that put a nearby ambiguous token in a programming context (normalized form)
+CODE_CONTEXT_WORDS = [
+    "programming", "language", "code", "coding", "developer", "development", "engineer",
+    "software", "backend", "compiler", "library", "framework", "scripting", "microservice",
+    "concurrency", "goroutine", "embedded", "firmware", "kernel", "api", "grpc",
+    "statistic", "statistical", "ggplot2", "tidyverse", "cran", "rstudio",
+    "python", "java", "javascript", "typescript", "rust", "cpp", "csharp", "fsharp", "dotnet",
+    "kotlin", "scala", "ruby", "php", "swift", "sql", "bash", "shell", "matlab", "julia",
+    "perl", "haskell", "kubernetes", "docker", "linux", "git", "aws", "gcp", "azure",
+    "postgresql", "mongodb", "nodejs", "react", "pandas", "numpy", "tensorflow",
+]
+
+# how many tokens either side of an ambiguous token are searched for context
+CODE_CONTEXT_WINDOW = 3
+
+# symbols that would be lost when stripping punctuation — mapped to words first
+SYMBOL_REPLACEMENTS = [
+    (re.compile(r"c\+\+"), " cpp "),
+    (re.compile(r"c#"), " csharp "),
+    (re.compile(r"f#"), " fsharp "),
+    (re.compile(r"\.net\b"), " dotnet "),
+    (re.compile(r"\bci\s*/\s*cd\b"), " ci cd "),
+    (re.compile(r"\bnode\.js\b"), " nodejs "),
+    (re.compile(r"(\w)\.js\b"), r"\1js "),
+]
+
+# filler words that appear in skill phrases but say nothing about the skill itself
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "on", "with", "for", "to", "or", "using",
+    "experience", "experienced", "knowledge", "strong", "solid", "proven", "good",
+    "excellent", "skills", "skill", "years", "year", "proficiency", "proficient",
+    "understanding", "familiarity", "familiar", "ability", "hands", "working",
+    "etc", "tools", "plus", "including", "deep", "demonstrated",
+}
+
+# pre-compiled alias patterns — longest first so "google cloud platform" wins over "google cloud"
+_ALIAS_PATTERNS = [
+    (re.compile(rf"\b{re.escape(alias)}\b"), canonical)
+    for alias, canonical in sorted(SKILL_ALIASES.items(), key=lambda item: -len(item[0]))
+]
+
+# longest phrase we index / match as a contiguous n-gram
+MAX_NGRAM = 3
+
+# coverage for a skill whose words all appear in the CV, but not next to each other
+SCATTERED_MATCH_WEIGHT = 0.8
+
+# coverage thresholds for the status labels
+COVERED_THRESHOLD = 0.75
+WEAK_THRESHOLD = 0.4
+
+# how much required skills vs keywords count towards the overall match score
+REQUIRED_SKILL_WEIGHT = 0.8
+KEYWORD_WEIGHT = 0.2
+
+# coverage given to a JD that lists no required skills — nothing to score against,
+# so the match score sits in the middle of the scale (5/10) instead of at 1
+NEUTRAL_COVERAGE = 4 / 9
+
+
+# --- Normalization ---
+
+def _stem(token: str) -> str:
+    # very light plural stripping — "apis" → "api", "services" → "service"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def normalize_tokens(text: str) -> list:
+    """
+    Turns free text into canonical tokens:
+    lowercase, symbols mapped (c++ → cpp), aliases applied (k8s → kubernetes),
+    punctuation dropped, stopwords removed, plurals stripped.
+    """
+
+    text = text.lower()
+    for pattern, replacement in SYMBOL_REPLACEMENTS:
+        text = pattern.sub(replacement, text)
+
+    # keep only word characters, then apply aliases on the space separated form
+    text = " ".join(re.findall(r"[a-z0-9]+", text))
+    for pattern, canonical in _ALIAS_PATTERNS:
+        text = pattern.sub(canonical, text)
+
+    return [_stem(token) for token in text.split() if token not in STOPWORDS]
+
+
+def normalize_skill(skill: str) -> str:
+    """Canonical form of a skill phrase — used as the match key."""
+    tokens = normalize_tokens(skill)
+    return " ".join(tokens) if tokens else skill.strip().lower()
+
+
+# context words in the same normalized form as CV tokens ("kubernetes" → "kubernete")
+_CODE_CONTEXT = {_stem(word) for word in CODE_CONTEXT_WORDS}
+
+
+def _in_code_context(tokens: list, position: int) -> bool:
+    # any programming context word within CODE_CONTEXT_WINDOW tokens of tokens[position]
+    window = tokens[max(0, position - CODE_CONTEXT_WINDOW):position] + tokens[position + 1:position + 1 + CODE_CONTEXT_WINDOW]
+    return any(token in _CODE_CONTEXT for token in window)
+
+
+# --- Matcher ---
+
+class SkillMatcher:
+    """
+    Index over one CV — build once, then match any number of skill lists against it.
+    Holds a token set and an n-gram set (2..MAX_NGRAM) of the normalized CV text.
+    """
+
+    def __init__(self, cv_text: str):
+        tokens = normalize_tokens(cv_text or "")
+
+        # unigram index — an ambiguous skill token ("go", "r", "c") only goes in when
+        # the CV spells it out ("golang") or uses it next to programming context
+        self.tokens = {token for token in tokens if token not in AMBIGUOUS_SKILLS}
+        for token in AMBIGUOUS_SKILLS:
+            explicit = EXPLICIT_SPELLINGS.get(token)
+            if explicit is not None and explicit.search(cv_text or ""):
+                self.tokens.add(token)
+            elif any(value == token and _in_code_context(tokens, i) for i, value in enumerate(tokens)):
+                self.tokens.add(token)
+
+        # contiguous n-gram index — lets "machine learning" beat "machine ... learning"
+        self.ngrams = set()
+        for n in range(2, MAX_NGRAM + 1):
+            for i in range(len(tokens) - n + 1):
+                self.ngrams.add(" ".join(tokens[i:i + n]))
+
+    def coverage(self, skills: list) -> np.ndarray:
+        """
+        Coverage of each skill in the CV, between 0 and 1, as one NumPy array.
+        1.0 = exact phrase found, SCATTERED_MATCH_WEIGHT = all words found apart,
+        otherwise the fraction of the skill's words that appear.
+        """
+
+        if not skills:
+            return np.zeros(0)
+
+        skill_tokens = [normalize_skill(skill).split() for skill in skills]
+
+        # vocabulary of every token used by any skill
+        vocabulary = {}
+        for tokens in skill_tokens:
+            for token in tokens:
+                vocabulary.setdefault(token, len(vocabulary))
+
+        # skill × vocabulary membership matrix and CV presence vector
+        membership = np.zeros((len(skills), len(vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(skill_tokens):
+            membership[row, [vocabulary[token] for token in tokens]] = 1.0
+        present = np.array([token in self.tokens for token in vocabulary], dtype=np.float32)
+
+        # fraction of each skill's tokens present in the CV
+        token_counts = np.maximum(membership.sum(axis=1), 1.0)
+        token_coverage = (membership @ present) / token_counts
+
+        # exact phrase hits from the unigram / n-gram indexes
+        phrase_hit = np.array([
+            (" ".join(tokens) in self.ngrams) if len(tokens) > 1 else (bool(tokens) and tokens[0] in self.tokens)
+            for tokens in skill_tokens
+        ])
+
+        # all words present but never side by side — likely related, not proven
+        scattered = np.where(token_coverage >= 1.0, SCATTERED_MATCH_WEIGHT, token_coverage)
+
+        return np.where(phrase_hit, 1.0, scattered)
+
+    def match(self, required_skills: list, keywords: list = None) -> dict:
+        """
+        Scores required skills and keywords against the CV.
+        Returns per-skill coverage + status (covered / weak / missing),
+        the missing and weak skill names, and a match score out of 10.
+        """
+
+        keywords = keywords or []
+        required_coverage = self.coverage(required_skills)
+        keyword_coverage = self.coverage(keywords)
+
+        # weighted overall coverage — keywords only count if the JD has any,
+        # and a JD without required skills gets the neutral coverage
+        if len(required_coverage):
+            parts, weights = [required_coverage.mean()], [REQUIRED_SKILL_WEIGHT]
+            if len(keyword_coverage):
+                parts.append(keyword_coverage.mean())
+                weights.append(KEYWORD_WEIGHT)
+            overall = float(np.average(parts, weights=weights))
+        else:
+            overall = NEUTRAL_COVERAGE
+
+        skills = [
+            {"skill": skill, "coverage": round(float(value), 2), "status": _status(value)}
+            for skill, value in zip(required_skills, required_coverage)
+        ]
+
+        return {
+            "match_score": int(round(1 + 9 * overall)),      # 1 = no overlap, 10 = everything covered
+            "coverage": round(overall, 3),
+            "skills": skills,
+            "missing": [item["skill"] for item in skills if item["status"] == "missing"],
+            "weak": [item["skill"] for item in skills if item["status"] == "weak"],
+            "covered": [item["skill"] for item in skills if item["status"] == "covered"],
+            "missing_keywords": [
+                keyword for keyword, value in zip(keywords, keyword_coverage)
+                if _status(value) == "missing"
+            ],
+        }
+
+    def score_many(self, analyses: list) -> list:
+        """
+        Scores this CV against many JD analyses at once — used for batch ranking.
+        Every skill and keyword of every JD goes through a single coverage() call,
+        then per-JD weighted means are taken with np.bincount.
+        Returns one {"coverage", "missing", "weak"} per analysis, with the same
+        weighting and status thresholds as match().
+        """
+
+        if not analyses:
+            return []
+
+        # flatten (jd index, phrase) pairs for required skills and keywords separately
+        skill_owner, skills, keyword_owner, keywords = [], [], [], []
+        for index, analysis in enumerate(analyses):
+            for skill in analysis.get("required_skills", []):
+                skill_owner.append(index)
+                skills.append(skill)
+            for keyword in analysis.get("keywords", []):
+                keyword_owner.append(index)
+                keywords.append(keyword)
+
+        count = len(analyses)
+        skill_coverage = self.coverage(skills)
+
+        def segment_mean(owners, values):
+            # mean coverage per JD plus a mask of JDs that had any phrases at all
+            if not len(values):
+                return np.zeros(count), np.zeros(count, dtype=bool)
+            owners = np.array(owners)
+            totals = np.bincount(owners, weights=values, minlength=count)
+            sizes = np.bincount(owners, minlength=count)
+            return totals / np.maximum(sizes, 1), sizes > 0
+
+        skill_mean, has_skills = segment_mean(skill_owner, skill_coverage)
+        keyword_mean, has_keywords = segment_mean(keyword_owner, self.coverage(keywords))
+
+        # same weighting as match(), applied row-wise — neutral for JDs without required skills
+        skill_weight = np.where(has_skills, REQUIRED_SKILL_WEIGHT, 0.0)
+        keyword_weight = np.where(has_keywords, KEYWORD_WEIGHT, 0.0)
+        total_weight = skill_weight + keyword_weight
+
+        overall = np.where(
+            has_skills,
+            (skill_mean * skill_weight + keyword_mean * keyword_weight) / np.maximum(total_weight, 1e-9),
+            NEUTRAL_COVERAGE
+        )
+
+        # missing / weak skills per JD from the same coverage values — no second pass
+        results = [{"coverage": float(value), "missing": [], "weak": []} for value in overall]
+        for owner, skill, value in zip(skill_owner, skills, skill_coverage):
+            status = _status(value)
+            if status != "covered":
+                results[owner][status].append(skill)
+        return results
+
+
+def _status(value: float) -> str:
+    # maps a coverage value to its label
+    if value >= COVERED_THRESHOLD:
+        return "covered"
+    if value >= WEAK_THRESHOLD:
+        return "weak"
+    return "missing"
+
+
+def match_skills(cv_text: str, required_skills: list, keywords: list = None) -> dict:
+    """Convenience wrapper — one-off match of a skill list against a CV."""
+    return SkillMatcher(cv_text).match(required_skills, keywords)
@@ -2,10 +2,18 @@
 
 # TypedDict lets us define a dictionary with fixed keys and types
 from typing import TypedDict, Annotated
-import operator
 
-# BaseMessage is the base class for all LangChain message types
-from langchain_core.messages import BaseMessage
+# DeltaChannel checkpoints only the writes to a channel, not its whole value (beta in LangGraph)
+from langgraph.channels.delta import DeltaChannel
+
+
+def append_items(items: list, writes: list) -> list:
+    """
+    Reducer for append-only list channels — every write is a list of new items.
+    Appending two batches one after the other gives the same list as appending
+    them at once, which is what DeltaChannel needs to replay writes.
+    """
+    return items + [item for write in writes for item in write]
 
 
 # AppState is the single source of truth for our entire pipeline
@@ -25,6 +33,14 @@ class AppState(TypedDict):
     # Cover letter draft — written by Cover Letter Agent
     cover_letter_draft: str
 
+    # Alternative cover letters when several variants are generated at once
+    # Each item: {"angle": "...", "content": "..."} — first item mirrors cover_letter_draft
+    cover_letter_variants: list
+
+    # Validator report for the current draft — set by letter_validator node
+    # Contains: violations, fixed, unfixable, word_count, retry, retries
+    cover_letter_report: dict
+
     # Cover letter after user reviews and approves at HITL 1
     cover_letter_final: str
 
@@ -33,7 +49,9 @@ class AppState(TypedDict):
 
     # Interview Q&A list — generated by Interview Prep Agent
     # Each item: {"question": "...", "suggested_answer": "..."}
-    interview_qa: list
+    # Append-only: nodes return only the NEW questions, and checkpoints store
+    # only those writes — a "more questions" round no longer re-saves the list
+    interview_qa: Annotated[list, DeltaChannel(append_items)]
 
     # User feedback at HITL 2 — request more, change focus, or accept
     hitl_2_feedback: str
@@ -47,7 +65,3 @@ class AppState(TypedDict):
 
     # final assembled output package — set by assembler node
     final_output: dict
-
-    # Conversation message history — Annotated with operator.add
-    # so each agent APPENDS to the list rather than overwriting it
-    messages: Annotated[list[BaseMessage], operator.add]
\ No newline at end of file
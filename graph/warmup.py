@@ -0,0 +1,185 @@
+# warmup.py — warm a fresh worker before it takes traffic
+# the first session on a new process used to pay for everything at once:
+# importing langchain_openai / openai, building the HTTP client and its SSL context,
+# DNS + TLS to the API, converting the structured-output schemas, loading PyMuPDF,
+# the token encoding and compiling the graph — warm_up() does all of that ahead of time
+#
+#   await warm_up()        # Chainlit: on_app_startup (in the background), CLI: before the batch
+#   is_ready()             # readiness signal — True once the local steps have succeeded
+#   readiness()            # per-step status, served by app.py at GET /ready
+#
+# the network step is best-effort: a provider hiccup during startup should not
+# keep a worker out of the load balancer, so it never blocks readiness
+# (idle pooled connections expire after a few seconds, so it mostly saves the
+# client / SSL context setup and the first DNS lookup)
+#
+# env:
+#   WARMUP=false               skip warm-up, report ready immediately
+#   WARMUP_NETWORK=false       skip the API connection priming
+
+import os                              # env switches
+import time                            # step timings
+import asyncio                         # worker threads + network timeout
+import threading                       # readiness flag is read from any thread
+from graph import metrics              # warm-up timings
+
+
+WARMUP_ENABLED = os.getenv("WARMUP", "true").lower() != "false"
+WARMUP_NETWORK = os.getenv("WARMUP_NETWORK", "true").lower() != "false"
+
+# seconds the connection priming may take per HTTP client
+NETWORK_TIMEOUT_SECONDS = 10.0
+
+# steps that may fail without holding back readiness
+OPTIONAL_STEPS = {"network"}
+
+_ready = threading.Event()
+_status = {"seconds": None, "steps": {}}
+
+
+# --- Steps ---
+
+def _structured_schemas() -> list:
+    """(node, schema) for every structured-output call the pipeline makes."""
+
+    from graph.nodes.jd_analyzer import JDAnalysis, FusedAnalysis
+    from graph.nodes.qa_agent import GapAdvice
+    from graph.nodes.interview_prep import InterviewQAList, PersonalizedAnswers
+    from graph.nodes.cover_letter import CoverLetterPatch
+
+    return [
+        ("analyze_jd", JDAnalysis),
+        ("analyze_jd", FusedAnalysis),
+        ("run_qa_check", GapAdvice),
+        ("prepare_interview", InterviewQAList),
+        ("prepare_interview", PersonalizedAnswers),
+        ("write_cover_letter", CoverLetterPatch),
+    ]
+
+
+def _warm_graph() -> None:
+    # compiles the shared graph — imports every node module on the way
+    from graph.graph import get_graph
+    get_graph()
+
+
+def _warm_schemas() -> None:
+    # builds each node's chat model(s) and binds every output schema once, so the
+    # pydantic → JSON schema conversion paths and the HTTP clients exist up front
+    from graph.router import get_llm, route_for
+
+    for node, schema in _structured_schemas():
+        route = route_for(node)
+        for model in filter(None, {route["model"], route["fallback"]}):
+            get_llm(node, 0, model).with_structured_output(schema, include_raw=True)
+            schema.model_json_schema()
+
+
+def _warm_parsers() -> None:
+    # first PyMuPDF load is slow (native library + font tables) — open and read a tiny PDF
+    import fitz
+    import docx  # noqa: F401 — import cost only
+
+    document = fitz.open()
+    document.new_page().insert_text((72, 72), "warm-up")
+    pdf_bytes = document.tobytes()
+    document.close()
+
+    # through the same preflight path uploads take
+    from graph.preflight import extract_text
+    extract_text(pdf_bytes)
+
+
+def _warm_tokenizer() -> None:
+    # loads the tiktoken encoding (or settles on the fallback) before the first prompt estimate
+    from graph.budget import count_tokens
+    count_tokens("warm-up")
+
+
+def _warm_question_bank() -> None:
+    from graph.question_bank import question_bank
+    len(question_bank)           # loads the bank file
+
+
+async def _warm_network() -> None:
+    # one cheap authenticated GET per distinct HTTP client (clients are shared per timeout)
+    if not os.getenv("OPENAI_API_KEY"):
+        raise RuntimeError("OPENAI_API_KEY is not set")
+
+    from graph.router import get_llm, route_for
+    from graph.deadlines import NODE_BUDGETS, node_budget
+
+    # langchain_openai keeps one pooled client per timeout, and the timeout is the node budget
+    clients = {}
+    for node in NODE_BUDGETS:
+        clients.setdefault(node_budget(node), (get_llm(node), route_for(node)["model"]))
+
+    await asyncio.wait_for(
+        asyncio.gather(*[llm.root_async_client.models.retrieve(model) for llm, model in clients.values()]),
+        NETWORK_TIMEOUT_SECONDS,
+    )
+
+
+async def _run_step(name: str, step) -> None:
+    started = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(step):
+            await step()
+        else:
+            # CPU / import heavy — off the event loop so health checks keep answering
+            await asyncio.to_thread(step)
+        outcome = {"ok": True}
+    except Exception as error:
+        outcome = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+        metrics.increment(f"warmup.{name}.failed")
+
+    outcome["seconds"] = round(time.perf_counter() - started, 3)
+    metrics.observe(f"warmup.{name}.seconds", outcome["seconds"])
+    _status["steps"][name] = outcome
+
+
+# --- Public API ---
+
+async def warm_up(network: bool = None) -> dict:
+    """
+    Runs every warm-up step and flips the readiness flag when the required ones succeed.
+    Safe to call again — once ready, later calls just return the recorded status.
+    Returns readiness().
+    """
+
+    if _ready.is_set():
+        return readiness()
+
+    started = time.perf_counter()
+    if WARMUP_ENABLED:
+        steps = [
+            ("graph", _warm_graph),
+            ("schemas", _warm_schemas),
+            ("parsers", _warm_parsers),
+            ("tokenizer", _warm_tokenizer),
+            ("question_bank", _warm_question_bank),
+        ]
+        if WARMUP_NETWORK if network is None else network:
+            steps.append(("network", _warm_network))
+
+        for name, step in steps:
+            await _run_step(name, step)
+
+    _status["seconds"] = round(time.perf_counter() - started, 3)
+    if all(outcome["ok"] for name, outcome in _status["steps"].items() if name not in OPTIONAL_STEPS):
+        _ready.set()
+    return readiness()
+
+
+def is_ready() -> bool:
+    """True once warm-up has finished and every required step succeeded."""
+    return _ready.is_set()
+
+
+def readiness() -> dict:
+    """Readiness flag, total warm-up seconds and per-step status."""
+    return {
+        "ready": _ready.is_set(),
+        "seconds": _status["seconds"],
+        "steps": {name: dict(outcome) for name, outcome in _status["steps"].items()},
+    }
@@ -1,336 +1,269 @@
-# # app.py — Chainlit entry point
-# # handles user interaction, runs LangGraph pipeline, manages HITL points
-# import os
-# import uuid
-# import chainlit as cl
-# from dotenv import load_dotenv
-# from graph.graph import graph
-
-# load_dotenv()
-
-# # --- Chat Start ---
-# # runs once when user opens the app in browser
-
-# @cl.on_chat_start
-# async def on_chat_start():
-
-#     # generate unique thread_id for this user session
-#     # MemorySaver uses this to store and retrieve state across HITL pauses
-#     thread_id = str(uuid.uuid4())
-
-#     # store thread_id in Chainlit user session
-#     # cl.user_session persists data across messages in same chat
-#     cl.user_session.set("thread_id", thread_id)
-
-#     # store pipeline stage tracker
-#     # stages: "awaiting_input" → "running" → "hitl_1" → "hitl_2" → "done"
-#     cl.user_session.set("stage", "awaiting_input")
-
-#     # welcome message with instructions
-#     await cl.Message(content="""
-# 👋 **Welcome to Job Application Copilot**
-
-# I'll help you prepare a complete job application package.
-
-# **To get started, please provide:**
-# 1. 📄 Upload your **CV** (PDF or DOCX) using the attachment button
-# 2. 📋 Paste the **Job Description** text in your message
-
-# Send both together and I'll get to work!
-#     """).send()
-
-# # --- Main Message Handler ---
-# # runs every time user sends a message
-
-# @cl.on_message
-# async def on_message(message: cl.Message):
-
-#     # get current stage and thread_id from session
-#     stage = cl.user_session.get("stage")
-#     thread_id = cl.user_session.get("thread_id")
-
-#     # LangGraph config — thread_id links this run to saved state in MemorySaver
-#     config = {"configurable": {"thread_id": thread_id}}
-
-#     # ================================================================
-#     # STAGE 1 — awaiting_input
-#     # user sends CV file + JD text to kick off the pipeline
-#     # ================================================================
-#     if stage == "awaiting_input":
-#         await handle_initial_input(message, config)
-
-#     # ================================================================
-#     # STAGE 2 — hitl_1
-#     # user reviews cover letter draft and sends approval or feedback
-#     # ================================================================
-#     elif stage == "hitl_1":
-#         await handle_hitl_1(message, config)
-
-#     # ================================================================
-#     # STAGE 3 — hitl_2
-#     # user reviews Q&A and sends acceptance or requests more questions
-#     # ================================================================
-#     elif stage == "hitl_2":
-#         await handle_hitl_2(message, config)
-
-#     # ================================================================
-#     # STAGE 4 — done
-#     # pipeline finished, inform user
-#     # ================================================================
-#     elif stage == "done":
-#         await cl.Message(content="✅ Your application package is complete! Start a new chat to prepare for another role.").send()
-
-# # --- Handler: Initial Input ---
-# # processes CV file upload + JD text, starts the graph
-
-# async def handle_initial_input(message: cl.Message, config: dict):
-
-#     # check if user attached a file
-#     if not message.elements:
-#         await cl.Message(content="⚠️ Please attach your CV file (PDF or DOCX) along with the job description.").send()
-#         return
-
-#     # check if user provided JD text
-#     if not message.content.strip():
-#         await cl.Message(content="⚠️ Please paste the job description text in your message.").send()
-#         return
-
-#     # get the uploaded file from message elements
-#     uploaded_file = message.elements[0]
-
-#     # check file extension is PDF or DOCX only
-#     allowed_extensions = [".pdf", ".docx"]
-#     file_extension = os.path.splitext(uploaded_file.name)[1].lower()
-
-#     if file_extension not in allowed_extensions:
-#         await cl.Message(content=f"⚠️ Unsupported file type **{file_extension}**. Please upload a PDF or DOCX file only.").send()
-#         return
-
-#     # get file path directly from Chainlit's temp storage
-#     cv_file_path = uploaded_file.path
-    
-#     # notify user pipeline is starting
-#     await cl.Message(content="🚀 Got it! Starting your application pipeline...\n\n⏳ Parsing CV and analyzing job description...").send()
-
-#     # build initial state to feed into graph
-#     initial_state = {
-#         "job_description": message.content.strip(),   # JD text from message
-#         "cv_file_path": cv_file_path,                 # path to saved CV file
-#         "messages": []                                # empty message history
-#     }
-
-#     # run graph — it will run until it hits interrupt_before hitl_1
-#     await cl.Message(content="✍️ Writing your cover letter...").send()
-
-#     # stream graph execution — async_stream yields events as nodes run
-#     async for event in graph.astream(initial_state, config=config):
-#         # each event is a dict of {node_name: output_dict}
-#         # we just let nodes run silently until graph pauses at hitl_1
-#         pass
-
-#     # graph has paused at hitl_1 — get current state to read cover letter draft
-#     current_state = graph.get_state(config)
-#     cover_letter_draft = current_state.values.get("cover_letter_draft", "")
-
-#     # display cover letter draft to user
-#     await cl.Message(content=f"""
-# ✅ **Cover Letter Draft Ready!**
-
-# ---
-
-# {cover_letter_draft}
-
-# ---
-
-# **What would you like to do?**
-# - Type **`approve`** to accept this cover letter and continue
-# - Type your **feedback/changes** and I'll rewrite it
-#     """).send()
-
-#     # update stage to hitl_1 — next message will be handled by hitl_1 handler
-#     cl.user_session.set("stage", "hitl_1")
-
-# # --- Handler: HITL 1 ---
-# # user reviews cover letter, approves or requests changes
-
-# async def handle_hitl_1(message: cl.Message, config: dict):
-
-#     # get user feedback from message
-#     user_feedback = message.content.strip()
-
-#     # update state with user feedback by resuming graph with new state values
-#     graph.update_state(
-#         config,
-#         {"hitl_1_feedback": user_feedback}     # inject feedback into state
-#     )
-
-#     # check if user approved or wants changes
-#     if user_feedback.lower() == "approve":
-#         await cl.Message(content="✅ Cover letter approved! Generating interview questions...").send()
-#     else:
-#         await cl.Message(content=f"✏️ Got it! Rewriting cover letter with your feedback...").send()
-
-#     # resume graph from hitl_1 — runs until next interrupt (hitl_2)
-#     async for event in graph.astream(None, config=config):
-#         pass
-
-#     # graph paused at hitl_2 — get current state to read Q&A
-#     current_state = graph.get_state(config)
-#     interview_qa = current_state.values.get("interview_qa", [])
-
-#     # if cover letter was regenerated, show new version first
-#     if user_feedback.lower() != "approve":
-#         new_draft = current_state.values.get("cover_letter_draft", "")
-
-#         await cl.Message(content=f"""
-# ✅ **Cover Letter Rewritten!**
-
-# ---
-
-# {new_draft}
-
-# ---
-
-# Type **`approve`** to accept or provide more feedback.
-#         """).send()
-
-#         # stay in hitl_1 stage for another review round
-#         return
-
-#     # format and display Q&A list
-#     qa_display = "✅ **Interview Questions Ready!**\n\n"
-#     for i, qa in enumerate(interview_qa, 1):
-#         qa_display += f"""
-# **Q{i} [{qa.get('category', '').upper()}]**
-# {qa.get('question', '')}
-
-# 💡 *Suggested Answer:*
-# {qa.get('suggested_answer', '')}
-
-# ---
-# """
-
-#     await cl.Message(content=qa_display).send()
-
-#     # prompt user for HITL 2 action
-#     await cl.Message(content="""
-# **What would you like to do?**
-# - Type **`accept`** to proceed to the gap report and final output
-# - Type a request for **more questions** (e.g. "give me 5 more on system design")
-#     """).send()
-
-#     # update stage to hitl_2
-#     cl.user_session.set("stage", "hitl_2")
-
-# # --- Handler: HITL 2 ---
-# # user reviews Q&A, accepts or requests more questions
-
-# async def handle_hitl_2(message: cl.Message, config: dict):
-
-#     # get user feedback from message
-#     user_feedback = message.content.strip()
-
-#     # inject hitl_2_feedback into state
-#     graph.update_state(
-#         config,
-#         {"hitl_2_feedback": user_feedback}
-#     )
-
-#     if user_feedback.lower() == "accept":
-#         await cl.Message(content="✅ Interview questions accepted! Running gap analysis and assembling your package...").send()
-#     else:
-#         await cl.Message(content=f"➕ Generating more questions based on: *{user_feedback}*...").send()
-
-#     # resume graph from hitl_2 — runs until END
-#     async for event in graph.astream(None, config=config):
-#         pass
-
-#     # get final state
-#     current_state = graph.get_state(config)
-
-#     # if user requested more questions — show updated Q&A and stay in hitl_2
-#     if user_feedback.lower() != "accept":
-#         interview_qa = current_state.values.get("interview_qa", [])
-
-#         qa_display = "➕ **Updated Interview Questions:**\n\n"
-#         for i, qa in enumerate(interview_qa, 1):
-#             qa_display += f"""
-# **Q{i} [{qa.get('category', '').upper()}]**
-# {qa.get('question', '')}
-
-# 💡 *Suggested Answer:*
-# {qa.get('suggested_answer', '')}
-
-# ---
-# """
-#         await cl.Message(content=qa_display).send()
-#         await cl.Message(content="Type **`accept`** to proceed or request more questions.").send()
-#         return
-
-#     # pipeline complete — render final output cards
-#     final_output = current_state.values.get("final_output", {})
-#     await render_final_output(final_output)
-
-#     # update stage to done
-#     cl.user_session.set("stage", "done")
-
-# # --- Render Final Output ---
-# # formats and displays the three output cards
-
-# async def render_final_output(final_output: dict):
-
-#     # extract three sections from final output
-#     cover_letter_data = final_output.get("cover_letter", {})
-#     qa_data = final_output.get("interview_qa", {})
-#     gap_data = final_output.get("gap_report", {})
-#     meta = final_output.get("meta", {})
-
-#     # --- summary header ---
-#     await cl.Message(content=f"""
-# 🎉 **Your Application Package is Ready!**
-
-# 📋 Role: **{meta.get('role', '')}**
-# 🎯 Match Score: **{meta.get('match_score', 0)}/10**
-# ❓ Questions Generated: **{meta.get('total_questions', 0)}**
-# ⚠️ Gaps Found: **{meta.get('total_gaps', 0)}**
-#     """).send()
-
-#     # --- card 1: cover letter ---
-#     await cl.Message(content=f"""
-# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-# 📄 **COVER LETTER**
-# *{cover_letter_data.get('role', '')}*
-# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-# {cover_letter_data.get('content', '')}
-#     """).send()
-
-#     # --- card 2: interview Q&A ---
-#     qa_pairs = qa_data.get("qa_pairs", [])
-#     qa_card = "━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-#     qa_card += f"❓ **INTERVIEW PREPARATION** ({qa_data.get('total_questions', 0)} Questions)\n"
-#     qa_card += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-
-#     for i, qa in enumerate(qa_pairs, 1):
-#         qa_card += f"**Q{i} [{qa.get('category', '').upper()}]**\n"
-#         qa_card += f"{qa.get('question', '')}\n\n"
-#         qa_card += f"💡 *{qa.get('suggested_answer', '')}*\n\n"
-#         qa_card += "---\n"
-
-#     await cl.Message(content=qa_card).send()
-
-#     # --- card 3: gap report ---
-#     gaps = gap_data.get("gaps", [])
-#     gap_card = "━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-#     gap_card += f"⚠️ **GAP REPORT** — {gap_data.get('overall_assessment', '')}\n"
-#     gap_card += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-
-#     for gap in gaps:
-#         gap_card += f"{gap.get('severity_icon', '🟢')} **{gap.get('gap', '')}** "
-#         gap_card += f"*({gap.get('severity', '').upper()})*\n"
-#         gap_card += f"→ {gap.get('advice', '')}\n\n"
-
-#     await cl.Message(content=gap_card).send()
-
-#     # final sign-off message
-#     await cl.Message(content="✅ **All done! Good luck with your application. You've got this! 🚀**").send()
\ No newline at end of file
+# main.py — headless batch CLI
+# runs the full pipeline for many (CV, JD) pairs without the Chainlit UI
+# HITL pauses are answered by auto-approve / auto-accept policies,
+# finished packages are appended to a JSONL file so a crashed run can resume
+#
+# usage:
+#   python main.py --manifest jobs.jsonl --output packages.jsonl
+#   python main.py --cv-dir cvs/ --jd-dir jds/ --output packages.jsonl --concurrency 8
+#
+# manifest: JSONL (one object per line) or a JSON list of objects with
+#   "cv"      — path to the CV file (PDF or DOCX)
+#   "jd"      — job description text, or "jd_file" — path to a text file with it
+#   "id"      — optional unique job id (defaults to "<cv name>__<line number>")
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import Counter
+from graph.graph import get_graph
+from graph.nodes.parser import parse_cv
+from graph.session import CopilotSession
+from graph.warmup import warm_up
+
+
+# JD files picked up in --jd-dir mode
+JD_EXTENSIONS = [".txt", ".md"]
+
+# CV files picked up in --cv-dir mode
+CV_EXTENSIONS = [".pdf", ".docx"]
+
+# safety net — a policy that keeps sending feedback must not loop forever
+MAX_HITL_ROUNDS = 10
+
+
+# --- Manifest Loading ---
+
+def load_manifest(path: str) -> list:
+    """
+    Reads a JSON list or JSONL manifest into a list of jobs.
+    Each job: {"id": str, "cv": path, "jd": text}
+    """
+
+    with open(path, encoding="utf-8") as manifest_file:
+        raw = manifest_file.read().strip()
+
+    # JSON list or one object per line
+    if raw.startswith("["):
+        entries = json.loads(raw)
+    else:
+        entries = [json.loads(line) for line in raw.splitlines() if line.strip()]
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for number, entry in enumerate(entries, 1):
+
+        # relative paths are resolved against the manifest's folder
+        cv_path = os.path.join(base_dir, entry["cv"])
+
+        if "jd" in entry:
+            job_description = entry["jd"]
+        else:
+            with open(os.path.join(base_dir, entry["jd_file"]), encoding="utf-8") as jd_file:
+                job_description = jd_file.read()
+
+        job_id = entry.get("id") or f"{os.path.splitext(os.path.basename(cv_path))[0]}__{number}"
+        jobs.append({"id": str(job_id), "cv": cv_path, "jd": job_description})
+
+    return jobs
+
+
+def jobs_from_directories(cv_dir: str, jd_dir: str) -> list:
+    """Every CV in cv_dir paired with every JD in jd_dir (cross product)."""
+
+    def files_with(folder, extensions):
+        return sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if os.path.splitext(name)[1].lower() in extensions
+        )
+
+    jobs = []
+    for cv_path in files_with(cv_dir, CV_EXTENSIONS):
+        for jd_path in files_with(jd_dir, JD_EXTENSIONS):
+            with open(jd_path, encoding="utf-8") as jd_file:
+                job_description = jd_file.read()
+            cv_name = os.path.splitext(os.path.basename(cv_path))[0]
+            jd_name = os.path.splitext(os.path.basename(jd_path))[0]
+            jobs.append({"id": f"{cv_name}__{jd_name}", "cv": cv_path, "jd": job_description})
+
+    return jobs
+
+
+def completed_job_ids(output_path: str) -> set:
+    """
+    Ids already written to the output file — these are skipped on resume.
+    A half-written last line (crash mid-write) is ignored and that job reruns.
+    """
+
+    if not os.path.exists(output_path):
+        return set()
+
+    done = set()
+    with open(output_path, encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                done.add(json.loads(line)["id"])
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return done
+
+
+# --- Pipeline Driver ---
+
+def hitl_1_reply(round_number: int, args) -> str:
+    # optional feedback on the first round, then approve
+    if args.hitl_1_feedback and round_number == 0:
+        return args.hitl_1_feedback
+    return "approve"
+
+
+def hitl_2_reply(round_number: int, args) -> str:
+    # optional "more questions" request on the first round, then accept
+    if args.hitl_2_request and round_number == 0:
+        return args.hitl_2_request
+    return "accept"
+
+
+async def run_job(session: CopilotSession, job: dict, cv_raw_text: str, args) -> dict:
+    """
+    Runs one job end to end on `session`, answering HITL pauses with the configured policies.
+    Returns the final_output package.
+    """
+
+    # CV text is seeded — parse_cv skips, every JD for the same CV reuses one parse
+    result = await session.start(job_description=job["jd"], cv_file_path=job["cv"], cv_raw_text=cv_raw_text)
+
+    rounds = {"hitl_1": 0, "hitl_2": 0}
+    while result.stage != "done":
+        if result.stage not in rounds:
+            raise RuntimeError(f"unexpected pause at {result.stage}")
+        if rounds[result.stage] >= MAX_HITL_ROUNDS:
+            raise RuntimeError(f"too many rounds at {result.stage}")
+
+        if result.stage == "hitl_1":
+            reply = hitl_1_reply(rounds["hitl_1"], args)
+        else:
+            reply = hitl_2_reply(rounds["hitl_2"], args)
+
+        rounds[result.stage] += 1
+        result = await session.submit_feedback(reply)
+
+    return result.final_output
+
+
+async def run_batch(jobs: list, args) -> int:
+    """
+    Runs all pending jobs with at most args.concurrency in flight.
+    Appends one JSONL line per finished job; failures go to <output>.errors.jsonl.
+    Returns the number of failed jobs.
+    """
+
+    done = completed_job_ids(args.output)
+    pending = [job for job in jobs if job["id"] not in done]
+    print(f"{len(jobs)} jobs, {len(done)} already done, {len(pending)} to run", file=sys.stderr)
+
+    # compile the graph, load the parsers and open the API connections before the first job
+    if not args.skip_warm_up:
+        status = await warm_up()
+        failed = [name for name, step in status["steps"].items() if not step["ok"]]
+        print(f"warm-up took {status['seconds']}s" + (f" (failed: {', '.join(failed)})" if failed else ""), file=sys.stderr)
+
+    graph = get_graph()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    write_lock = asyncio.Lock()
+    failures = 0
+
+    # parse each distinct CV once, in a worker thread, when its first job starts —
+    # every job of that CV awaits the same parse, and a CV that cannot be read
+    # (missing file, rejected by preflight) fails only its own jobs
+    cv_parses = {}
+
+    def parsed_cv(cv_path: str) -> asyncio.Future:
+        if cv_path not in cv_parses:
+            cv_parses[cv_path] = asyncio.ensure_future(asyncio.to_thread(parse_cv, {"cv_file_path": cv_path}))
+        return cv_parses[cv_path]
+
+    async def append_line(path: str, record: dict):
+        # one writer at a time, flushed immediately so a crash loses at most the in-flight jobs
+        async with write_lock:
+            with open(path, "a", encoding="utf-8") as output_file:
+                output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output_file.flush()
+
+    async def worker(job: dict):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            session = CopilotSession(graph, thread_id=job["id"])
+            try:
+                try:
+                    parsed = await parsed_cv(job["cv"])
+                    final_output = await run_job(session, job, parsed["cv_raw_text"], args)
+                except Exception as error:
+                    failures += 1
+                    print(f"[failed] {job['id']}: {error}", file=sys.stderr)
+                    await append_line(args.output + ".errors.jsonl", {"id": job["id"], "error": repr(error)})
+                    return
+
+                elapsed = round(time.perf_counter() - started, 2)
+                await append_line(args.output, {
+                    "id": job["id"],
+                    "cv": job["cv"],
+                    "elapsed_seconds": elapsed,
+                    "final_output": final_output,
+                })
+                print(f"[done] {job['id']} in {elapsed}s", file=sys.stderr)
+            finally:
+                # the package is on disk (or the job failed) — free the thread's checkpoints
+                # and token ledger entry instead of holding them for the rest of the batch
+                await session.cancel(discard=True)
+
+    await asyncio.gather(*[worker(job) for job in pending])
+    return failures
+
+
+# --- Entry Point ---
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the job application pipeline headlessly over many CVs and JDs.")
+
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", help="JSON/JSONL manifest of jobs (cv + jd / jd_file)")
+    source.add_argument("--cv-dir", help="folder of CVs (PDF/DOCX) — paired with every JD in --jd-dir")
+
+    parser.add_argument("--jd-dir", help="folder of JD text files (.txt/.md), used with --cv-dir")
+    parser.add_argument("--output", required=True, help="JSONL file finished packages are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="max pipelines running at once (default 4)")
+    parser.add_argument("--hitl-1-feedback", default="", help="feedback sent once at HITL 1 before auto-approving")
+    parser.add_argument("--hitl-2-request", default="", help="'more questions' request sent once at HITL 2 before auto-accepting")
+    parser.add_argument("--skip-warm-up", action="store_true", help="start jobs without warming up the worker first")
+
+    args = parser.parse_args(argv)
+    if args.cv_dir and not args.jd_dir:
+        parser.error("--cv-dir requires --jd-dir")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.manifest:
+        jobs = load_manifest(args.manifest)
+    else:
+        jobs = jobs_from_directories(args.cv_dir, args.jd_dir)
+
+    # ids key the resume logic and the graph threads — they must be unique
+    duplicates = sorted(job_id for job_id, count in Counter(job["id"] for job in jobs).items() if count > 1)
+    if duplicates:
+        print(f"duplicate job ids in manifest: {', '.join(duplicates)}", file=sys.stderr)
+        return 2
+
+    failures = asyncio.run(run_batch(jobs, args))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# test_letter_validator.py — the deterministic cover letter checks and fixes
+# pure functions, no LLM or graph needed:  python -m pytest tests/
+
+from graph.nodes.letter_validator import check_cover_letter, split_letter, REQUIRED_GREETING
+
+
+BODY = [
+    "I have spent five years building backend services in Python and Go.",
+    "At Acme I led the move to Kubernetes and cut deploy times in half.",
+    "I would welcome the chance to bring that experience to your team.",
+]
+
+SIGN_OFF = "Best regards,\nAlex"
+
+
+def letter(first_block: str, *rest: str) -> str:
+    return "\n\n".join([first_block, *rest, SIGN_OFF])
+
+
+def test_valid_letter_is_left_untouched():
+    text = letter(REQUIRED_GREETING, *BODY)
+    fixed, report = check_cover_letter(text)
+    assert fixed == text
+    assert report["violations"] == []
+
+
+def test_other_salutation_line_is_replaced():
+    fixed, report = check_cover_letter(letter("Dear Hiring Manager,", *BODY))
+    assert fixed == letter(REQUIRED_GREETING, *BODY)
+    assert report["fixed"] == ["greeting"]
+
+
+def test_inline_salutation_is_split_from_the_first_paragraph():
+    parts = split_letter(letter("Dear Hiring Manager, " + BODY[0], *BODY[1:]))
+    assert parts["greeting"] == "Dear Hiring Manager,"
+    assert parts["paragraphs"] == BODY
+
+
+def test_inline_salutation_is_replaced_not_kept_in_the_body():
+    fixed, report = check_cover_letter(letter("Dear Hiring Manager, " + BODY[0], *BODY[1:]))
+    assert fixed == letter(REQUIRED_GREETING, *BODY)
+    assert report["unfixable"] == []
+
+
+def test_required_greeting_on_the_first_line_of_body_counts():
+    parts = split_letter(letter(REQUIRED_GREETING + " " + BODY[0], *BODY[1:]))
+    assert parts["greeting"] == REQUIRED_GREETING
+    assert parts["paragraphs"] == BODY
+
+
+def test_sentence_starting_with_a_salutation_word_stays_in_the_body():
+    opening = "Greetings from Berlin are what I bring to this application today."
+    parts = split_letter(letter(opening, *BODY[1:]))
+    assert parts["greeting"] == ""
+    assert parts["paragraphs"] == [opening] + BODY[1:]
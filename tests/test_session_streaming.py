@@ -0,0 +1,69 @@
+# test_session_streaming.py — what CopilotSession streams to the chat bubble
+# runs the real graph against the local stand-in model (benchmarks/local_model.py),
+# streaming word by word like ChatOpenAI — no API key or network needed
+
+import asyncio
+import uuid
+from benchmarks import local_model
+from benchmarks.local_model import local_chat_model
+from graph.router import use_chat_model
+from graph.session import CopilotSession
+
+
+JOB_DESCRIPTION = "Senior Backend Engineer. We need Python, Kubernetes and Kafka."
+CV_TEXT = "Backend engineer, six years of Python services on Kubernetes and AWS."
+
+
+def run_session(scenario) -> None:
+    # runs scenario(session) on a fresh thread with the streaming stand-in model, then drops the thread
+    async def run():
+        session = CopilotSession(thread_id=f"test-{uuid.uuid4()}")
+        try:
+            await scenario(session)
+        finally:
+            await session.cancel(discard=True)
+
+    use_chat_model(local_chat_model(0.0, streaming=True))
+    try:
+        asyncio.run(run())
+    finally:
+        use_chat_model(None)
+
+
+async def streamed_text(events) -> tuple:
+    # joins the token events of one run and keeps its result
+    tokens, result = [], None
+    async for event in events:
+        if event.type == "token":
+            tokens.append(event.text)
+        elif event.type == "result":
+            result = event.result
+    return "".join(tokens), result
+
+
+def test_targeted_edit_streams_no_patch_json():
+    async def scenario(session):
+        first_draft, result = await streamed_text(session.stream_start(job_description=JOB_DESCRIPTION, cv_raw_text=CV_TEXT))
+        assert result.stage == "hitl_1"
+        assert first_draft.startswith("Hi there,")
+
+        # a paragraph-level request goes through the CoverLetterPatch path
+        edit, result = await streamed_text(session.stream_feedback("Mention Kafka in the second paragraph"))
+        assert result.stage == "hitl_1"
+        assert "{" not in edit and '"edits"' not in edit
+        assert "move to distributed systems and mentored" in result.cover_letter_draft
+
+    run_session(scenario)
+
+
+def test_validator_retry_does_not_stream_a_second_letter(monkeypatch):
+    # over the word limit — the validator cannot fix that and sends it back once
+    long_letter = local_model.LETTER.replace("\n\nBest regards,", " " + "More detail here. " * 80 + "\n\nBest regards,")
+    monkeypatch.setattr(local_model, "LETTER", long_letter)
+
+    async def scenario(session):
+        streamed, result = await streamed_text(session.stream_start(job_description=JOB_DESCRIPTION, cv_raw_text=CV_TEXT))
+        assert result.cover_letter_report["retries"] == 1
+        assert streamed.count("Hi there,") == 1
+
+    run_session(scenario)